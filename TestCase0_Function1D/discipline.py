@@ -1,9 +1,17 @@
 from gemseo.core.discipline import MDODiscipline
-from numpy import ones, sin, array
+from numpy import around, ones, sin, array, zeros
+
+
+def compute_f(x):
+    # One point or a batch of points: f is evaluated at each component of x
+    return sin(x) + sin((10/3)*x)
 
 
 class Function1D(MDODiscipline):
-    def __init__(self):
+    def __init__(self, cache=None, cache_decimals=10):
+        # x can be one point or an array of N points (f is then an array of N values)
+        # cache: optional dictionary-like object {x: f} shared between disciplines (e.g. a Manager().dict()
+        # shared by the processes of a multistart), x is rounded to cache_decimals to build the keys
         super(Function1D, self).__init__()
 
         self.input_grammar.initialize_from_data_names(["x"])
@@ -11,13 +19,35 @@ class Function1D(MDODiscipline):
 
         self.default_inputs = {"x": ones(1)}
 
+        self.shared_cache = cache
+        self.cache_decimals = cache_decimals
+        self.n_cache_hits = 0
+
     def _run(self):
 
         x = self.get_inputs_by_name("x")
 
-        f = sin(x) + sin((10/3)*x)
+        if self.shared_cache is None:
+            self.local_data["f"] = array(compute_f(x))
+            return
+
+        # Only the points missing from the cache are evaluated
+        keys = [float(key) for key in around(x, self.cache_decimals)]
+        f = zeros(len(x))
+        missing = []
+        for i, key in enumerate(keys):
+            value = self.shared_cache.get(key)
+            if value is None:
+                missing.append(i)
+            else:
+                f[i] = value
+        self.n_cache_hits += len(x) - len(missing)
+
+        if missing:
+            f[missing] = compute_f(x[missing])
+            self.shared_cache.update(dict((keys[i], f[i]) for i in missing))
 
-        self.local_data["f"] = array(f)
+        self.local_data["f"] = f
 
 
 #----------------------------------------------------------------------------------------
@@ -26,4 +56,4 @@ class Function1D(MDODiscipline):
 if __name__=='__main__':
 
     disc = Function1D()
-    disc.execute()
\ No newline at end of file
+    disc.execute()
@@ -0,0 +1,86 @@
+from __future__ import division, unicode_literals
+
+from numpy import abs as np_abs, argsort, array, concatenate, diff
+
+
+def lipschitz_bnb(discipline, l_b, u_b, lipschitz=None, lipschitz_factor=1.5, n_init=5, batch_size=8,
+                  tol=1e-4, max_evals=5000):
+    """Piyavskii-Shubert branch and bound on [l_b, u_b] for a discipline with input x and output f that
+    evaluates arrays of points in one execution (e.g. Function1D).
+
+    On each interval [a, b] between two samples, f >= (f_a + f_b) / 2 - L (b - a) / 2 (lower bound reached at
+    x* = (a + b) / 2 + (f_a - f_b) / (2 L)). Each round evaluates the x* of the batch_size intervals with the
+    lowest bounds in one execution; the intervals whose bound is above the best value found are pruned.
+    The search stops when the gap between the best value and the lowest bound is below tol.
+
+    lipschitz: Lipschitz constant L of f; if None, L is estimated at each round as lipschitz_factor times
+    the largest slope between two neighbouring samples (the optimality gap is then an estimate, not a bound).
+    Returns a dictionary with x_opt, f_opt, the lower bound and gap, the number of evaluations and of rounds.
+    """
+
+    def evaluate(x):
+        return array(discipline.execute({"x": array(x, dtype=float)})["f"], dtype=float)
+
+    # Initial uniform sampling (bounds included)
+    x_s = l_b + (u_b - l_b) * array(range(n_init)) / (n_init - 1)
+    f_s = evaluate(x_s)
+    n_evals, n_rounds = n_init, 0
+
+    while True:
+        n_rounds += 1
+
+        if lipschitz is None:
+            slopes = np_abs(diff(f_s) / diff(x_s))
+            l_c = max(lipschitz_factor * slopes.max(), 1e-12)
+        else:
+            l_c = lipschitz
+
+        # Lower bound and its position on each interval
+        f_a, f_b, a, b = f_s[:-1], f_s[1:], x_s[:-1], x_s[1:]
+        bounds = 0.5 * (f_a + f_b) - 0.5 * l_c * (b - a)
+        x_new = 0.5 * (a + b) + (f_a - f_b) / (2.0 * l_c)
+
+        f_best = f_s.min()
+        lower_bound = min(bounds.min(), f_best)
+        if f_best - lower_bound <= tol or n_evals >= max_evals:
+            break
+
+        # Branch on the most promising intervals (pruning those that cannot improve the best value)
+        order = argsort(bounds)[:min(batch_size, max_evals - n_evals)]
+        order = order[bounds[order] < f_best - tol]
+        x_new = x_new[order]
+
+        f_new = evaluate(x_new)
+        n_evals += len(x_new)
+
+        x_s = concatenate((x_s, x_new))
+        f_s = concatenate((f_s, f_new))
+        order = argsort(x_s, kind="stable")
+        x_s, f_s = x_s[order], f_s[order]
+
+    i_best = f_s.argmin()
+
+    return {"x_opt": x_s[i_best],
+            "f_opt": f_s[i_best],
+            "lower_bound": lower_bound,
+            "gap": f_s[i_best] - lower_bound,
+            "lipschitz": l_c,
+            "n_evals": n_evals,
+            "n_rounds": n_rounds,
+            "x_samples": x_s,
+            "f_samples": f_s}
+
+
+#----------------------------------------------------------------------------------------
+# Tester
+#----------------------------------------------------------------------------------------
+if __name__=='__main__':
+
+    from discipline import Function1D
+
+    # |f'(x)| = |cos(x) + 10/3 cos(10x/3)| <= 1 + 10/3
+    for lipschitz in [1.0 + 10.0 / 3.0, None]:
+        result = lipschitz_bnb(Function1D(), 2.5, 7.0, lipschitz=lipschitz)
+        print("L = %.3f: x_opt = %.6f, f_opt = %.6f, gap = %.1e, %d evaluations in %d rounds" %
+              (result["lipschitz"], result["x_opt"], result["f_opt"], result["gap"], result["n_evals"],
+               result["n_rounds"]))
@@ -0,0 +1,155 @@
+from __future__ import division, unicode_literals
+
+from multiprocessing import Manager, Pool
+
+from numpy import argmin, array, mean
+from scipy.stats import qmc
+
+from gemseo.algos.design_space import DesignSpace
+from gemseo.algos.stop_criteria import TerminationCriterion
+from gemseo.api import configure_logger, create_scenario
+
+from discipline import Function1D
+
+
+class KnownBasinReached(TerminationCriterion):
+    """Raised by the new-iteration callback when a local optimization enters the basin of a known optimum
+    (caught by the driver, which ends the optimization as for the other termination criteria)"""
+
+
+def create_starting_points(n_starts, l_b, u_b, method="lhs", seed=1):
+    """Space-filling starting points in [l_b, u_b] (method: "lhs" or "sobol"), array of shape (n_starts, 1)"""
+    if method == "lhs":
+        sampler = qmc.LatinHypercube(d=1, seed=seed)
+    elif method == "sobol":
+        sampler = qmc.Sobol(d=1, scramble=True, seed=seed)
+    else:
+        raise ValueError("Unknown sampling method " + str(method))
+    return qmc.scale(sampler.random(n_starts), l_b, u_b)
+
+
+def run_local_optimization(i_start, x_0, l_b, u_b, algo, max_iter, basin_tol, cache, optima, cache_decimals):
+    """Worker: one local optimization from x_0.
+
+    cache: dictionary {x: f} shared by all the starts (the evaluations already done are not repeated), x is
+    rounded to cache_decimals to build the keys
+    optima: dictionary {start: (x_opt, f_opt)} of the converged starts, shared by all the starts; the optimization
+    stops as soon as an iterate is within basin_tol of one of them (it would converge to the same optimum)
+    """
+    discipline = Function1D(cache=cache, cache_decimals=cache_decimals)
+
+    design_space = DesignSpace()
+    design_space.add_variable("x", 1, l_b=l_b, u_b=u_b, value=array(x_0))
+
+    scenario = create_scenario([discipline],
+                               formulation="IDF",
+                               objective_name="f",
+                               design_space=design_space)
+    problem = scenario.formulation.opt_problem
+
+    # Start whose basin has been reached
+    merged_with = []
+
+    def check_known_basins(x_vect):
+        for j, (x_opt, _) in optima.items():
+            if abs(x_vect[0] - x_opt[0]) <= basin_tol:
+                merged_with.append(j)
+                raise KnownBasinReached()
+
+    problem.add_callback(check_known_basins, each_new_iter=True)
+
+    scenario.execute(input_data={"max_iter": max_iter, "algo": algo})
+
+    f_opt, x_opt = problem.get_optimum()[:2]
+    merged_with = merged_with[0] if merged_with else None
+    if merged_with is None:
+        optima[i_start] = (array(x_opt), float(f_opt))
+
+    return {"start": i_start,
+            "x_0": array(x_0),
+            "x_opt": array(x_opt),
+            "f_opt": float(f_opt),
+            "n_evals": discipline.n_calls,
+            "n_cache_hits": discipline.n_cache_hits,
+            "merged_with": merged_with}
+
+
+def _run_local_optimization(args):
+    return run_local_optimization(*args)
+
+
+def get_basins(results, basin_tol):
+    """Groups the local optima closer than basin_tol: list of basins sorted by optimum (best first).
+
+    The starts stopped early join the basin of the start they merged with.
+    """
+    basins, basin_of_start = [], {}
+    converged = [res for res in results if res["merged_with"] is None]
+    for res in sorted(converged, key=lambda res: res["x_opt"][0]):
+        if basins and abs(res["x_opt"][0] - basins[-1]["x_opt"][0]) <= basin_tol:
+            basin = basins[-1]
+        else:
+            basin = {"x_opt": res["x_opt"], "f_opt": res["f_opt"], "starts": [], "n_evals": []}
+            basins.append(basin)
+        basin_of_start[res["start"]] = basin
+
+    for res in results:
+        basin = basin_of_start[res["start"] if res["merged_with"] is None else res["merged_with"]]
+        basin["starts"].append(res["start"])
+        basin["n_evals"].append(res["n_evals"])
+        if res["f_opt"] < basin["f_opt"]:
+            basin["x_opt"], basin["f_opt"] = res["x_opt"], res["f_opt"]
+
+    return sorted(basins, key=lambda basin: basin["f_opt"])
+
+
+def multistart(n_starts=16, n_processes=4, l_b=2.5, u_b=7.0, method="lhs", algo="NLOPT_COBYLA", max_iter=100,
+               basin_tol=1e-2, cache_decimals=6, seed=1):
+    """Multistart global search: local optimizations from space-filling starting points, run concurrently.
+
+    The starts share a cache of the evaluations, with keys x rounded to cache_decimals: the paths of two starts
+    seldom go through the same points, the hits come from the starts converging to the same optimum. Most of the
+    savings come from the basin check, which stops a start as soon as it reaches the basin of a known optimum.
+    Returns the results of each start and the basins (local optima with their starts), best basin first.
+    """
+    starts = create_starting_points(n_starts, l_b, u_b, method=method, seed=seed)
+
+    manager = Manager()
+    cache, optima = manager.dict(), manager.dict()
+
+    jobs = [(i, x_0, l_b, u_b, algo, max_iter, basin_tol, cache, optima, cache_decimals)
+            for i, x_0 in enumerate(starts)]
+    with Pool(processes=n_processes, initializer=configure_logger) as pool:
+        results = pool.map(_run_local_optimization, jobs, chunksize=1)
+
+    manager.shutdown()
+
+    return results, get_basins(results, basin_tol)
+
+
+#----------------------------------------------------------------------------------------
+# Multistart of the Function1D case
+#----------------------------------------------------------------------------------------
+if __name__ == '__main__':
+
+    n_starts = 16
+    results, basins = multistart(n_starts=n_starts, n_processes=4, method="lhs")
+
+    best = basins[0]
+    print("")
+    print("Best optimum: x = %.6f, f = %.6f (%d starts out of %d)" %
+          (best["x_opt"][0], best["f_opt"], len(best["starts"]), n_starts))
+
+    print("")
+    print("%10s  %10s  %8s  %10s" % ("x_opt", "f_opt", "starts", "mean evals"))
+    for basin in basins:
+        print("%10.5f  %10.5f  %8d  %10.1f" %
+              (basin["x_opt"][0], basin["f_opt"], len(basin["starts"]), mean(basin["n_evals"])))
+
+    n_evals = sum(res["n_evals"] for res in results)
+    n_hits = sum(res["n_cache_hits"] for res in results)
+    n_merged = sum(res["merged_with"] is not None for res in results)
+    print("")
+    print("Evaluations: %d (%d from the cache), starts stopped early in a known basin: %d" %
+          (n_evals, n_hits, n_merged))
+    print("Start of the best optimum: x_0 = %.5f" % results[argmin([res["f_opt"] for res in results])]["x_0"][0])
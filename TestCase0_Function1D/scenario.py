@@ -8,7 +8,11 @@ from gemseo.api import configure_logger, create_scenario
 configure_logger()
 
 from discipline import Function1D
+from lipschitz_bnb import lipschitz_bnb
 
+# Optimizer: a GEMSEO algorithm (e.g. "NLOPT_COBYLA", local, from x = 2.5) or "LIPSCHITZ_BNB" (global branch
+# and bound with the Lipschitz constant of f, run outside of the scenario)
+algo = "NLOPT_COBYLA"
 
 # Create the disciplines
 disciplines = [Function1D()]
@@ -25,8 +29,16 @@ scenario = create_scenario(disciplines,
                            design_space=design_space)
 
 
-# Run scenario
-scenario.execute(input_data={"max_iter": 100, "algo": "NLOPT_COBYLA"})
+if algo == "LIPSCHITZ_BNB":
+    # |f'(x)| = |cos(x) + 10/3 cos(10x/3)| <= 1 + 10/3
+    result = lipschitz_bnb(disciplines[0], 2.5, 7.0, lipschitz=1.0 + 10.0 / 3.0, batch_size=8, tol=1e-4)
 
-# Post-Process
-scenario.post_process("OptHistoryView", save=False, show=True)
+    print("LIPSCHITZ_BNB: x = %.6f, f = %.6f, optimality gap = %.1e, %d evaluations in %d executions" %
+          (result["x_opt"], result["f_opt"], result["gap"], result["n_evals"], disciplines[0].n_calls))
+
+else:
+    # Run scenario
+    scenario.execute(input_data={"max_iter": 100, "algo": algo})
+
+    # Post-Process
+    scenario.post_process("OptHistoryView", save=False, show=True)
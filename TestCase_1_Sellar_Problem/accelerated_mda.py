@@ -0,0 +1,182 @@
+from __future__ import division, unicode_literals
+
+from numpy import array, concatenate, cumsum, dot, split, zeros
+from numpy.linalg import lstsq
+
+from gemseo.api import create_mda
+from gemseo.mda.gauss_seidel import MDAGaussSeidel
+
+
+class MDAAccelerated(MDAGaussSeidel):
+    """Gauss-Seidel MDA whose coupling iterates are modified by an acceleration method.
+
+    One Gauss-Seidel sweep is the fixed-point map y -> g(y) of the couplings; the next iterate is
+    computed from the history of y and g by _accelerate (plain Gauss-Seidel: y_next = g).
+    """
+
+    def __init__(self, disciplines, name=None, max_mda_iter=10, tolerance=1e-6, **options):
+        super(MDAAccelerated, self).__init__(
+            disciplines, name=name, max_mda_iter=max_mda_iter, tolerance=tolerance, **options
+        )
+        # Couplings between the disciplines of the MDA
+        inputs, outputs = set(), set()
+        for discipline in disciplines:
+            inputs.update(discipline.get_input_data_names())
+            outputs.update(discipline.get_output_data_names())
+        self.coupling_names = sorted(inputs & outputs)
+
+    def _get_couplings(self):
+        return concatenate([self.local_data[name].ravel() for name in self.coupling_names])
+
+    def _set_couplings(self, y, sizes):
+        for name, value in zip(self.coupling_names, split(y, cumsum(sizes)[:-1])):
+            self.local_data[name] = value
+
+    def _reset_acceleration(self):
+        pass
+
+    def _accelerate(self, y, g):
+        return g
+
+    def _run(self):
+        if self.warm_start:
+            self._couplings_warm_start()
+        self._reset_acceleration()
+
+        y = None
+        current_iter = 0
+        while True:
+            if y is None and all(name in self.local_data for name in self.coupling_names):
+                y = self._get_couplings()
+
+            for discipline in self.disciplines:
+                discipline.execute(self.local_data)
+                self.local_data.update(discipline.get_output_data())
+
+            g = self._get_couplings()
+            sizes = [self.local_data[name].size for name in self.coupling_names]
+            if y is None:
+                y = zeros(g.size)
+
+            # Same residual and stopping criterion as the GEMSEO MDAs: change of the couplings over the iteration,
+            # normalised by norm0 (see set_residual_reference); the first sweep is compared to zero couplings,
+            # as in MDAGaussSeidel
+            self._compute_residual(y if current_iter else zeros(g.size), g, current_iter, first=current_iter == 0)
+            current_iter += 1
+
+            if self._termination(current_iter):
+                break
+
+            # Next iterate: the disciplines keep the outputs of the last sweep, the couplings are overwritten
+            y = self._accelerate(y, g)
+            self._set_couplings(y, sizes)
+
+
+class MDAAitken(MDAAccelerated):
+    """Gauss-Seidel MDA with Aitken dynamic relaxation: y_next = y + omega * (g - y), where omega is updated
+    from the last two residuals (Irons-Tuck formula)."""
+
+    def __init__(self, disciplines, name=None, max_mda_iter=10, tolerance=1e-6, omega_0=1.0,
+                 omega_bounds=(0.05, 2.0), **options):
+        self.omega_0 = omega_0
+        self.omega_bounds = omega_bounds
+        super(MDAAitken, self).__init__(
+            disciplines, name=name, max_mda_iter=max_mda_iter, tolerance=tolerance, **options
+        )
+
+    def _reset_acceleration(self):
+        self.omega = self.omega_0
+        self.r_prev = None
+
+    def _accelerate(self, y, g):
+        r = g - y
+        if self.r_prev is not None:
+            dr = r - self.r_prev
+            dr_2 = dot(dr, dr)
+            if dr_2 > 0.0:
+                omega = -self.omega * dot(self.r_prev, dr) / dr_2
+                self.omega = min(max(omega, self.omega_bounds[0]), self.omega_bounds[1])
+        self.r_prev = r
+        return y + self.omega * r
+
+
+class MDAAnderson(MDAAccelerated):
+    """Gauss-Seidel MDA with Anderson mixing: the next iterate combines the last depth + 1 iterates so that
+    the combination of their residuals is minimal (least squares), with the mixing parameter beta."""
+
+    def __init__(self, disciplines, name=None, max_mda_iter=10, tolerance=1e-6, depth=5, beta=1.0, **options):
+        self.depth = depth
+        self.beta = beta
+        super(MDAAnderson, self).__init__(
+            disciplines, name=name, max_mda_iter=max_mda_iter, tolerance=tolerance, **options
+        )
+
+    def _reset_acceleration(self):
+        self.y_hist = []
+        self.r_hist = []
+
+    def _accelerate(self, y, g):
+        r = g - y
+        self.y_hist = (self.y_hist + [y])[-(self.depth + 1):]
+        self.r_hist = (self.r_hist + [r])[-(self.depth + 1):]
+
+        if self.depth == 0 or len(self.r_hist) == 1:
+            return y + self.beta * r
+
+        # Differences of the iterates and residuals [n_couplings x m]
+        d_y = array(self.y_hist[1:]).T - array(self.y_hist[:-1]).T
+        d_r = array(self.r_hist[1:]).T - array(self.r_hist[:-1]).T
+        gamma = lstsq(d_r, r, rcond=None)[0]
+
+        return y - dot(d_y, gamma) + self.beta * (r - dot(d_r, gamma))
+
+
+# MDA methods for the y_1/y_2 coupling
+MDA_METHODS = ["jacobi", "gauss_seidel", "aitken", "anderson", "gs_newton"]
+
+
+def get_inner_mdas(mda):
+    """MDA and all its inner MDAs (stages of a sequential MDA such as GSNewtonMDA, MDAs of an MDAChain)"""
+    mdas = [mda]
+    for sub_mda in list(getattr(mda, "mda_sequence", [])) + list(getattr(mda, "sub_mda_list", [])):
+        mdas += get_inner_mdas(sub_mda)
+    return mdas
+
+
+def set_residual_reference(mda, norm0=1.0):
+    """Sets the reference of the normed residual of an MDA and of its inner MDAs.
+
+    GEMSEO normalises the residual by norm0, the first residual computed by each MDA (never reset between two
+    executions, and different for each stage of GSNewtonMDA), so that the same tolerance is a different stopping
+    criterion for each method and each first point. With a common norm0, all the methods stop on the same
+    criterion (norm0 = 1: absolute change of the couplings over one iteration <= tolerance).
+    """
+    for sub_mda in get_inner_mdas(mda):
+        sub_mda.norm0 = norm0
+
+
+def create_sellar_mda(method, disciplines, max_mda_iter=50, tolerance=1e-10, norm0=1.0, **options):
+    """Creates the MDA solving the coupling of the disciplines with one of the MDA_METHODS.
+
+    gs_newton is the GEMSEO GSNewtonMDA: a few Gauss-Seidel iterations (max_mda_iter_gs) to get close to the
+    solution, then Newton-Raphson iterations using the Jacobians of the disciplines.
+    All the methods stop on the same criterion: see set_residual_reference for norm0.
+    """
+    if method == "jacobi":
+        mda = create_mda("MDAJacobi", disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance, **options)
+    elif method == "gauss_seidel":
+        mda = create_mda("MDAGaussSeidel", disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance, **options)
+    elif method == "aitken":
+        mda = MDAAitken(disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance, **options)
+    elif method == "anderson":
+        mda = MDAAnderson(disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance, **options)
+    elif method == "gs_newton":
+        mda = create_mda("GSNewtonMDA", disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance, **options)
+        # The tolerance is not forwarded to the Newton stage
+        for sub_mda in get_inner_mdas(mda):
+            sub_mda.tolerance = tolerance
+    else:
+        raise ValueError("Unknown MDA method " + str(method) + ", available: " + ", ".join(MDA_METHODS))
+
+    set_residual_reference(mda, norm0)
+    return mda
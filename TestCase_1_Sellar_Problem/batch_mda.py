@@ -0,0 +1,98 @@
+from __future__ import division, unicode_literals
+
+from numpy import abs as np_abs, arange, asarray, hstack, ones, zeros
+from numpy.linalg import norm
+
+from disciplines.d_sellar1 import compute_y_1
+from disciplines.d_sellar2 import compute_y_2
+from disciplines.d_system import compute_system
+
+
+def solve_batch_mda(x, z, y_1=None, y_2=None, tolerance=1e-10, max_mda_iter=50):
+    """Gauss-Seidel MDA of the y_1/y_2 coupling for N design points at once.
+
+    All the points iterate together; a point is frozen as soon as the change of its couplings over one sweep is
+    below the tolerance (absolute change, same criterion as the MDAs of create_sellar_mda with norm0 = 1), so that
+    only the active points are evaluated.
+    x: (N, n_x), z: (N, 2), y_1/y_2: initial couplings (N, 1) (default: ones)
+    Returns y_1, y_2 (N, 1), the number of iterations (N,) and the converged mask (N,).
+    """
+    x, z = asarray(x, dtype=float), asarray(z, dtype=float)
+    n_points = len(x)
+    y_1 = ones((n_points, 1)) if y_1 is None else asarray(y_1, dtype=float).copy()
+    y_2 = ones((n_points, 1)) if y_2 is None else asarray(y_2, dtype=float).copy()
+
+    n_iter = zeros(n_points, dtype=int)
+    converged = zeros(n_points, dtype=bool)
+    active = arange(n_points)
+
+    for _ in range(max_mda_iter):
+        if not active.size:
+            break
+
+        # One Gauss-Seidel sweep on the active points
+        y_old = hstack((y_1[active], y_2[active]))
+        y_1_new = compute_y_1(x[active], z[active], y_2[active])
+        y_2_new = compute_y_2(z[active], y_1_new)
+        y_new = hstack((y_1_new, y_2_new))
+
+        y_1[active], y_2[active] = y_1_new, y_2_new
+        n_iter[active] += 1
+
+        residual = norm(y_new - y_old, axis=1)
+        done = residual <= tolerance
+        converged[active[done]] = True
+        active = active[~done]
+
+    return y_1, y_2, n_iter, converged
+
+
+def evaluate_batch(x, z, **mda_options):
+    """Objective, constraints and couplings of the Sellar problem for N design points (MDA + system).
+
+    Returns a dictionary of (N, 1) arrays (obj, c_1, c_2, y_1, y_2) with the MDA iterations and convergence.
+    """
+    x, z = asarray(x, dtype=float), asarray(z, dtype=float)
+    y_1, y_2, n_iter, converged = solve_batch_mda(x, z, **mda_options)
+
+    outputs = compute_system(x, z, y_1, y_2)
+    outputs.update({"y_1": y_1, "y_2": y_2, "n_iter": n_iter, "converged": converged})
+    return outputs
+
+
+# ----------------------------------------------------------------------------------------
+# Tester: batch evaluation vs one GEMSEO MDA per point
+# ----------------------------------------------------------------------------------------
+if __name__ == '__main__':
+    from time import time
+
+    from numpy.random import RandomState
+
+    from accelerated_mda import create_sellar_mda
+    from disciplines.d_sellar1 import Sellar1
+    from disciplines.d_sellar2 import Sellar2
+    from disciplines.d_system import SellarSystem
+
+    n_points = 1000
+    random = RandomState(1)
+    x_samples = random.uniform(0.0, 10.0, (n_points, 1))
+    z_samples = random.uniform((-10.0, 0.0), (10.0, 10.0), (n_points, 2))
+
+    t_0 = time()
+    batch = evaluate_batch(x_samples, z_samples, tolerance=1e-10, max_mda_iter=50)
+    t_batch = time() - t_0
+
+    mda = create_sellar_mda("gauss_seidel", [Sellar1(), Sellar2()], tolerance=1e-10, max_mda_iter=50)
+    system = SellarSystem()
+
+    t_0 = time()
+    obj = zeros((n_points, 1))
+    for i, (x, z) in enumerate(zip(x_samples, z_samples)):
+        couplings = mda.execute({"x": x, "z": z, "y_1": ones(1), "y_2": ones(1)})
+        obj[i] = system.execute({"x": x, "z": z, "y_1": couplings["y_1"], "y_2": couplings["y_2"]})["obj"]
+    t_loop = time() - t_0
+
+    print("%d points: batch %.4f s, MDA per point %.4f s (x %.0f)" % (n_points, t_batch, t_loop, t_loop / t_batch))
+    print("Converged: %d / %d, mean MDA iterations: %.1f" %
+          (batch["converged"].sum(), n_points, batch["n_iter"].mean()))
+    print("Max difference of the objective: %.2e" % np_abs(batch["obj"] - obj).max())
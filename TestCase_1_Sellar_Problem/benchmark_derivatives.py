@@ -0,0 +1,106 @@
+from __future__ import division, unicode_literals
+
+from time import time
+
+from numpy import array, ones
+
+from gemseo.algos.design_space import DesignSpace
+from gemseo.api import configure_logger, create_scenario
+
+configure_logger()
+
+from disciplines.d_sellar1 import Sellar1
+from disciplines.d_sellar2 import Sellar2
+from disciplines.d_system import SellarSystem
+
+# Cost of one gradient of obj, c_1 and c_2 for the MDF formulation:
+# - finite_differences >> one converged MDA per design variable (+ the reference point)
+# - direct             >> one linear solve of the coupled system per design variable
+# - adjoint            >> one linear solve of the coupled system per output (obj, c_1, c_2)
+# The size of x is increased to show how each mode scales with the number of design variables
+modes = ["finite_differences", "direct", "adjoint"]
+sizes = [1, 10, 50, 100]
+n_repeat = 3
+
+
+def create_sellar_scenario(n_x, mode):
+    disciplines = [Sellar1(n_x=n_x), Sellar2(), SellarSystem(n_x=n_x)]
+
+    design_space = DesignSpace()
+    design_space.add_variable("x", n_x, l_b=0.0, u_b=10.0, value=ones(n_x))
+    design_space.add_variable("z", 2, l_b=(-10, 0.0), u_b=(10.0, 10.0), value=array([4.0, 3.0]))
+
+    scenario = create_scenario(disciplines,
+                               formulation="MDF",
+                               objective_name="obj",
+                               design_space=design_space)
+    scenario.add_constraint("c_1", "ineq")
+    scenario.add_constraint("c_2", "ineq")
+
+    if mode == "finite_differences":
+        scenario.set_differentiation_method("finite_differences", 1e-6)
+    else:
+        scenario.set_differentiation_method("user")
+        scenario.formulation.mda.linearization_mode = mode
+
+    return scenario, disciplines
+
+
+def get_mda_iterations(mda):
+    # The MDA chain solves the y_1/y_2 coupling with an inner MDA
+    return sum(len(sub_mda.residual_history) for sub_mda in getattr(mda, "sub_mda_list", [mda]))
+
+
+def benchmark_gradient(n_x, mode):
+    scenario, disciplines = create_sellar_scenario(n_x, mode)
+    problem = scenario.formulation.opt_problem
+    mda = scenario.formulation.mda
+
+    # Same wrapping of the functions as in the driver (finite differences, normalization, database)
+    problem.preprocess_functions()
+    functions = [problem.objective] + problem.constraints
+    x_0 = problem.design_space.normalize_vect(problem.design_space.get_current_x())
+
+    # Each repetition computes the values (one converged MDA, common to all the modes) and the gradients
+    # from scratch: the database and the caches are cleared so that nothing is reused
+    calls_0 = [discipline.n_calls for discipline in disciplines]
+    lin_0 = [discipline.n_calls_linearize for discipline in disciplines]
+    mda_0 = get_mda_iterations(mda)
+
+    t_0 = time()
+    for _ in range(n_repeat):
+        problem.database.clear()
+        for discipline in disciplines:
+            discipline.cache.clear()
+        mda.cache.clear()
+        for function in functions:
+            function(x_0)
+            function.jac(x_0)
+    wall_time = (time() - t_0) / n_repeat
+
+    calls = sum(discipline.n_calls for discipline in disciplines) - sum(calls_0)
+    linearizations = sum(discipline.n_calls_linearize for discipline in disciplines) - sum(lin_0)
+    mda_iterations = get_mda_iterations(mda) - mda_0
+
+    return {"calls": calls / n_repeat,
+            "linearizations": linearizations / n_repeat,
+            "mda_iterations": mda_iterations / n_repeat,
+            "time": wall_time}
+
+
+results = {}
+for n_x in sizes:
+    for mode in modes:
+        results[(n_x, mode)] = benchmark_gradient(n_x, mode)
+
+print("")
+print("Cost of one gradient of (obj, c_1, c_2), MDF formulation")
+print("%6s  %-18s  %10s  %10s  %10s  %10s  %8s" %
+      ("n_x", "mode", "calls", "lineariz.", "MDA iter", "time [ms]", "speed-up"))
+for n_x in sizes:
+    t_fd = results[(n_x, "finite_differences")]["time"]
+    for mode in modes:
+        res = results[(n_x, mode)]
+        print("%6d  %-18s  %10.1f  %10.1f  %10.1f  %10.2f  %8.1f" %
+              (n_x, mode, res["calls"], res["linearizations"], res["mda_iterations"],
+               1000.0 * res["time"], t_fd / res["time"]))
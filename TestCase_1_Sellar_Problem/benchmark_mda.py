@@ -0,0 +1,84 @@
+from __future__ import division, unicode_literals
+
+from matplotlib import pyplot as plt
+from numpy import abs as np_abs, array, concatenate, log10, mean, ones
+from numpy.random import RandomState
+
+from gemseo.api import configure_logger
+
+configure_logger()
+
+from accelerated_mda import MDA_METHODS, create_sellar_mda, get_inner_mdas
+from disciplines.d_sellar1 import Sellar1, compute_y_1
+from disciplines.d_sellar2 import Sellar2, compute_y_2
+
+# Convergence of the y_1/y_2 coupling for each MDA method, over random points of the design space
+# (same bounds as in solve_sellar.py). Each MDA starts from y_1 = y_2 = 1.
+# All the methods stop on the same criterion: absolute change of the couplings over one iteration <= tolerance
+# (common norm0 = 1, see accelerated_mda.set_residual_reference). The fixed-point residual |g(y) - y| of the
+# returned couplings is then computed independently (without discipline calls) to check the accuracy reached.
+n_points = 50
+tolerance = 1e-10
+max_mda_iter = 50
+seed = 1
+
+random = RandomState(seed)
+x_samples = random.uniform(0.0, 10.0, (n_points, 1))
+z_samples = random.uniform((-10.0, 0.0), (10.0, 10.0), (n_points, 2))
+
+results = {}
+for method in MDA_METHODS:
+    disciplines = [Sellar1(), Sellar2()]
+    mda = create_sellar_mda(method, disciplines, max_mda_iter=max_mda_iter, tolerance=tolerance)
+
+    # MDAs that iterate (the stages of GSNewtonMDA, or the MDA itself), the last one decides the convergence
+    stages = get_inner_mdas(mda)[1:] or [mda]
+
+    calls, linearizations, histories, failures, fixed_point = [], [], [], 0, []
+    for x, z in zip(x_samples, z_samples):
+        calls_0 = sum(discipline.n_calls for discipline in disciplines)
+        lin_0 = sum(discipline.n_calls_linearize for discipline in disciplines)
+        n_hist = [len(stage.residual_history) for stage in stages]
+
+        couplings = mda.execute({"x": x, "z": z, "y_1": ones(1), "y_2": ones(1)})
+
+        calls.append(sum(discipline.n_calls for discipline in disciplines) - calls_0)
+        linearizations.append(sum(discipline.n_calls_linearize for discipline in disciplines) - lin_0)
+        histories.append(concatenate([array([residual[0] for residual in stage.residual_history[n:]])
+                                      for stage, n in zip(stages, n_hist)]))
+        if stages[-1].normed_residual > tolerance:
+            failures += 1
+
+        # Independent check: one Gauss-Seidel sweep from the returned couplings
+        y_1, y_2 = couplings["y_1"], couplings["y_2"]
+        y_1_new = compute_y_1(x, z, y_2)
+        fixed_point.append(max(np_abs(y_1_new - y_1).max(), np_abs(compute_y_2(z, y_1_new) - y_2).max()))
+
+    results[method] = {"calls": array(calls), "linearizations": array(linearizations),
+                       "histories": histories, "failures": failures, "fixed_point": max(fixed_point)}
+
+# Discipline calls per MDA
+print("")
+print("MDA over %d design points (same criterion for all the methods: |change of the couplings| <= %.0e)" %
+      (n_points, tolerance))
+print("%-14s  %10s  %10s  %10s  %10s  %12s  %10s" %
+      ("method", "mean calls", "max calls", "lineariz.", "failures", "max |g(y)-y|", "speed-up"))
+mean_gs = mean(results["gauss_seidel"]["calls"])
+for method in MDA_METHODS:
+    res = results[method]
+    print("%-14s  %10.1f  %10d  %10.1f  %10d  %12.2e  %10.2f" %
+          (method, mean(res["calls"]), res["calls"].max(), mean(res["linearizations"]), res["failures"],
+           res["fixed_point"], mean_gs / mean(res["calls"])))
+
+# Residual histories
+fig, axes = plt.subplots(1, len(MDA_METHODS), sharey=True, figsize=(4 * len(MDA_METHODS), 4))
+for ax, method in zip(axes, MDA_METHODS):
+    for history in results[method]["histories"]:
+        ax.plot(range(1, len(history) + 1), log10(history + 1e-300), color="tab:blue", alpha=0.3)
+    ax.axhline(log10(tolerance), color="k", linestyle="--")
+    ax.set_title(method)
+    ax.set_xlabel("MDA iteration")
+axes[0].set_ylabel("log10(|change of the couplings|)")
+fig.tight_layout()
+
+plt.show()
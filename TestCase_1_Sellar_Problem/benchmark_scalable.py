@@ -0,0 +1,91 @@
+from __future__ import division, unicode_literals
+
+from time import time
+
+from gemseo.api import configure_logger, create_scenario
+
+configure_logger()
+
+from accelerated_mda import create_sellar_mda
+from disciplines.d_scalable import create_scalable_problem
+
+# Scaling of the formulations, MDA solvers and derivative modes on the scalable Sellar-like problem.
+# Each configuration is one optimization (SLSQP, max_iter iterations) from the same starting point.
+sizes = [  # (n_disciplines, n_x, n_z, n_y)
+    (2, 1, 2, 1),
+    (3, 5, 5, 2),
+    (5, 10, 10, 5),
+    (8, 20, 10, 10),
+]
+coupling = 0.8
+max_iter = 30
+
+architectures = [  # (formulation, MDA, derivatives)
+    ("MDF", "MDAJacobi", "finite_differences"),
+    ("MDF", "MDAJacobi", "direct"),
+    ("MDF", "MDAJacobi", "adjoint"),
+    ("MDF", "MDAGaussSeidel", "adjoint"),
+    ("MDF", "MDANewtonRaphson", "adjoint"),
+    ("MDF", "anderson", "adjoint"),
+    ("IDF", None, "finite_differences"),
+    ("IDF", None, "user"),
+]
+
+
+def run_architecture(size, formulation, mda_name, derivatives):
+    n_disciplines, n_x, n_z, n_y = size
+    disciplines, design_space = create_scalable_problem(n_disciplines, n_x, n_z, n_y, coupling=coupling)
+    coupled, system = disciplines[:-1], disciplines[-1]
+
+    mda = None
+    if formulation == "IDF":
+        scenario = create_scenario(disciplines, formulation="IDF", objective_name="obj", design_space=design_space)
+    elif mda_name in ("MDAJacobi", "MDAGaussSeidel", "MDANewtonRaphson"):
+        scenario = create_scenario(disciplines, formulation="MDF", objective_name="obj", design_space=design_space,
+                                   sub_mda_class=mda_name, tolerance=1e-10, max_mda_iter=100)
+        mda = scenario.formulation.mda
+    else:
+        # MDA of accelerated_mda.py, chained with the system discipline (equivalent to MDF)
+        mda = create_sellar_mda(mda_name, coupled, max_mda_iter=100, tolerance=1e-10)
+        for k in range(1, n_disciplines + 1):
+            design_space.remove_variable("y_" + str(k))
+        scenario = create_scenario([mda, system], formulation="DisciplinaryOpt", objective_name="obj",
+                                   design_space=design_space)
+
+    for k in range(1, n_disciplines + 1):
+        scenario.add_constraint("c_" + str(k), "ineq")
+
+    if derivatives == "finite_differences":
+        scenario.set_differentiation_method("finite_differences", 1e-6)
+    else:
+        scenario.set_differentiation_method("user")
+        if mda is not None:
+            mda.linearization_mode = derivatives
+
+    t_0 = time()
+    scenario.execute(input_data={"max_iter": max_iter, "algo": "SLSQP"})
+    wall_time = time() - t_0
+
+    problem = scenario.formulation.opt_problem
+    return {"design_vars": problem.dimension,
+            "calls": sum(discipline.n_calls for discipline in coupled),
+            "linearizations": sum(discipline.n_calls_linearize for discipline in coupled),
+            "iterations": len(problem.database),
+            "obj": problem.solution.f_opt,
+            "time": wall_time}
+
+
+results = []
+for size in sizes:
+    for formulation, mda_name, derivatives in architectures:
+        res = run_architecture(size, formulation, mda_name, derivatives)
+        results.append((size, formulation, mda_name, derivatives, res))
+
+print("")
+print("Scalable problem (coupling = %.2f, SLSQP max_iter = %d)" % (coupling, max_iter))
+print("%4s %4s %4s %4s  %-4s  %-17s  %-18s  %6s  %10s  %10s  %6s  %12s  %10s" %
+      ("K", "n_x", "n_z", "n_y", "form", "MDA", "derivatives", "n_dv", "calls", "lineariz.", "iter", "obj", "time [s]"))
+for size, formulation, mda_name, derivatives, res in results:
+    print("%4d %4d %4d %4d  %-4s  %-17s  %-18s  %6d  %10d  %10d  %6d  %12.6g  %10.3f" %
+          (size + (formulation, mda_name or "-", derivatives, res["design_vars"], res["calls"],
+                   res["linearizations"], res["iterations"], res["obj"], res["time"])))
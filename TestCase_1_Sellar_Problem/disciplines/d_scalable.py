@@ -0,0 +1,132 @@
+from gemseo.algos.design_space import DesignSpace
+from gemseo.core.discipline import MDODiscipline
+from numpy import diag, exp, ones, tanh
+from numpy.random import RandomState
+
+
+# Scalable Sellar-like problem with K coupled disciplines:
+#   y_k = sqrt(1 + A_k z^2 + B_k x_k^2) + beta / (K - 1) * sum_{j != k} C_kj tanh(y_j)
+#   obj = |z|^2 + sum_k |x_k|^2 + sum_k exp(-mean(y_k)),   c_k = 3.16 - y_k^2 <= 0
+# z: shared design variables, x_k: local design variables, y_k: couplings.
+# The coupling strength beta sets the contraction of the fixed point (|C_kj| <= 1, |tanh'| <= 1):
+# the MDA converges for beta < 1, more slowly as beta gets close to 1.
+
+
+class ScalableDiscipline(MDODiscipline):
+    def __init__(self, k, n_disciplines, a, b, c, coupling):
+        # a: (n_y, n_z), b: (n_y, n_x), c: {j: (n_y, n_y)} for the other disciplines
+        super(ScalableDiscipline, self).__init__(name="Discipline_" + str(k))
+        self.k = k
+        self.a, self.b, self.c = a, b, c
+        self.coupling_factor = coupling / max(n_disciplines - 1, 1)
+        self.y_names = ["y_" + str(j) for j in sorted(c)]
+
+        self.input_grammar.initialize_from_data_names(["z", "x_" + str(k)] + self.y_names)
+        self.output_grammar.initialize_from_data_names(["y_" + str(k)])
+        self.default_inputs = {"z": ones(a.shape[1]), "x_" + str(k): ones(b.shape[1])}
+        for j in c:
+            self.default_inputs["y_" + str(j)] = ones(c[j].shape[1])
+
+    def _run(self):
+        z, x = self.get_inputs_by_name(["z", "x_" + str(self.k)])
+        y = list(self.get_inputs_by_name(self.y_names))
+
+        s = (1.0 + self.a.dot(z ** 2) + self.b.dot(x ** 2)) ** 0.5
+        for j, y_j in zip(sorted(self.c), y):
+            s = s + self.coupling_factor * self.c[j].dot(tanh(y_j))
+        self.local_data["y_" + str(self.k)] = s
+
+    def _compute_jacobian(self, inputs=None, outputs=None):
+        # d(sqrt(u))/dv = (du/dv) / (2 sqrt(u)), d(tanh(y))/dy = 1 - tanh(y)^2
+        self._init_jacobian(inputs, outputs, with_zeros=True)
+        z, x = self.get_inputs_by_name(["z", "x_" + str(self.k)])
+        y = list(self.get_inputs_by_name(self.y_names))
+        s = (1.0 + self.a.dot(z ** 2) + self.b.dot(x ** 2)) ** 0.5
+
+        jac = self.jac["y_" + str(self.k)]
+        jac["z"] = self.a * z[None, :] / s[:, None]
+        jac["x_" + str(self.k)] = self.b * x[None, :] / s[:, None]
+        for j, y_j in zip(sorted(self.c), y):
+            jac["y_" + str(j)] = self.coupling_factor * self.c[j] * (1.0 - tanh(y_j) ** 2)[None, :]
+
+
+class ScalableSystem(MDODiscipline):
+    def __init__(self, n_disciplines, n_x, n_z, n_y):
+        super(ScalableSystem, self).__init__(name="ScalableSystem")
+        self.n_disciplines = n_disciplines
+        self.x_names = ["x_" + str(k) for k in range(1, n_disciplines + 1)]
+        self.y_names = ["y_" + str(k) for k in range(1, n_disciplines + 1)]
+        self.c_names = ["c_" + str(k) for k in range(1, n_disciplines + 1)]
+
+        self.input_grammar.initialize_from_data_names(["z"] + self.x_names + self.y_names)
+        self.output_grammar.initialize_from_data_names(["obj"] + self.c_names)
+        self.default_inputs = {"z": ones(n_z)}
+        for x_name, y_name in zip(self.x_names, self.y_names):
+            self.default_inputs[x_name] = ones(n_x)
+            self.default_inputs[y_name] = ones(n_y)
+
+    def _run(self):
+        z = self.get_inputs_by_name("z")
+        xs = list(self.get_inputs_by_name(self.x_names))
+        ys = list(self.get_inputs_by_name(self.y_names))
+
+        obj = z.dot(z) + sum(x.dot(x) for x in xs) + sum(exp(-y.mean()) for y in ys)
+        self.local_data["obj"] = ones(1) * obj
+        for c_name, y in zip(self.c_names, ys):
+            self.local_data[c_name] = 3.16 - y ** 2
+
+    def _compute_jacobian(self, inputs=None, outputs=None):
+        self._init_jacobian(inputs, outputs, with_zeros=True)
+        z = self.get_inputs_by_name("z")
+        xs = list(self.get_inputs_by_name(self.x_names))
+        ys = list(self.get_inputs_by_name(self.y_names))
+
+        self.jac["obj"]["z"] = 2.0 * z[None, :]
+        for x_name, x in zip(self.x_names, xs):
+            self.jac["obj"][x_name] = 2.0 * x[None, :]
+        for y_name, c_name, y in zip(self.y_names, self.c_names, ys):
+            self.jac["obj"][y_name] = -exp(-y.mean()) / y.size * ones((1, y.size))
+            self.jac[c_name][y_name] = -2.0 * diag(y)
+
+
+def create_scalable_problem(n_disciplines=3, n_x=1, n_z=2, n_y=1, coupling=0.5, seed=1):
+    """Creates the K coupled disciplines, the system discipline and the design space of the scalable problem.
+
+    n_x, n_z, n_y: sizes of the local design variables, shared design variables and couplings
+    coupling: coupling strength beta (in [0, 1) for a converging fixed point)
+    seed: seed of the random coefficients A_k, B_k (in [0, 1]) and C_kj (in [-1, 1], normalised by n_y)
+    """
+    random = RandomState(seed)
+    indices = range(1, n_disciplines + 1)
+
+    disciplines = []
+    for k in indices:
+        a = random.uniform(0.0, 1.0, (n_y, n_z))
+        b = random.uniform(0.0, 1.0, (n_y, n_x))
+        c = dict((j, random.uniform(-1.0, 1.0, (n_y, n_y)) / n_y) for j in indices if j != k)
+        disciplines.append(ScalableDiscipline(k, n_disciplines, a, b, c, coupling))
+
+    disciplines.append(ScalableSystem(n_disciplines, n_x, n_z, n_y))
+
+    # Same bounds as the Sellar problem; the couplings are only used by IDF (removed by MDF)
+    design_space = DesignSpace()
+    design_space.add_variable("z", n_z, l_b=-10.0, u_b=10.0, value=ones(n_z))
+    for k in indices:
+        design_space.add_variable("x_" + str(k), n_x, l_b=0.0, u_b=10.0, value=ones(n_x))
+    for k in indices:
+        design_space.add_variable("y_" + str(k), n_y, l_b=-100.0, u_b=100.0, value=ones(n_y))
+
+    return disciplines, design_space
+
+
+#----------------------------------------------------------------------------------------
+# Discipline Tester
+#----------------------------------------------------------------------------------------
+if __name__=='__main__':
+
+    disciplines, design_space = create_scalable_problem(n_disciplines=4, n_x=3, n_z=5, n_y=2, coupling=0.8)
+
+    # Compare the analytic Jacobians to finite differences
+    for discipline in disciplines:
+        discipline.execute()
+        discipline.check_jacobian(derr_approx="finite_differences", step=1e-7, threshold=1e-6)
@@ -2,13 +2,19 @@ from gemseo.core.discipline import MDODiscipline
 from numpy import array, ones
 
 
+def compute_y_1(x, z, y_2):
+    # One point (1D inputs) or a batch of N points ((N, dim) inputs) >> y_1 of shape (1,) or (N, 1)
+    return (z[..., 0:1] ** 2 + z[..., 1:2] + x.sum(axis=-1, keepdims=True) - 0.2 * y_2[..., 0:1]) ** 0.5
+
+
 class Sellar1(MDODiscipline):
-    def __init__(self):
+    def __init__(self, n_x=1):
+        # n_x > 1 gives a higher-dimensional variant of the problem (x enters through sum(x))
         super(Sellar1, self).__init__()
         self.input_grammar.initialize_from_data_names(["x", "z", "y_2"])
         self.output_grammar.initialize_from_data_names(["y_1"])
         self.default_inputs = {
-            "x": ones(1),
+            "x": ones(n_x),
             "z": array([4.0, 3.0]),
             "y_1": ones(1),
             "y_2": ones(1),
@@ -16,9 +22,21 @@ class Sellar1(MDODiscipline):
 
     def _run(self):
         x, z, y_2 = self.get_inputs_by_name(["x", "z", "y_2"])
-        self.local_data["y_1"] = array(
-            [(z[0] ** 2 + z[1] + x[0] - 0.2 * y_2[0]) ** 0.5]
-        )
+        self.local_data["y_1"] = compute_y_1(x, z, y_2)
+
+    def evaluate_batch(self, x, z, y_2):
+        # Batch of N points (inputs of shape (N, dim)), without the grammar checks and the cache
+        return {"y_1": compute_y_1(x, z, y_2)}
+
+    def _compute_jacobian(self, inputs=None, outputs=None):
+        # y_1 = sqrt(z_0^2 + z_1 + sum(x) - 0.2 y_2) >> d(sqrt(u)) = du / (2 sqrt(u)) = du / (2 y_1)
+        self._init_jacobian(inputs, outputs, with_zeros=True)
+        x, z = self.local_data["x"], self.local_data["z"]
+        y_1 = self.local_data["y_1"][0]
+
+        self.jac["y_1"]["x"] = ones((1, x.size)) * 0.5 / y_1
+        self.jac["y_1"]["z"] = array([[z[0] / y_1, 0.5 / y_1]])
+        self.jac["y_1"]["y_2"] = array([[-0.1 / y_1]])
 
 #----------------------------------------------------------------------------------------
 # Discipline Tester
@@ -26,4 +44,7 @@ class Sellar1(MDODiscipline):
 if __name__=='__main__':
 
     disc_1 = Sellar1()
-    disc_1.execute()
\ No newline at end of file
+    disc_1.execute()
+
+    # Compare the analytic Jacobian to finite differences
+    disc_1.check_jacobian(derr_approx="finite_differences", step=1e-7, threshold=1e-6)
@@ -1,5 +1,11 @@
 from gemseo.core.discipline import MDODiscipline
-from numpy import array, ones
+from numpy import array, ones, sign
+
+
+def compute_y_2(z, y_1):
+    # One point (1D inputs) or a batch of N points ((N, dim) inputs) >> y_2 of shape (1,) or (N, 1)
+    return abs(y_1[..., 0:1]) + z[..., 0:1] + z[..., 1:2]
+
 
 class Sellar2(MDODiscipline):
     def __init__(self):
@@ -15,7 +21,19 @@ class Sellar2(MDODiscipline):
 
     def _run(self):
         z, y_1 = self.get_inputs_by_name(["z", "y_1"])
-        self.local_data["y_2"] = array([abs(y_1[0]) + z[0] + z[1]])
+        self.local_data["y_2"] = compute_y_2(z, y_1)
+
+    def evaluate_batch(self, z, y_1):
+        # Batch of N points (inputs of shape (N, dim)), without the grammar checks and the cache
+        return {"y_2": compute_y_2(z, y_1)}
+
+    def _compute_jacobian(self, inputs=None, outputs=None):
+        # d|y_1|/dy_1 = sign(y_1), not defined at y_1 = 0 where the right derivative (1) is used
+        self._init_jacobian(inputs, outputs, with_zeros=True)
+        y_1 = self.local_data["y_1"][0]
+
+        self.jac["y_2"]["z"] = ones((1, 2))
+        self.jac["y_2"]["y_1"] = array([[sign(y_1) if y_1 != 0.0 else 1.0]])
 
 
 # ----------------------------------------------------------------------------------------
@@ -23,4 +41,7 @@ class Sellar2(MDODiscipline):
 # ----------------------------------------------------------------------------------------
 if __name__ == '__main__':
     disc_2 = Sellar2()
-    disc_2.execute()
\ No newline at end of file
+    disc_2.execute()
+
+    # Compare the analytic Jacobian to finite differences
+    disc_2.check_jacobian(derr_approx="finite_differences", step=1e-7, threshold=1e-6)
@@ -1,10 +1,18 @@
 from gemseo.core.discipline import MDODiscipline
-from numpy import array, ones
-from math import exp
+from numpy import array, exp, ones
+
+
+def compute_system(x, z, y_1, y_2):
+    # One point (1D inputs) or a batch of N points ((N, dim) inputs) >> outputs of shape (1,) or (N, 1)
+    obj = (x ** 2).sum(axis=-1, keepdims=True) + z[..., 1:2] + y_1[..., 0:1] ** 2 + exp(-y_2[..., 0:1])
+    c_1 = 3.16 - y_1[..., 0:1] ** 2
+    c_2 = y_2[..., 0:1] - 24.0
+    return {"obj": obj, "c_1": c_1, "c_2": c_2}
 
 
 class SellarSystem(MDODiscipline):
-    def __init__(self):
+    def __init__(self, n_x=1):
+        # n_x > 1 gives a higher-dimensional variant of the problem (x enters through sum(x^2))
         super(SellarSystem, self).__init__()
 
         # Initialize the grammars to define inputs and outputs
@@ -14,7 +22,7 @@ class SellarSystem(MDODiscipline):
         # Default inputs define what data to use when the inputs are not
         # provided to the execute method
         self.default_inputs = {
-            "x": ones(1),
+            "x": ones(n_x),
             "z": array([4.0, 3.0]),
             "y_1": ones(1),
             "y_2": ones(1),
@@ -25,9 +33,23 @@ class SellarSystem(MDODiscipline):
         # ie how outputs are computed from inputs
         x, z, y_1, y_2 = self.get_inputs_by_name(["x", "z", "y_1", "y_2"])
         # The ouputs are stored here
-        self.local_data["obj"] = array([x[0] ** 2 + z[1] + y_1[0] ** 2 + exp(-y_2[0])])
-        self.local_data["c_1"] = array([3.16 - y_1[0] ** 2])
-        self.local_data["c_2"] = array([y_2[0] - 24.0])
+        self.local_data.update(compute_system(x, z, y_1, y_2))
+
+    def evaluate_batch(self, x, z, y_1, y_2):
+        # Batch of N points (inputs of shape (N, dim)), without the grammar checks and the cache
+        return compute_system(x, z, y_1, y_2)
+
+    def _compute_jacobian(self, inputs=None, outputs=None):
+        # Analytic derivatives of the outputs (the zero terms are set by _init_jacobian)
+        self._init_jacobian(inputs, outputs, with_zeros=True)
+        x, y_1, y_2 = self.get_inputs_by_name(["x", "y_1", "y_2"])
+
+        self.jac["obj"]["x"] = 2.0 * x[None, :]
+        self.jac["obj"]["z"] = array([[0.0, 1.0]])
+        self.jac["obj"]["y_1"] = array([[2.0 * y_1[0]]])
+        self.jac["obj"]["y_2"] = array([[-exp(-y_2[0])]])
+        self.jac["c_1"]["y_1"] = array([[-2.0 * y_1[0]]])
+        self.jac["c_2"]["y_2"] = ones((1, 1))
 
 #----------------------------------------------------------------------------------------
 # Discipline Tester
@@ -37,3 +59,6 @@ if __name__=='__main__':
     disc_system = SellarSystem()
     disc_system.execute()
 
+    # Compare the analytic Jacobian to finite differences
+    disc_system.check_jacobian(derr_approx="finite_differences", step=1e-7, threshold=1e-6)
+
@@ -11,33 +11,69 @@ from gemseo.core.discipline import MDODiscipline
 
 configure_logger()
 
+from accelerated_mda import create_sellar_mda
 from disciplines.d_sellar1 import Sellar1
 from disciplines.d_sellar2 import Sellar2
 from disciplines.d_system import SellarSystem
 
+# Problem size (n_x > 1 for higher-dimensional variants) and derivatives:
+# "finite_differences", or analytic with "direct" / "adjoint" coupled derivatives
+n_x = 1
+derivatives = "adjoint"
+
+# Debugging: check the analytic Jacobians of the disciplines against finite differences before the run
+check_derivatives = False
+
+# MDA of the y_1/y_2 coupling: "default" (MDAChain of the MDF formulation), or "jacobi", "gauss_seidel",
+# "aitken", "anderson" (with depth), "gs_newton" (Gauss-Seidel then Newton), see accelerated_mda.py
+mda_method = "default"
+mda_options = {"depth": 5} if mda_method == "anderson" else {}
+
 # Create the disciplines
-disciplines = [Sellar1(), Sellar2(), SellarSystem()]
+disciplines = [Sellar1(n_x=n_x), Sellar2(), SellarSystem(n_x=n_x)]
+
+if check_derivatives:
+    for discipline in disciplines:
+        assert discipline.check_jacobian(derr_approx="finite_differences", step=1e-7, threshold=1e-6), \
+            "Wrong analytic Jacobian of " + discipline.name
 
 # Define the design space
 design_space = DesignSpace()
 
-design_space.add_variable("x", 1, l_b=0.0, u_b=10.0, value=ones(1))
+design_space.add_variable("x", n_x, l_b=0.0, u_b=10.0, value=ones(n_x))
 design_space.add_variable("z", 2, l_b=(-10, 0.0), u_b=(10.0, 10.0), value=array([4.0, 3.0]))
 design_space.add_variable("y_1", 1, l_b=-100.0, u_b=100.0, value=ones(1))
 design_space.add_variable("y_2", 1, l_b=-100.0, u_b=100.0, value=ones(1))
 
 # Create scenario
-scenario = create_scenario(disciplines,
-                           formulation="MDF",  # formulation="IDF"
-                           objective_name="obj",
-                           design_space=design_space)
+if mda_method == "default":
+    scenario = create_scenario(disciplines,
+                               formulation="MDF",  # formulation="IDF"
+                               objective_name="obj",
+                               design_space=design_space)
+    mda = scenario.formulation.mda
+else:
+    # Same as MDF with a user-defined MDA: the MDA is solved before the system discipline at each evaluation
+    mda = create_sellar_mda(mda_method, disciplines[:2], **mda_options)
+    design_space.remove_variable("y_1")
+    design_space.remove_variable("y_2")
+    scenario = create_scenario([mda, disciplines[2]],
+                               formulation="DisciplinaryOpt",
+                               objective_name="obj",
+                               design_space=design_space)
 
 # Add constraints
 scenario.add_constraint("c_1", "ineq")
 scenario.add_constraint("c_2", "ineq")
 
 # Run scenario
-scenario.set_differentiation_method("finite_differences", 1e-6)
+# Analytic derivatives: the coupled derivatives are obtained from the Jacobians of the disciplines (MDA linear solve)
+# >> direct: one linear solve per design variable, adjoint: one linear solve per output (obj, c_1, c_2)
+if derivatives == "finite_differences":
+    scenario.set_differentiation_method("finite_differences", 1e-6)
+else:
+    scenario.set_differentiation_method("user")
+    mda.linearization_mode = derivatives
 scenario.execute(input_data={"max_iter": 20, "algo": "SLSQP"})
 
 # Post-Process
@@ -8,8 +8,10 @@ sys.path.append(root + os.sep + 'global' )
 
 from gemseo.core.discipline import MDODiscipline
 
-from f_total_production import compute_daily_production
-from utilities import read_resources_specs
+from f_total_production import build_production_table, compute_daily_production_tabulated, \
+    compute_daily_production_incremental, compute_daily_production_samples, compute_production_statistics, \
+    compute_daily_production_batch
+from utilities import read_resources_specs, sample_resources_specs
 
 from ipdb import set_trace as keyboard
 
@@ -18,7 +20,15 @@ class TDP(MDODiscipline):
     def __init__(self,
                  N_pcs_target=100,
                  N_hours=8,
-                 resource_file=None):
+                 resource_file=None,
+                 rounding='exact',
+                 smooth_factor=10.0,
+                 incremental=False,
+                 check_incremental=False,
+                 uncertainty=None,
+                 n_samples=1000,
+                 confidence=0.95,
+                 seed=1):
 
         super(TDP, self).__init__()
 
@@ -30,10 +40,38 @@ class TDP(MDODiscipline):
         self.N_pcs_target = N_pcs_target
         self.N_hours = N_hours
 
+        # Production model: 'exact' (rounded pieces), 'relaxed' (no rounding) or 'smooth' (smooth rounding)
+        # The continuous models remove the plateaus seen by the optimizer: the solution must then be polished
+        # on the exact model (see allocation_solver.polish_allocation)
+        self.rounding = rounding
+        self.smooth_factor = smooth_factor
+
+        # Retrieve Resource information and precompute the production tables (only depend on the specs)
+        self.resources = read_resources_specs(self.resource_file)
+        self.n_resources = len(self.resources)
+        self.prod_table = build_production_table(self.N_hours, self.resources,
+                                                 rounding=self.rounding, smooth_factor=self.smooth_factor)
+
+        # Incremental evaluation: only the resources whose allocation changed are re-evaluated
+        # (check_incremental = True compares each result to a full recomputation)
+        self.incremental = incremental
+        self.check_incremental = check_incremental
+        self.prod_cache = {}
+
+        # Robust mode: the uncertain specs (see utilities.sample_resources_specs) are sampled once, so that
+        # all the evaluations share the same samples and the statistics are deterministic functions of p
+        self.uncertainty = uncertainty
+        self.confidence = confidence
+        if self.uncertainty:
+            self.samples = sample_resources_specs(self.resources, self.uncertainty, n_samples, seed=seed)
+        else:
+            self.samples = None
+
         # Define inputs >> Name, type and default value
-        dictIn = {'p1': np.array([0.0]),         # Percent of work assigned to Resource 1
-                  'p2': np.array([0.0]),         # Percent of work assigned to Resource 2
-                  'p3': np.array([0.0])}        # Percent of work assigned to Resource 3
+        # 'pi' = Percent of work assigned to Resource i
+        dictIn = {}
+        for ir in range(self.n_resources):
+            dictIn['p' + str(ir+1)] = np.array([0.0])
 
 
         # Initialize input grammar and assign default values
@@ -45,6 +83,13 @@ class TDP(MDODiscipline):
                     'N_pcs_const'  : np.array([0.0]),       # Total number of components produced (constraint)
                      }
 
+        if self.uncertainty:
+            DictOut.update({'N_pcs_mean'         : np.array([0.0]),     # Mean production
+                            'N_pcs_std'          : np.array([0.0]),     # Standard deviation of the production
+                            'N_pcs_shortfall'    : np.array([0.0]),     # Quantile of the production shortfall
+                            'N_pcs_const_robust' : np.array([0.0]),     # Production constraint at given confidence
+                            })
+
         self.output_grammar.initialize_from_base_dict(DictOut)
 
 
@@ -56,14 +101,15 @@ class TDP(MDODiscipline):
         dictIn = self.get_input_data()
 
         # retrieve allocation array
-        p = [dictIn['p1'], dictIn['p2'], dictIn['p3']]
+        p = [dictIn['p' + str(ir+1)] for ir in range(self.n_resources)]
 
 
-        # retrieve Resource information
-        resources = read_resources_specs(self.resource_file)
-
         # Compute total daily production
-        prod_data = compute_daily_production(self.N_hours, p , resources)
+        if self.incremental:
+            prod_data = compute_daily_production_incremental(self.N_hours, p, self.prod_table, self.prod_cache,
+                                                             check=self.check_incremental)
+        else:
+            prod_data = compute_daily_production_tabulated(self.N_hours, p, self.prod_table)
 
 
         # Compute production constraint
@@ -75,6 +121,15 @@ class TDP(MDODiscipline):
         dictOut = {'N_pcs'      : np.array([n_pcs_tot]),
                    'N_pcs_const': np.array([const_prod])}
 
+        # Robust mode >> statistics of the production over all the samples (one vectorized pass)
+        if self.uncertainty:
+            samples_data = compute_daily_production_samples(self.N_hours, p, self.samples,
+                                                            rounding=self.rounding, smooth_factor=self.smooth_factor)
+            stats = compute_production_statistics(samples_data['N_pcs_TOT'], self.N_pcs_target, self.confidence)
+
+            for key in ['N_pcs_mean', 'N_pcs_std', 'N_pcs_shortfall', 'N_pcs_const_robust']:
+                dictOut[key] = np.array([stats[key]])
+
         # Save the output in the discipline local store >>> Transmit output to GEMSEO
         self.local_data.update(dictOut)
 
@@ -83,6 +138,25 @@ class TDP(MDODiscipline):
         print('c_PROD   =  %.4f' % dictOut['N_pcs_const'])
 
 
+    def evaluate_batch(self, P):
+        """
+        Evaluates the discipline outputs for a batch of allocations in one vectorized pass, without going through
+        MDODiscipline.execute (no grammar checks, no cache, no prints). Meant for large DOEs
+        :param P: 2D array [n_points x n_resources] of allocations (column i = input 'p' + str(i+1))
+        :return dictOut: dictionary containing the 'N_pcs' and 'N_pcs_const' arrays [n_points]
+        """
+
+        prod_data = compute_daily_production_batch(self.N_hours, P, self.prod_table)
+
+        n_pcs_tot = prod_data['N_pcs_TOT']
+        const_prod = -(n_pcs_tot - self.N_pcs_target) / self.N_pcs_target
+
+        dictOut = {'N_pcs'      : n_pcs_tot,
+                   'N_pcs_const': const_prod}
+
+        return dictOut
+
+
 # ----------------------------------------------------------------------------------------
 # Discipline Tester
 # ----------------------------------------------------------------------------------------
@@ -2,6 +2,7 @@
 # This file contains all functions required by the discipline wrapper
 #-------------------------------------------------------------------------------
 import os, sys
+import numpy as np
 
 # Add required folders
 root = os.path.dirname(os.path.abspath(__file__).split('disciplines')[0])
@@ -58,4 +59,246 @@ def compute_daily_production(n_hrs,p,resources):
     return prod_data
 
 
+def apply_rounding(n_pcs, rounding='exact', smooth_factor=10.0):
+    """
+    Rounds a (fractional) number of pieces according to the selected production model:
+    - 'exact':   round to the nearest integer (original model, piecewise constant)
+    - 'relaxed': no rounding (continuous relaxation, piecewise linear)
+    - 'smooth':  smooth staircase m + 0.5*(1 + tanh(a*(f-0.5))/tanh(a/2)), with m + f = n_pcs. It is continuous,
+                 matches the integers and tends to the exact rounding when the smoothing factor a grows
+    :param n_pcs: number (or array) of pieces to round
+    :param rounding: production model ('exact', 'relaxed' or 'smooth')
+    :param smooth_factor: steepness a of the smooth staircase
+    :return: the rounded number of pieces
+    """
+
+    if rounding == 'exact':
+        return np.round(n_pcs)
+
+    elif rounding == 'relaxed':
+        return n_pcs
+
+    elif rounding == 'smooth':
+        m = np.floor(n_pcs)
+        f = n_pcs - m
+        return m + 0.5*(1 + np.tanh(smooth_factor*(f - 0.5)) / np.tanh(0.5*smooth_factor))
+
+    else:
+        raise ValueError('Unknown rounding option: ' + str(rounding))
+
+
+def build_production_table(n_hrs, resources, rounding='exact', smooth_factor=10.0):
+    """
+    Precomputes the production tables of the resources. The fatigue-degraded hourly production
+    N0i - phi_i*(h+1) only depends on the resources specs, so it is computed once and accumulated over
+    the whole worked hours. The production of any allocation is then a table lookup plus one partial-hour term
+    :param n_hrs: number of working hours
+    :param resources: dictionary containing the resources specifications
+    :param rounding: production model, see apply_rounding ('exact' reproduces compute_daily_production)
+    :param smooth_factor: steepness of the smooth rounding (only used if rounding = 'smooth')
+    :return table: a dictionary with the hourly production 'N_h' [n_r x n_hrs+1] (last column padded with zeros)
+                   and the cumulative production of the whole hours 'N_cum' [n_r x n_hrs+1]
+    """
+
+    n_r = len(resources)
+
+    N0 = np.array([resources['Resource' + str(ir+1)]['Production_Max'] for ir in range(n_r)])
+    phi = np.array([resources['Resource' + str(ir+1)]['Fatigue_Coeff'] for ir in range(n_r)])
+
+    # Hourly production (a resource working all the n_hrs hours has no partial hour >> zero padding)
+    N_h = np.zeros((n_r, n_hrs + 1))
+    N_h[:, :n_hrs] = N0[:, None] - phi[:, None]*np.arange(1, n_hrs + 1)[None, :]
+
+    # Cumulative production after k whole hours
+    N_cum = np.zeros((n_r, n_hrs + 1))
+    N_cum[:, 1:] = np.cumsum(apply_rounding(N_h[:, :n_hrs], rounding, smooth_factor), axis=1)
+
+    table = {'n_hrs'         : n_hrs,
+             'N_h'           : N_h,
+             'N_cum'         : N_cum,
+             'rounding'      : rounding,
+             'smooth_factor' : smooth_factor}
+
+    return table
+
+
+def compute_resources_production(n_hrs, p, table, rows=None):
+    """
+    Computes the daily production of each resource from the precomputed production tables
+    :param n_hrs: number of working hours
+    :param p: array containing the allocation charge of the resources listed in rows. A 2D array
+              [n_points x n_rows] evaluates many allocations at once
+    :param table: production tables computed by build_production_table
+    :param rows: indices of the resources to compute (if None, all the resources)
+    :return N_pcs_i: array containing the production of each resource in rows (same shape as p)
+    """
+
+    if table['n_hrs'] != n_hrs:
+        raise ValueError('The production table was built for %d working hours.' % table['n_hrs'])
+
+    if rows is None:
+        rows = np.arange(table['N_cum'].shape[0])
+
+    # Full working hours and residual working time
+    n_hrs_p = p*n_hrs
+    n_hrs_i = np.floor(n_hrs_p)
+    r_hrs_i = n_hrs_p - n_hrs_i
+    n_hrs_i = np.clip(n_hrs_i, 0, n_hrs).astype(int)
+
+    # Whole hours from the table + rounded production of the partial hour
+    N_pcs_i = table['N_cum'][rows, n_hrs_i] + apply_rounding(table['N_h'][rows, n_hrs_i]*r_hrs_i,
+                                                              table['rounding'], table['smooth_factor'])
+
+    return N_pcs_i
+
+
+def compute_daily_production_tabulated(n_hrs, p, table):
+    """
+    Computes total daily production from the resources (same model as compute_daily_production), using the
+    precomputed production tables. The cost of an evaluation is O(resources) instead of O(resources x hours).
+    The rounding of the partial hour follows the production model the tables were built with
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param table: production tables computed by build_production_table
+    :return prod_data: a dictionary containing the total daily production 'N_pcs_TOT'
+    """
+
+    n_r = table['N_cum'].shape[0]
+    p = np.array(p, dtype=float).reshape(n_r)
+
+    N_pcs_i = compute_resources_production(n_hrs, p, table)
+
+    # Send output
+    prod_data = {'N_pcs_TOT' : float(np.sum(N_pcs_i))}
+
+    return prod_data
+
+
+def compute_daily_production_batch(n_hrs, P, table):
+    """
+    Computes total daily production for a batch of allocations in one vectorized pass (same model as
+    compute_daily_production_tabulated). Used for large DOEs, bypassing the per-sample discipline execution
+    :param n_hrs: number of working hours
+    :param P: 2D array [n_points x n_resources] of allocations
+    :param table: production tables computed by build_production_table
+    :return prod_data: a dictionary containing the total daily production of each allocation 'N_pcs_TOT'
+    """
+
+    n_r = table['N_cum'].shape[0]
+    P = np.asarray(P, dtype=float).reshape(-1, n_r)
+
+    N_pcs_TOT = np.sum(compute_resources_production(n_hrs, P, table), axis=1)
+
+    # Send output
+    prod_data = {'N_pcs_TOT' : N_pcs_TOT}
+
+    return prod_data
+
+
+def compute_daily_production_incremental(n_hrs, p, table, cache, check=False):
+    """
+    Computes total daily production from the resources (same as compute_daily_production_tabulated), only
+    re-evaluating the resources whose allocation changed since the previous call. This is the typical case of
+    finite differences and coordinate-wise searches, where one allocation changes at a time.
+    The per-resource production of the previous evaluation is kept in the cache dictionary (to be owned by the
+    caller, i.e. the discipline), which is updated in place
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param table: production tables computed by build_production_table
+    :param cache: dictionary storing the partial results of the previous call (empty at the first call)
+    :param check: if True, compare the result to a full recomputation (debug mode)
+    :return prod_data: a dictionary containing the total daily production 'N_pcs_TOT' and the number of
+                       re-evaluated resources 'N_updated'
+    """
+
+    n_r = table['N_cum'].shape[0]
+    p = np.array(p, dtype=float).reshape(n_r)
+
+    if cache.get('table') is not table or cache['p'].shape != p.shape:
+        # First call (or new tables) >> full computation
+        cache['table'] = table
+        cache['p'] = p.copy()
+        cache['N_pcs_i'] = compute_resources_production(n_hrs, p, table)
+        cache['N_pcs_TOT'] = float(np.sum(cache['N_pcs_i']))
+        n_updated = n_r
+
+    else:
+        # Only update the rows whose allocation changed
+        rows = np.flatnonzero(p != cache['p'])
+        n_updated = len(rows)
+
+        if n_updated:
+            N_pcs_rows = compute_resources_production(n_hrs, p[rows], table, rows)
+
+            cache['N_pcs_TOT'] += float(np.sum(N_pcs_rows - cache['N_pcs_i'][rows]))
+            cache['N_pcs_i'][rows] = N_pcs_rows
+            cache['p'][rows] = p[rows]
+
+    N_pcs_TOT = cache['N_pcs_TOT']
+
+    # Correctness check against full recomputation
+    if check:
+        N_pcs_full = compute_daily_production_tabulated(n_hrs, p, table)['N_pcs_TOT']
+        if not np.isclose(N_pcs_TOT, N_pcs_full, rtol=1e-10, atol=1e-9):
+            raise ValueError('Incremental production (%.12g) differs from full recomputation (%.12g).'
+                             % (N_pcs_TOT, N_pcs_full))
+
+    # Send output
+    prod_data = {'N_pcs_TOT' : N_pcs_TOT,
+                 'N_updated' : n_updated}
+
+    return prod_data
+
+
+def compute_daily_production_samples(n_hrs, p, samples, rounding='exact', smooth_factor=10.0):
+    """
+    Computes total daily production for many samples of the resources specs in one vectorized pass
+    (same model as compute_daily_production, see utilities.sample_resources_specs for the samples)
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param samples: dictionary containing [n_samples x n_resources] arrays of 'Production_Max' and 'Fatigue_Coeff'
+    :param rounding: production model, see apply_rounding
+    :param smooth_factor: steepness of the smooth rounding (only used if rounding = 'smooth')
+    :return prod_data: a dictionary containing the total daily production of each sample 'N_pcs_TOT'
+    """
+
+    # Compute visibility vector [n_r x n_hrs] >> does not depend on the samples
+    nu = compute_visibility_vector(n_hrs, p)
+
+    N0 = samples['Production_Max'][:, :, None]
+    phi = samples['Fatigue_Coeff'][:, :, None]
+
+    # Hourly production of each sample [n_samples x n_r x n_hrs]
+    Nh = N0 - phi*np.arange(1, n_hrs + 1)[None, None, :]
+
+    N_pcs_TOT = np.sum(apply_rounding(Nh*nu[None, :, :], rounding, smooth_factor), axis=(1, 2))
+
+    # Send output
+    prod_data = {'N_pcs_TOT' : N_pcs_TOT}
+
+    return prod_data
+
+
+def compute_production_statistics(N_pcs, n_pcs_target, confidence=0.95):
+    """
+    Computes the statistics of the sampled production, to be used as objective or constraints of a robust
+    optimization
+    :param N_pcs: array containing the total daily production of each sample
+    :param n_pcs_target: minimum number of pieces to produce
+    :param confidence: confidence level of the quantiles (e.g. 0.95 >> P95 shortfall)
+    :return stats: a dictionary containing the mean 'N_pcs_mean' and standard deviation 'N_pcs_std' of the
+                   production, the production exceeded with the given confidence 'N_pcs_quantile', the
+                   corresponding quantile of the shortfall w.r.t. the target 'N_pcs_shortfall' and the robust
+                   production constraint 'N_pcs_const_robust' (<= 0 if the target is met with the given confidence)
+    """
+
+    N_pcs_quantile = np.quantile(N_pcs, 1.0 - confidence)
+    shortfall = np.quantile(np.maximum(n_pcs_target - N_pcs, 0.0), confidence)
+
+    stats = {'N_pcs_mean'         : np.mean(N_pcs),
+             'N_pcs_std'          : np.std(N_pcs),
+             'N_pcs_quantile'     : N_pcs_quantile,
+             'N_pcs_shortfall'    : shortfall,
+             'N_pcs_const_robust' : -(N_pcs_quantile - n_pcs_target) / n_pcs_target}
 
+    return stats
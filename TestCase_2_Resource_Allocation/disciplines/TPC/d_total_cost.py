@@ -8,14 +8,17 @@ sys.path.append(root + os.sep + 'global' )
 
 from gemseo.core.discipline import MDODiscipline
 
-from f_total_cost import compute_production_cost
-from utilities import read_resources_specs
+from f_total_cost import build_cost_table, compute_production_cost_tabulated, \
+    compute_production_cost_incremental, compute_production_cost_samples, compute_cost_statistics, \
+    compute_production_cost_batch
+from utilities import read_resources_specs, sample_resources_specs
 
 from ipdb import set_trace as keyboard
 
 class TPC(MDODiscipline):
 
-    def __init__(self, N_hours=8, resource_file=None):
+    def __init__(self, N_hours=8, resource_file=None, incremental=False, check_incremental=False,
+                 uncertainty=None, n_samples=1000, confidence=0.95, seed=2):
 
         super(TPC, self).__init__()
 
@@ -26,10 +29,31 @@ class TPC(MDODiscipline):
         self.resource_file = resource_file
         self.N_hours = N_hours
 
+        # Retrieve Resource information and precompute the cost tables (only depend on the specs)
+        self.resources = read_resources_specs(self.resource_file)
+        self.n_resources = len(self.resources)
+        self.cost_table = build_cost_table(self.N_hours, self.resources)
+
+        # Incremental evaluation: only the resources whose allocation changed are re-evaluated
+        # (check_incremental = True compares each result to a full recomputation)
+        self.incremental = incremental
+        self.check_incremental = check_incremental
+        self.cost_cache = {}
+
+        # Robust mode: the uncertain specs (see utilities.sample_resources_specs) are sampled once, so that
+        # all the evaluations share the same samples and the statistics are deterministic functions of p
+        self.uncertainty = uncertainty
+        self.confidence = confidence
+        if self.uncertainty:
+            self.samples = sample_resources_specs(self.resources, self.uncertainty, n_samples, seed=seed)
+        else:
+            self.samples = None
+
         # Define inputs >> Name, type and default value
-        dictIn = {'p1': np.array([0.0]),         # Percent of work assigned to Resource 1
-                  'p2': np.array([0.0]),         # Percent of work assigned to Resource 2
-                  'p3': np.array([0.0])}         # Percent of work assigned to Resource 3
+        # 'pi' = Percent of work assigned to Resource i
+        dictIn = {}
+        for ir in range(self.n_resources):
+            dictIn['p' + str(ir+1)] = np.array([0.0])
 
 
         # Initialize input grammar and assign default values
@@ -40,6 +64,12 @@ class TPC(MDODiscipline):
         DictOut = { 'C_TOT'        : np.array([0.0]),       # Total cost
                      }
 
+        if self.uncertainty:
+            DictOut.update({'C_TOT_mean'     : np.array([0.0]),     # Mean cost
+                            'C_TOT_std'      : np.array([0.0]),     # Standard deviation of the cost
+                            'C_TOT_quantile' : np.array([0.0]),     # Cost quantile at given confidence
+                            })
+
         self.output_grammar.initialize_from_base_dict(DictOut)
 
 
@@ -49,18 +79,27 @@ class TPC(MDODiscipline):
         dictIn = self.get_input_data()
 
         # retrieve allocation array
-        p = [dictIn['p1'], dictIn['p2'], dictIn['p3']]
-
+        p = [dictIn['p' + str(ir+1)] for ir in range(self.n_resources)]
 
-        # retrieve Resource information
-        resources = read_resources_specs(self.resource_file)
 
-        # Compute total daily production
-        cost_data = compute_production_cost(self.N_hours, p , resources)
+        # Compute total daily cost
+        if self.incremental:
+            cost_data = compute_production_cost_incremental(self.N_hours, p, self.cost_table, self.cost_cache,
+                                                            check=self.check_incremental)
+        else:
+            cost_data = compute_production_cost_tabulated(self.N_hours, p, self.cost_table)
 
         # Send output
         dictOut = {'C_TOT'      :  cost_data['C_TOT']}
 
+        # Robust mode >> statistics of the cost over all the samples (one vectorized pass)
+        if self.uncertainty:
+            samples_data = compute_production_cost_samples(self.N_hours, p, self.samples)
+            stats = compute_cost_statistics(samples_data['C_TOT'], self.confidence)
+
+            for key in ['C_TOT_mean', 'C_TOT_std', 'C_TOT_quantile']:
+                dictOut[key] = np.array([stats[key]])
+
 
         print('TOT COST =  %.4f' % dictOut['C_TOT'])
         print(50 * '-')
@@ -68,6 +107,21 @@ class TPC(MDODiscipline):
         # Save the output in the discipline local store >>> Transmit output to GEMSEO
         self.local_data.update(dictOut)
 
+
+    def evaluate_batch(self, P):
+        """
+        Evaluates the discipline outputs for a batch of allocations in one vectorized pass, without going through
+        MDODiscipline.execute (no grammar checks, no cache, no prints). Meant for large DOEs
+        :param P: 2D array [n_points x n_resources] of allocations (column i = input 'p' + str(i+1))
+        :return dictOut: dictionary containing the 'C_TOT' array [n_points]
+        """
+
+        cost_data = compute_production_cost_batch(self.N_hours, P, self.cost_table)
+
+        dictOut = {'C_TOT' : cost_data['C_TOT']}
+
+        return dictOut
+
 # ----------------------------------------------------------------------------------------
 # Discipline Tester
 # ----------------------------------------------------------------------------------------
@@ -45,4 +45,167 @@ def compute_production_cost(n_hrs,p,resources):
     # Send output
     cost_data= {'C_TOT' : C_TOT}
 
-    return cost_data
\ No newline at end of file
+    return cost_data
+
+
+def build_cost_table(n_hrs, resources):
+    """
+    Precomputes the cost tables of the resources: the hourly cost is accumulated over the working time
+    once, so that the cost of any allocation is a single dot product
+    :param n_hrs: number of working hours
+    :param resources: dictionary containing the resources specifications
+    :return table: a dictionary with the cumulative cost per unit of allocation 'C_cum' [n_r x n_hrs+1]
+    """
+
+    n_r = len(resources)
+
+    c = np.array([resources['Resource' + str(ir+1)]['Hourly_Cost'] for ir in range(n_r)])
+
+    # Cumulative cost after h hours
+    C_cum = np.zeros((n_r, n_hrs + 1))
+    C_cum[:, 1:] = np.cumsum(np.repeat(c[:, None], n_hrs, axis=1), axis=1)
+
+    table = {'n_hrs' : n_hrs,
+             'C_cum' : C_cum}
+
+    return table
+
+
+def compute_production_cost_tabulated(n_hrs, p, table):
+    """
+    Computes total daily cost of the resources (same model as compute_production_cost), using the precomputed
+    cost tables
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param table: cost tables computed by build_cost_table
+    :return cost_data: a dictionary containing the total daily cost 'C_TOT'
+    """
+
+    if table['n_hrs'] != n_hrs:
+        raise ValueError('The cost table was built for %d working hours.' % table['n_hrs'])
+
+    n_r = table['C_cum'].shape[0]
+    p = np.array(p, dtype=float).reshape(n_r)
+
+    C_TOT = np.dot(table['C_cum'][:, n_hrs], p)
+
+    # Send output
+    cost_data = {'C_TOT' : np.array([C_TOT])}
+
+    return cost_data
+
+
+def compute_production_cost_batch(n_hrs, P, table):
+    """
+    Computes total daily cost for a batch of allocations in one vectorized pass (same model as
+    compute_production_cost_tabulated). Used for large DOEs, bypassing the per-sample discipline execution
+    :param n_hrs: number of working hours
+    :param P: 2D array [n_points x n_resources] of allocations
+    :param table: cost tables computed by build_cost_table
+    :return cost_data: a dictionary containing the total daily cost of each allocation 'C_TOT'
+    """
+
+    if table['n_hrs'] != n_hrs:
+        raise ValueError('The cost table was built for %d working hours.' % table['n_hrs'])
+
+    n_r = table['C_cum'].shape[0]
+    P = np.asarray(P, dtype=float).reshape(-1, n_r)
+
+    C_TOT = np.dot(P, table['C_cum'][:, n_hrs])
+
+    # Send output
+    cost_data = {'C_TOT' : C_TOT}
+
+    return cost_data
+
+
+def compute_production_cost_incremental(n_hrs, p, table, cache, check=False):
+    """
+    Computes total daily cost of the resources (same as compute_production_cost_tabulated), only re-evaluating
+    the resources whose allocation changed since the previous call. The per-resource cost of the previous
+    evaluation is kept in the cache dictionary (owned by the caller), which is updated in place
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param table: cost tables computed by build_cost_table
+    :param cache: dictionary storing the partial results of the previous call (empty at the first call)
+    :param check: if True, compare the result to a full recomputation (debug mode)
+    :return cost_data: a dictionary containing the total daily cost 'C_TOT' and the number of re-evaluated
+                       resources 'N_updated'
+    """
+
+    if table['n_hrs'] != n_hrs:
+        raise ValueError('The cost table was built for %d working hours.' % table['n_hrs'])
+
+    n_r = table['C_cum'].shape[0]
+    p = np.array(p, dtype=float).reshape(n_r)
+
+    if cache.get('table') is not table or cache['p'].shape != p.shape:
+        # First call (or new tables) >> full computation
+        cache['table'] = table
+        cache['p'] = p.copy()
+        cache['C_i'] = table['C_cum'][:, n_hrs]*p
+        cache['C_TOT'] = float(np.sum(cache['C_i']))
+        n_updated = n_r
+
+    else:
+        # Only update the rows whose allocation changed
+        rows = np.flatnonzero(p != cache['p'])
+        n_updated = len(rows)
+
+        if n_updated:
+            C_rows = table['C_cum'][rows, n_hrs]*p[rows]
+
+            cache['C_TOT'] += float(np.sum(C_rows - cache['C_i'][rows]))
+            cache['C_i'][rows] = C_rows
+            cache['p'][rows] = p[rows]
+
+    C_TOT = cache['C_TOT']
+
+    # Correctness check against full recomputation
+    if check:
+        C_full = compute_production_cost_tabulated(n_hrs, p, table)['C_TOT'][0]
+        if not np.isclose(C_TOT, C_full, rtol=1e-10, atol=1e-9):
+            raise ValueError('Incremental cost (%.12g) differs from full recomputation (%.12g).' % (C_TOT, C_full))
+
+    # Send output
+    cost_data = {'C_TOT'     : np.array([C_TOT]),
+                 'N_updated' : n_updated}
+
+    return cost_data
+
+
+def compute_production_cost_samples(n_hrs, p, samples):
+    """
+    Computes total daily cost for many samples of the resources specs in one vectorized pass
+    (same model as compute_production_cost, see utilities.sample_resources_specs for the samples)
+    :param n_hrs: number of working hours
+    :param p: list containing the allocation charge of each resource
+    :param samples: dictionary containing a [n_samples x n_resources] array of 'Hourly_Cost'
+    :return cost_data: a dictionary containing the total daily cost of each sample 'C_TOT'
+    """
+
+    n_r = samples['Hourly_Cost'].shape[1]
+    p = np.array(p, dtype=float).reshape(n_r)
+
+    C_TOT = n_hrs*np.dot(samples['Hourly_Cost'], p)
+
+    # Send output
+    cost_data = {'C_TOT' : C_TOT}
+
+    return cost_data
+
+
+def compute_cost_statistics(C_TOT, confidence=0.95):
+    """
+    Computes the statistics of the sampled cost, to be used as objective or constraints of a robust optimization
+    :param C_TOT: array containing the total daily cost of each sample
+    :param confidence: confidence level of the quantile
+    :return stats: a dictionary containing the mean 'C_TOT_mean', the standard deviation 'C_TOT_std' and the
+                   quantile 'C_TOT_quantile' of the cost
+    """
+
+    stats = {'C_TOT_mean'     : np.mean(C_TOT),
+             'C_TOT_std'      : np.std(C_TOT),
+             'C_TOT_quantile' : np.quantile(C_TOT, confidence)}
+
+    return stats
@@ -0,0 +1,343 @@
+###################################################################################################
+# Exact solver for the resources allocation problem
+#
+# The production of each resource is a piecewise constant function of its allocation pi: the full
+# hours contribute a fixed amount and the partial hour contributes round(Nhi*r), which only changes
+# when Nhi*r crosses a half integer. The cost is linear in pi. Hence, for every production level of
+# a resource, the cheapest allocation lies on one of these breakpoints, and the whole problem is a
+# multiple-choice knapsack that can be solved exactly by dynamic programming on the total production.
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os, sys, warnings
+from math import ceil
+
+import numpy as np
+
+# Add required folders
+root = os.path.dirname(os.path.abspath(__file__).split('global')[0])
+sys.path.append(root + os.sep + 'disciplines' + os.sep + 'TDP')
+sys.path.append(root + os.sep + 'disciplines' + os.sep + 'TPC')
+
+from f_total_production import compute_daily_production, build_production_table, \
+    compute_daily_production_tabulated
+from f_total_cost import compute_production_cost
+
+
+def compute_resource_production(n_hrs, pi, table):
+    """
+    Computes the daily production of a single resource for a given allocation (exact model)
+    :param n_hrs: number of working hours
+    :param pi: allocation charge of the resource (scalar)
+    :param table: production tables of the resource (see build_production_table)
+    :return n_pcs: number of pieces produced by the resource
+    """
+
+    prod_data = compute_daily_production_tabulated(n_hrs, [pi], table)
+
+    return prod_data['N_pcs_TOT']
+
+
+def compute_allocation_options(n_hrs, resource, max_ulp_steps=64):
+    """
+    Enumerates the breakpoints of the production of a single resource as a function of its allocation
+    and returns the non-dominated (allocation, production) pairs, i.e. the cheapest allocation for each
+    production level that the resource can deliver.
+    :param n_hrs: number of working hours
+    :param resource: dictionary containing the specs of the resource
+    :param max_ulp_steps: max number of floating point steps used to move a breakpoint on the feasible side
+    :return options: 2D array [[p, n_pcs], ...] sorted by increasing allocation and production
+    """
+
+    N0i = resource['Production_Max']
+    phi_i = resource['Fatigue_Coeff']
+
+    table = build_production_table(n_hrs, {'Resource1': resource})
+
+    candidates = []
+
+    # Loop on working time
+    for h in range(n_hrs + 1):
+
+        # Start of the hour (whole number of worked hours)
+        p_h = h / n_hrs
+        n_pcs_h = compute_resource_production(n_hrs, p_h, table)
+        candidates.append((p_h, n_pcs_h))
+
+        if h == n_hrs:
+            break
+
+        # Within the (partial) hour h, round(Nhi*r) reaches the level m once Nhi*r >= m - 0.5
+        Nhi = N0i - phi_i*(h+1)
+
+        m = 1
+        while m - 0.5 < Nhi:
+
+            pi = (h + (m - 0.5)/Nhi) / n_hrs
+
+            # Ties are rounded to even and p*n_hrs is not exact: move up until the level is reached
+            n_pcs = compute_resource_production(n_hrs, pi, table)
+            n_steps = 0
+            while n_pcs < n_pcs_h + m and n_steps < max_ulp_steps:
+                pi = np.nextafter(pi, 2.0)
+                n_pcs = compute_resource_production(n_hrs, pi, table)
+                n_steps += 1
+
+            candidates.append((pi, n_pcs))
+            m += 1
+
+    # Keep only the allocations increasing the production with respect to all cheaper ones
+    candidates.sort(key=lambda c: (c[0], -c[1]))
+
+    options = []
+    n_pcs_max = -np.inf
+    for pi, n_pcs in candidates:
+        if n_pcs > n_pcs_max:
+            options.append((pi, n_pcs))
+            n_pcs_max = n_pcs
+
+    return np.array(options)
+
+
+def solve_allocation_exact(n_hrs, resources, n_pcs_target, options=None):
+    """
+    Finds the certified cost-optimal allocation satisfying the production target.
+    The breakpoints of each resource are enumerated (compute_allocation_options) and the resulting
+    multiple-choice knapsack is solved exactly by dynamic programming on the (capped) total production.
+    The optimum is finally verified with the model functions used by the TDP and TPC disciplines.
+    :param n_hrs: number of working hours
+    :param resources: dictionary containing the resources specifications
+    :param n_pcs_target: minimum number of pieces to produce
+    :param options: allocation options of each resource (see compute_allocation_options), computed if None
+    :return solution: a dictionary with the optimal allocation 'p' and the corresponding 'N_pcs_TOT',
+                      'C_TOT' and 'feasible' flag. If the target cannot be reached, the allocation
+                      maximizing the production is returned with 'feasible' = False
+    """
+
+    n_r = len(resources)
+    tags = ['Resource' + str(ir+1) for ir in range(n_r)]
+
+    # Production is integer: reaching the target means reaching its ceiling
+    target = max(int(ceil(n_pcs_target)), 0)
+
+    # Enumerate allocation options of each resource
+    if options is None:
+        options = [compute_allocation_options(n_hrs, resources[tag]) for tag in tags]
+
+    # Dynamic programming on the total production (capped at the target)
+    # best[t] = min cost to produce (at least, if t == target) t pieces with the resources processed so far
+    best = np.full(target + 1, np.inf)
+    best[0] = 0.0
+    levels = np.arange(target + 1)
+
+    choices = []
+    for ir in range(n_r):
+        ci = resources[tags[ir]]['Hourly_Cost']
+
+        new_best = np.full(target + 1, np.inf)
+        choice_opt = np.full(target + 1, -1)
+        choice_prev = np.full(target + 1, -1)
+
+        for io, (pi, n_pcs) in enumerate(options[ir]):
+            cost = best + n_hrs*ci*pi
+            q = min(int(n_pcs), target)
+
+            # Shift the previous levels by the production of the option
+            cand_cost = np.full(target + 1, np.inf)
+            cand_prev = np.full(target + 1, -1)
+            cand_cost[q:target] = cost[:target-q]
+            cand_prev[q:target] = levels[:target-q]
+
+            # All the previous levels exceeding the target collapse on the cap: take the cheapest one
+            i_cap = target - q + np.argmin(cost[target-q:])
+            cand_cost[target] = cost[i_cap]
+            cand_prev[target] = i_cap
+
+            improved = cand_cost < new_best
+            new_best[improved] = cand_cost[improved]
+            choice_opt[improved] = io
+            choice_prev[improved] = cand_prev[improved]
+
+        best = new_best
+        choices.append((choice_opt, choice_prev))
+
+    feasible = bool(np.isfinite(best[target]))
+
+    if feasible:
+        # Backtrack the optimal option of each resource
+        p_opt = np.zeros(n_r)
+        t = target
+        for ir in reversed(range(n_r)):
+            choice_opt, choice_prev = choices[ir]
+            p_opt[ir] = options[ir][choice_opt[t], 0]
+            t = choice_prev[t]
+    else:
+        # The target is out of reach: use the allocation with max production of each resource
+        p_opt = np.array([options[ir][-1, 0] for ir in range(n_r)])
+
+    # Verify against the exact model
+    p = [np.array([pi]) for pi in p_opt]
+    n_pcs_tot = compute_daily_production(n_hrs, p, resources)['N_pcs_TOT']
+    c_tot = compute_production_cost(n_hrs, p, resources)['C_TOT'][0]
+
+    if feasible and n_pcs_tot < target:
+        raise ValueError('[Exact solver]: The optimal allocation does not satisfy the production target.')
+
+    # Send output
+    solution = {'p'         : p_opt,
+                'N_pcs_TOT' : n_pcs_tot,
+                'C_TOT'     : c_tot,
+                'feasible'  : feasible,
+                'n_options' : sum(len(opt) for opt in options)}
+
+    return solution
+
+
+def polish_allocation(n_hrs, resources, n_pcs_target, p0, max_moves=1000, certify=True, gap_tol=1e-3,
+                      fallback_exact=False):
+    """
+    Restores an exact (integer production) solution from the allocation found on a continuous relaxation
+    of the production model (TDP with rounding = 'relaxed' or 'smooth'). Discrete local search on the
+    production breakpoints of each resource:
+    1) snap each allocation down on its breakpoint (same exact production, lower or equal cost)
+    2) repair: move the resource with the cheapest cost per extra piece to its next breakpoint until
+       the production target is reached
+    3) improve: apply the best multi-step move that keeps the target and decreases the cost, until no move
+       is found: one resource goes down by any number of breakpoints and, if the target is no longer reached,
+       the resource with the cheapest way to cover the deficit goes up by as many breakpoints as needed
+    With certify, the polished allocation is verified against the exact optimum (solve_allocation_exact, same
+    breakpoints) and a warning is sent if its relative gap is above gap_tol. The polished allocation is returned
+    unless fallback_exact is set, in which case the exact solution is returned when it is better.
+    :param n_hrs: number of working hours
+    :param resources: dictionary containing the resources specifications
+    :param n_pcs_target: minimum number of pieces to produce
+    :param p0: starting allocation (list or array, one value per resource)
+    :param max_moves: max number of repair/improvement moves
+    :param certify: if True, compute the gap of the polished allocation to the solution of solve_allocation_exact
+    :param gap_tol: relative gap above which a warning is sent (with certify)
+    :param fallback_exact: if True (and certify), return the exact solution when it is better than the polished one
+    :return solution: same dictionary as solve_allocation_exact, plus the number of moves 'n_moves', and with
+                      certify the cost of the local search 'C_TOT_local', the exact optimum 'C_TOT_exact', the
+                      relative gap of the local search 'gap' and the method of the returned allocation 'method'
+    """
+
+    n_r = len(resources)
+    tags = ['Resource' + str(ir+1) for ir in range(n_r)]
+
+    target = max(int(ceil(n_pcs_target)), 0)
+    p0 = np.array(p0, dtype=float).reshape(n_r)
+
+    options = [compute_allocation_options(n_hrs, resources[tag]) for tag in tags]
+    costs = np.array([n_hrs*resources[tag]['Hourly_Cost'] for tag in tags])
+
+    # Pad the option tables so that all resources can be handled as arrays
+    n_opt = np.array([len(opt) for opt in options])
+    opt_p = np.full((n_r, n_opt.max()), np.inf)
+    opt_n = np.full((n_r, n_opt.max()), -np.inf)
+    for ir in range(n_r):
+        opt_p[ir, :n_opt[ir]] = options[ir][:, 0]
+        opt_n[ir, :n_opt[ir]] = options[ir][:, 1]
+
+    rows = np.arange(n_r)
+
+    # 1) Snap on the breakpoints
+    j = np.array([np.searchsorted(options[ir][:, 0], p0[ir], side='right') - 1 for ir in range(n_r)])
+    j = np.clip(j, 0, n_opt - 1)
+
+    n_moves = 0
+    while n_moves < max_moves:
+
+        n_pcs_tot = np.sum(opt_n[rows, j])
+
+        if n_pcs_tot < target:
+            # 2) Repair: deltas of production and cost when moving each resource one breakpoint up
+            can_up = j < n_opt - 1
+            if not can_up.any():
+                break
+
+            j_up = np.where(can_up, j + 1, j)
+            dn_up = opt_n[rows, j_up] - opt_n[rows, j]
+            dc_up = costs*(opt_p[rows, j_up] - opt_p[rows, j])
+
+            ratio = np.where(can_up, dc_up / np.maximum(dn_up, 1e-12), np.inf)
+            ir = np.argmin(ratio)
+            j[ir] += 1
+
+        else:
+            # 3) Improve: resource i goes down to any lower breakpoint a, and the production deficit (if any)
+            #    is covered by the cheapest move up of another resource k, by as many breakpoints as needed
+            slack = n_pcs_tot - target
+
+            # Deltas of production and cost of all the moves down [n_r x n_opt]
+            dn_dn = opt_n - opt_n[rows, j][:, None]
+            dc_dn = costs[:, None]*(opt_p - opt_p[rows, j][:, None])
+            down = np.arange(opt_p.shape[1])[None, :] < j[:, None]
+            deficit = np.where(down, np.maximum(-(slack + dn_dn), 0), 0).astype(int)
+
+            # Cheapest move up of each resource producing at least d more pieces, d = 0...d_max [n_r x d_max+1]
+            d_max = int(deficit.max())
+            d = np.arange(d_max + 1)
+            j_up = np.zeros((n_r, d_max + 1), dtype=int)
+            for ir in range(n_r):
+                j_up[ir] = np.searchsorted(opt_n[ir, :n_opt[ir]], opt_n[ir, j[ir]] + d)
+            can_up = j_up < n_opt[:, None]
+            j_up = np.minimum(j_up, n_opt[:, None] - 1)
+            dc_up = np.where(can_up, costs[:, None]*(opt_p[rows[:, None], j_up] - opt_p[rows, j][:, None]), np.inf)
+
+            # Best and second best resource for each deficit (the resource moving down cannot move up)
+            k_sort = np.argsort(dc_up, axis=0)[:2]
+            k_best = np.where(k_sort[0][deficit] != rows[:, None], k_sort[0][deficit],
+                              k_sort[min(1, n_r - 1)][deficit])
+            valid = down & ((deficit == 0) | (k_best != rows[:, None]))
+            gain = np.where(valid, dc_dn + dc_up[k_best, deficit], np.inf)
+
+            i_dn, a_dn = np.unravel_index(np.argmin(gain), gain.shape)
+            if gain[i_dn, a_dn] >= -1e-12:
+                break
+
+            if deficit[i_dn, a_dn] > 0:
+                k_up = k_best[i_dn, a_dn]
+                j[k_up] = j_up[k_up, deficit[i_dn, a_dn]]
+            j[i_dn] = a_dn
+
+        n_moves += 1
+
+    # Verify against the exact model
+    p_opt = opt_p[rows, j]
+    p = [np.array([pi]) for pi in p_opt]
+    n_pcs_tot = compute_daily_production(n_hrs, p, resources)['N_pcs_TOT']
+    c_tot = compute_production_cost(n_hrs, p, resources)['C_TOT'][0]
+
+    # Send output
+    solution = {'p'         : p_opt,
+                'N_pcs_TOT' : n_pcs_tot,
+                'C_TOT'     : c_tot,
+                'feasible'  : bool(n_pcs_tot >= target),
+                'n_options' : int(np.sum(n_opt)),
+                'n_moves'   : n_moves}
+
+    # Certify against the exact optimum
+    if certify:
+        exact = solve_allocation_exact(n_hrs, resources, n_pcs_target, options=options)
+
+        solution['C_TOT_local'] = solution['C_TOT']
+        solution['C_TOT_exact'] = exact['C_TOT']
+        solution['gap']         = (solution['C_TOT'] - exact['C_TOT']) / max(abs(exact['C_TOT']), 1e-12)
+        solution['method']      = 'local search'
+
+        if solution['gap'] > gap_tol or not solution['feasible'] and exact['feasible']:
+            if solution['feasible']:
+                warnings.warn('[Polish allocation]: The polished allocation is %.2f %% above the exact optimum.' %
+                              (100*solution['gap']))
+            else:
+                warnings.warn('[Polish allocation]: The polished allocation does not reach the production target.')
+
+        # Feasibility first, then cost
+        if fallback_exact and (exact['feasible'], -exact['C_TOT']) > (solution['feasible'], -solution['C_TOT']):
+            for key in ['p', 'N_pcs_TOT', 'C_TOT', 'feasible']:
+                solution[key] = exact[key]
+            solution['method'] = 'exact'
+
+    return solution
@@ -0,0 +1,378 @@
+###################################################################################################
+# This is a nearest-neighbour index over the designs evaluated in GEMSEO histories
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os
+import glob
+import json
+import numpy as np
+from scipy.spatial import cKDTree
+
+from history_reader import GEMSEOHistoryReader
+
+
+
+class_name = 'GEMSEO Design Index'
+
+class DesignIndex():
+    """
+    KD-tree over the normalised design vectors of all the indexed histories. For each point, the run (h5 file),
+    the iteration and the scalar outputs are stored, so that a query returns what was already evaluated close to
+    a new design (duplicate detection, warm starts, surrogate training sets).
+
+    New histories are added to a buffer, searched by brute force, and merged into the tree when the buffer grows
+    beyond a fraction of the tree (the tree is rebuilt on all the points).
+    The index is saved to / loaded from an NPZ file (the tree itself is rebuilt on load).
+    """
+
+    def __init__(self, rebuild_ratio=0.1, min_rebuild=1000, leafsize=32):
+        """
+        :param rebuild_ratio: the buffer is merged into the tree when larger than rebuild_ratio*tree size
+        :param min_rebuild: ... or larger than min_rebuild points
+        :param leafsize: leaf size of the KD-tree
+        """
+
+        self.rebuild_ratio  = rebuild_ratio
+        self.min_rebuild    = min_rebuild
+        self.leafsize       = leafsize
+
+        self.var_names      = None      # Design variables (all the histories must share them)
+        self.l_b            = None      # Bounds used to normalise the design vectors
+        self.u_b            = None
+
+        self.files          = []        # Indexed h5 files
+        self.mtimes         = []        # Modification times of the indexed files
+
+        self.points         = None      # Normalised design vectors [N x n_design]
+        self.run            = np.zeros(0, dtype=np.int64)
+        self.iter           = np.zeros(0, dtype=np.int64)
+        self.outputs        = {}        # {function: 1D array of the scalar outputs (NaN where missing)}
+
+        self.tree           = None
+        self.n_tree         = 0         # Points in the tree (the others are in the buffer)
+
+
+    def __len__(self):
+        return len(self.run)
+
+
+    def normalize(self, x):
+        """
+        :param x: design vector(s) in physical units
+        :return: normalised design vector(s) in [0,1]
+        """
+        return (np.asarray(x, dtype=float) - self.l_b) / np.where(self.u_b > self.l_b, self.u_b - self.l_b, 1.0)
+
+
+    def denormalize(self, xn):
+        """
+        :param xn: normalised design vector(s)
+        :return: design vector(s) in physical units
+        """
+        return self.l_b + np.asarray(xn, dtype=float)*np.where(self.u_b > self.l_b, self.u_b - self.l_b, 1.0)
+
+
+    def add_history(self, h5file, rebuild=True):
+        """
+        Adds the designs of a history to the index (files already indexed and not modified are skipped,
+        modified files are indexed again)
+        :param h5file: path of the h5 history
+        :param rebuild: if True, merge the buffer into the tree when needed
+        :return: number of points added
+        """
+
+        h5file = os.path.abspath(h5file)
+        mtime = os.path.getmtime(h5file)
+
+        if h5file in self.files:
+            i_run = self.files.index(h5file)
+            if self.mtimes[i_run] >= mtime:
+                return 0
+            self.__remove_run(i_run)
+
+        with GEMSEOHistoryReader(h5file) as reader:
+
+            var_names = reader.get_design_variable_names()
+            if self.var_names is None:
+                self.var_names = var_names
+                self.l_b, self.u_b = reader.get_design_bounds()
+                self.points = np.zeros((0, len(self.l_b)))
+            elif var_names != self.var_names:
+                raise ValueError('[' + class_name + ']: The design variables of ' + h5file + ' do not match the index.')
+
+            x_hist = reader.get_x_history()
+            n_new = len(x_hist)
+            if n_new == 0:
+                return 0
+
+            # Scalar outputs
+            new_outputs = {}
+            for func in reader.get_all_data_names():
+                iters = reader.get_function_iterations(func)
+                values = [np.ravel(v) for v in reader.get_function_history(func)]
+                if all(len(v) == 1 for v in values):
+                    col = np.full(n_new, np.nan)
+                    col[iters] = [v[0] for v in values]
+                    new_outputs[func] = col
+
+        i_run = len(self.files)
+        self.files.append(h5file)
+        self.mtimes.append(mtime)
+
+        n_old = len(self)
+        self.points = np.vstack((self.points, self.normalize(x_hist)))
+        self.run  = np.concatenate((self.run, np.full(n_new, i_run, dtype=np.int64)))
+        self.iter = np.concatenate((self.iter, np.arange(n_new, dtype=np.int64)))
+
+        for func in set(self.outputs) | set(new_outputs):
+            old = self.outputs.get(func, np.full(n_old, np.nan))
+            self.outputs[func] = np.concatenate((old, new_outputs.get(func, np.full(n_new, np.nan))))
+
+        if rebuild:
+            self.update_tree()
+
+        return n_new
+
+
+    def add_histories(self, pattern):
+        """
+        Adds all the histories matching a directory, a glob pattern or a list of either
+        :param pattern: directory (all the *.h5 files), glob pattern or list
+        :return: number of points added
+        """
+
+        patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+
+        n_new = 0
+        for pat in patterns:
+            if os.path.isdir(pat):
+                pat = os.path.join(pat, '*.h5')
+            for h5file in sorted(glob.glob(pat)):
+                n_new += self.add_history(h5file, rebuild=False)
+
+        self.update_tree()
+
+        return n_new
+
+
+    def __remove_run(self, i_run):
+        """
+        Removes the points of a run (e.g. the h5 file was modified)
+        """
+
+        keep = self.run != i_run
+        self.points = self.points[keep]
+        self.run    = self.run[keep]
+        self.iter   = self.iter[keep]
+        for func in self.outputs:
+            self.outputs[func] = self.outputs[func][keep]
+
+        # Renumber the following runs
+        self.run[self.run > i_run] -= 1
+        del self.files[i_run]
+        del self.mtimes[i_run]
+
+        self.tree = None
+        self.n_tree = 0
+
+
+    def update_tree(self, force=False):
+        """
+        Merges the buffer into the tree if it is large enough (or if force)
+        :param force: if True, rebuild the tree anyway
+        :return:
+        """
+
+        n_buffer = len(self) - self.n_tree
+        if self.tree is None or force or n_buffer > max(self.min_rebuild, self.rebuild_ratio*self.n_tree):
+            if len(self):
+                self.tree = cKDTree(self.points, leafsize=self.leafsize)
+                self.n_tree = len(self)
+
+
+    def query(self, x, k=1, normalized=False):
+        """
+        k nearest evaluated designs
+        :param x: design vector
+        :param k: number of neighbours
+        :param normalized: True if x is already normalised
+        :return: list of k results (see get_point), sorted by distance (in the normalised space)
+        """
+
+        xn = np.asarray(x, dtype=float) if normalized else self.normalize(x)
+
+        dist, idx = np.zeros(0), np.zeros(0, dtype=np.int64)
+
+        if self.tree is not None and self.n_tree:
+            d_tree, i_tree = self.tree.query(xn, k=min(k, self.n_tree))
+            dist, idx = np.atleast_1d(d_tree), np.atleast_1d(i_tree)
+
+        # Brute force on the buffer
+        if len(self) > self.n_tree:
+            d_buf = np.linalg.norm(self.points[self.n_tree:] - xn, axis=1)
+            dist = np.concatenate((dist, d_buf))
+            idx = np.concatenate((idx, np.arange(self.n_tree, len(self))))
+
+        order = np.argsort(dist, kind='stable')[:k]
+
+        return [self.get_point(idx[i], dist[i]) for i in order]
+
+
+    def query_radius(self, x, r, normalized=False):
+        """
+        Evaluated designs within a distance of a design
+        :param x: design vector
+        :param r: radius (in the normalised space)
+        :param normalized: True if x is already normalised
+        :return: list of results (see get_point), sorted by distance
+        """
+
+        xn = np.asarray(x, dtype=float) if normalized else self.normalize(x)
+
+        idx = np.zeros(0, dtype=np.int64)
+        if self.tree is not None and self.n_tree:
+            idx = np.array(self.tree.query_ball_point(xn, r), dtype=np.int64)
+
+        if len(self) > self.n_tree:
+            d_buf = np.linalg.norm(self.points[self.n_tree:] - xn, axis=1)
+            idx = np.concatenate((idx, self.n_tree + np.flatnonzero(d_buf <= r)))
+
+        dist = np.linalg.norm(self.points[idx] - xn, axis=1)
+        order = np.argsort(dist, kind='stable')
+
+        return [self.get_point(idx[i], dist[i]) for i in order]
+
+
+    def find_duplicate(self, x, tol=1e-8):
+        """
+        :param x: design vector
+        :param tol: max distance (in the normalised space)
+        :return: closest evaluated design if within tol, else None
+        """
+
+        if not len(self):
+            return None
+
+        nearest = self.query(x, k=1)[0]
+
+        return nearest if nearest['distance'] <= tol else None
+
+
+    def get_point(self, i, distance=None):
+        """
+        :param i: point number in the index
+        :param distance: distance to the query (optional)
+        :return: dictionary with the run file, iteration, design vector, distance and scalar outputs of the point
+        """
+
+        point = {'run'      : self.files[self.run[i]],
+                 'iter'     : int(self.iter[i]),
+                 'x'        : self.denormalize(self.points[i]),
+                 'distance' : distance}
+
+        for func, col in self.outputs.items():
+            if not np.isnan(col[i]):
+                point[func] = col[i]
+
+        return point
+
+
+    def get_training_set(self, outputs, normalized=True):
+        """
+        Assembles a training set (e.g. for a surrogate model) from all the indexed points where the outputs exist
+        :param outputs: list of output names
+        :param normalized: if True, return the normalised design vectors
+        :return: tuple (X [n x n_design], Y [n x n_outputs])
+        """
+
+        Y = np.column_stack([self.outputs[func] for func in outputs])
+        valid = np.all(np.isfinite(Y), axis=1)
+
+        X = self.points[valid]
+        if not normalized:
+            X = self.denormalize(X)
+
+        return X, Y[valid]
+
+
+    def save(self, file):
+        """
+        Saves the index to an NPZ file
+        :param file: path of the file
+        :return:
+        """
+
+        meta = {'var_names' : self.var_names,
+                'files'     : self.files,
+                'mtimes'    : self.mtimes,
+                'outputs'   : sorted(self.outputs)}
+
+        arrays = {'meta'   : np.array(json.dumps(meta)),
+                  'points' : self.points if self.points is not None else np.zeros((0, 0)),
+                  'run'    : self.run,
+                  'iter'   : self.iter,
+                  'l_b'    : self.l_b if self.l_b is not None else np.zeros(0),
+                  'u_b'    : self.u_b if self.u_b is not None else np.zeros(0)}
+
+        for j, func in enumerate(meta['outputs']):
+            arrays['output_' + str(j)] = self.outputs[func]
+
+        np.savez(file, **arrays)
+
+
+    @classmethod
+    def load(cls, file, **kwargs):
+        """
+        Loads an index saved with save (the tree is rebuilt)
+        :param file: path of the file
+        :return: DesignIndex
+        """
+
+        index = cls(**kwargs)
+
+        with np.load(file, allow_pickle=False) as npz:
+            meta = json.loads(str(npz['meta']))
+
+            index.var_names = meta['var_names']
+            index.files     = meta['files']
+            index.mtimes    = meta['mtimes']
+            index.points    = npz['points']
+            index.run       = npz['run']
+            index.iter      = npz['iter']
+            index.l_b       = npz['l_b'] if index.var_names is not None else None
+            index.u_b       = npz['u_b'] if index.var_names is not None else None
+
+            for j, func in enumerate(meta['outputs']):
+                index.outputs[func] = npz['output_' + str(j)]
+
+        index.update_tree(force=True)
+
+        return index
+
+
+
+
+###################################################################################################
+# CLASS TESTER
+###################################################################################################
+if __name__ == '__main__':
+
+    index_file = './../runs/design_index.npz'
+
+    # Load the index and add the new histories
+    if os.path.isfile(index_file):
+        index = DesignIndex.load(index_file)
+    else:
+        index = DesignIndex()
+
+    n_new = index.add_histories('./../runs/history_*.h5')
+    index.save(index_file)
+
+    print('[' + class_name + ']: %d points (%d new) from %d histories' % (len(index), n_new, len(index.files)))
+
+    # Closest evaluated designs to a new allocation
+    for point in index.query([0.8, 0.9, 1.0], k=3):
+        print(point)
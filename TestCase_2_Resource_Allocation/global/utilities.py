@@ -8,7 +8,7 @@ def read_resources_specs(res_file):
     :return resources: a dictionary containing the resources specifications
     """
 
-    data = np.loadtxt(res_file, skiprows=1)
+    data = np.atleast_2d(np.loadtxt(res_file, skiprows=1))
 
     res_production = data[:,0]
     res_fatigue = data[:,1]
@@ -16,7 +16,7 @@ def read_resources_specs(res_file):
 
     resources = {}
 
-    for ir in range(3):
+    for ir in range(data.shape[0]):
         dictRes = {}
 
         dictRes['Production_Max'] =   res_production[ir]
@@ -53,3 +53,80 @@ def compute_visibility_vector(n_hrs,p):
             nu[ir, n_hrs_i] = r_hrs_i
 
     return nu
+
+
+def sample_resources_specs(resources, uncertainty, n_samples, seed=None):
+    """
+    Draws random samples of the resources specs, to propagate their uncertainty through the models.
+    The uncertainty of each spec is defined relative to its nominal value (resources.txt):
+        uncertainty = {'Fatigue_Coeff'  : {'distribution': 'normal',    'scale': 0.3},
+                       'Hourly_Cost'    : {'distribution': 'uniform',   'scale': 0.1}}
+    - 'normal':    nominal*(1 + scale*N(0,1))
+    - 'lognormal': nominal*exp(scale*N(0,1) - scale**2/2)  (same mean as the nominal value)
+    - 'uniform':   nominal*U(1 - scale, 1 + scale)
+    'scale' can be a scalar or an array with one value per resource. Specs not listed are deterministic.
+    Negative samples are clipped to zero.
+    :param resources: dictionary containing the resources specifications
+    :param uncertainty: dictionary defining the distribution of the uncertain specs
+    :param n_samples: number of samples
+    :param seed: seed of the random generator
+    :return samples: dictionary containing a [n_samples x n_resources] array for each spec
+    """
+
+    rng = np.random.RandomState(seed)
+
+    n_r = len(resources)
+    tags = ['Resource' + str(ir+1) for ir in range(n_r)]
+
+    samples = {}
+    for spec in ['Production_Max', 'Fatigue_Coeff', 'Hourly_Cost']:
+
+        nominal = np.array([resources[tag][spec] for tag in tags])
+
+        if spec not in uncertainty:
+            samples[spec] = np.repeat(nominal[None, :], n_samples, axis=0)
+            continue
+
+        distribution = uncertainty[spec]['distribution']
+        scale = np.broadcast_to(np.asarray(uncertainty[spec]['scale'], dtype=float), (n_r,))
+
+        if distribution == 'normal':
+            values = nominal*(1 + scale*rng.standard_normal((n_samples, n_r)))
+
+        elif distribution == 'lognormal':
+            values = nominal*np.exp(scale*rng.standard_normal((n_samples, n_r)) - 0.5*scale**2)
+
+        elif distribution == 'uniform':
+            values = nominal*rng.uniform(1 - scale, 1 + scale, (n_samples, n_r))
+
+        else:
+            raise ValueError('Unknown distribution for ' + spec + ': ' + str(distribution))
+
+        samples[spec] = np.maximum(values, 0.0)
+
+    return samples
+
+
+def compute_pareto_front(cost, prod):
+    """
+    Finds the non-dominated points of a set of designs, minimizing the cost and maximizing the production
+    :param cost: array containing the cost of each design
+    :param prod: array containing the production of each design
+    :return i_front: indices of the Pareto-optimal designs, sorted by increasing cost (and production)
+    """
+
+    cost = np.asarray(cost)
+    prod = np.asarray(prod)
+
+    if len(cost) == 0:
+        return np.zeros(0, dtype=int)
+
+    # Sort by increasing cost (decreasing production for equal costs)
+    order = np.lexsort((-prod, cost))
+    prod_sorted = prod[order]
+
+    # A design is on the front if it produces more than all the cheaper ones
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = prod_sorted[1:] > np.maximum.accumulate(prod_sorted)[:-1]
+
+    return order[keep]
@@ -0,0 +1,220 @@
+###################################################################################################
+# This is a simulation template for GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os, sys, time
+
+# Add project paths
+root = os.path.dirname(os.path.abspath(__file__).split('runs')[0])
+sys.path.append(root)
+sys.path.append(root + os.sep + 'global')
+sys.path.append(root + os.sep + 'disciplines')
+sys.path.append(root + os.sep + 'runs')
+
+# Import general libraries
+import numpy as np
+import h5py
+import matplotlib.pyplot as plt
+from scipy.stats import qmc
+
+# Import disciplines
+from TDP.d_total_production import TDP
+from TPC.d_total_cost import TPC
+
+from utilities import compute_pareto_front
+
+
+def generate_doe_chunks(n_dim, method='sobol', n_samples=2**20, chunk_size=2**17, levels=11, seed=1):
+    """
+    Generates the samples of a DOE over the allocation space [0,1]^n_dim, chunk by chunk, so that the full DOE
+    never has to fit in memory
+    :param n_dim: number of design variables (resources)
+    :param method: 'fullfact' (full-factorial grid), 'sobol', 'lhs' (one Latin hypercube per chunk) or 'random'
+    :param n_samples: total number of samples (ignored by 'fullfact', which has levels**n_dim samples)
+    :param chunk_size: max number of samples per chunk
+    :param levels: number of levels per variable of the full-factorial grid
+    :param seed: seed of the random generators
+    :return: generator of 2D arrays [chunk_size x n_dim]
+    """
+
+    if method == 'fullfact':
+        grid = np.linspace(0.0, 1.0, levels)
+        n_samples = levels**n_dim
+
+        for start in range(0, n_samples, chunk_size):
+            idx = np.unravel_index(np.arange(start, min(start + chunk_size, n_samples)), (levels,)*n_dim)
+            yield np.stack([grid[i] for i in idx], axis=1)
+
+    elif method in ['sobol', 'lhs', 'random']:
+        if method == 'sobol':
+            sampler = qmc.Sobol(d=n_dim, scramble=True, seed=seed)
+        elif method == 'lhs':
+            sampler = qmc.LatinHypercube(d=n_dim, seed=seed)
+        else:
+            rng = np.random.RandomState(seed)
+
+        for start in range(0, n_samples, chunk_size):
+            n_chunk = min(chunk_size, n_samples - start)
+
+            if method == 'random':
+                yield rng.uniform(size=(n_chunk, n_dim))
+            else:
+                yield sampler.random(n_chunk)
+
+    else:
+        raise ValueError('Unknown DOE method: ' + str(method))
+
+
+def run_batched_doe(prod, costs, chunks, h5file=None):
+    """
+    Evaluates the TDP and TPC disciplines over a DOE, chunk by chunk, with their batched (vectorized) entry point.
+    The raw results are streamed to an HDF5 file, while the feasible region statistics, the Pareto front
+    (cost vs production) and the best feasible design are updated on the fly
+    :param prod: TDP discipline
+    :param costs: TPC discipline
+    :param chunks: iterable of 2D arrays [n_points x n_resources] (see generate_doe_chunks)
+    :param h5file: path of the HDF5 file to write (if None, the raw results are not stored)
+    :return doe_data: a dictionary containing the number of samples 'n_samples', of feasible samples
+                      'n_feasible', the Pareto front ('front_p', 'front_N_pcs', 'front_C_TOT') and the best
+                      feasible design ('best_p', 'best_C_TOT', 'best_N_pcs', NaN/inf if 'feasible_found' is False)
+    """
+
+    n_r = prod.n_resources
+
+    # Running results
+    n_samples = 0
+    n_feasible = 0
+    front_p = np.zeros((0, n_r))
+    front_n = np.zeros(0)
+    front_c = np.zeros(0)
+    best = {'best_p': np.full(n_r, np.nan), 'best_C_TOT': np.inf, 'best_N_pcs': np.nan, 'feasible_found': False}
+
+    f = None
+    if h5file:
+        f = h5py.File(h5file, 'w')
+        dsets = {}
+        for key, shape in [('p', (0, n_r)), ('N_pcs', (0,)), ('N_pcs_const', (0,)), ('C_TOT', (0,))]:
+            dsets[key] = f.create_dataset(key, shape, dtype='f8', maxshape=(None,) + shape[1:],
+                                          chunks=True, compression='lzf')
+
+    try:
+        for P in chunks:
+
+            # Batched evaluation
+            out = prod.evaluate_batch(P)
+            out.update(costs.evaluate_batch(P))
+            out['p'] = P
+
+            # Stream to disk
+            if f is not None:
+                for key, dset in dsets.items():
+                    dset.resize(n_samples + len(P), axis=0)
+                    dset[n_samples:] = out[key]
+
+            n_samples += len(P)
+
+            # Feasible region and best feasible design
+            feasible = out['N_pcs_const'] <= 0.0
+            n_feasible += int(np.sum(feasible))
+
+            if feasible.any():
+                i_best = np.flatnonzero(feasible)[np.argmin(out['C_TOT'][feasible])]
+                if out['C_TOT'][i_best] < best['best_C_TOT']:
+                    best = {'best_p'         : P[i_best].copy(),
+                            'best_C_TOT'     : out['C_TOT'][i_best],
+                            'best_N_pcs'     : out['N_pcs'][i_best],
+                            'feasible_found' : True}
+
+            # Merge the chunk into the Pareto front
+            front_p = np.vstack((front_p, P))
+            front_n = np.concatenate((front_n, out['N_pcs']))
+            front_c = np.concatenate((front_c, out['C_TOT']))
+
+            i_front = compute_pareto_front(front_c, front_n)
+            front_p, front_n, front_c = front_p[i_front], front_n[i_front], front_c[i_front]
+
+            print('[DOE]: %d samples evaluated (%d feasible)' % (n_samples, n_feasible))
+
+    finally:
+        if f is not None:
+            f.close()
+
+    doe_data = {'n_samples'   : n_samples,
+                'n_feasible'  : n_feasible,
+                'front_p'     : front_p,
+                'front_N_pcs' : front_n,
+                'front_C_TOT' : front_c}
+    doe_data.update(best)
+
+    return doe_data
+
+
+if __name__ == '__main__':
+    """
+    ---------------------------------------------------------------------------------------
+    Massive DOE over the allocation space of the resources allocation problem
+    ---------------------------------------------------------------------------------------
+    [Disciplines]: total_daily_production, total_production_costs (batched evaluation)
+
+    [Design variables]: the parameters of the resources allocation, in [0,1]
+
+    [Outputs]: - raw DOE results (streamed to HDF5)
+               - feasible region of N_pcs_const <= 0
+               - Pareto front of cost vs production
+               - best feasible design >> starting point for the optimizer
+    ---------------------------------------------------------------------------------------
+    REMARKS:
+    - The disciplines are not executed through MDODiscipline.execute, but through their
+      vectorized evaluate_batch method (same models, no grammar/cache overhead)
+    ---------------------------------------------------------------------------------------
+    """
+
+    # Define run identifier
+    output = 'resource_allocation_DOE'
+
+    # DOE settings
+    method = 'sobol'            # 'fullfact', 'sobol', 'lhs', 'random'
+    n_samples = 2**22
+    chunk_size = 2**18
+    levels = 101
+
+    # Initialize the disciplines
+    prod  = TDP(N_pcs_target=110)
+    costs = TPC()
+
+    # Run DOE
+    # --------------------------------------------------------------------------------------
+    h5file = root + os.sep + 'runs' + os.sep + 'doe_' + output + '.h5'
+
+    t0 = time.time()
+    chunks = generate_doe_chunks(prod.n_resources, method=method, n_samples=n_samples,
+                                 chunk_size=chunk_size, levels=levels)
+    doe_data = run_batched_doe(prod, costs, chunks, h5file=h5file)
+    print('[DOE]: wall time = %.1f s' % (time.time() - t0))
+
+    # Save summary (Pareto front and best design)
+    np.savez_compressed(root + os.sep + 'runs' + os.sep + 'doe_summary_' + output + '.npz', **doe_data)
+
+    print(50*'-')
+    print('Feasible fraction   =  %.4f' % (doe_data['n_feasible'] / doe_data['n_samples']))
+    if doe_data['feasible_found']:
+        print('Best feasible p     =  ' + str(doe_data['best_p']))
+        print('Best feasible cost  =  %.4f' % doe_data['best_C_TOT'])
+    else:
+        print('No feasible sample in the DOE')
+    print(50*'-')
+
+    # Post-processing
+    # --------------------------------------------------------------------------------------
+    fig, ax = plt.subplots()
+    ax.plot(doe_data['front_N_pcs'], doe_data['front_C_TOT'], color=[0.0, 0.0, 0.65], linewidth=3.5,
+            drawstyle='steps-post', label='Pareto front')
+    ax.axvline(prod.N_pcs_target, color=[0.4, 0.9, 1.0], linewidth=2.0, label='Target')
+    ax.set_xlabel('N_pcs', fontsize=12)
+    ax.set_ylabel('C_TOT', fontsize=12)
+    plt.legend(loc='best')
+    ax.grid()
+    plt.show()
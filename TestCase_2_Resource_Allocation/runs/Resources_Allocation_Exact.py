@@ -0,0 +1,153 @@
+###################################################################################################
+# This is a simulation template for GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os, sys, time
+
+# Add project paths
+root = os.path.dirname(os.path.abspath(__file__).split('runs')[0])
+sys.path.append(root)
+sys.path.append(root + os.sep + 'global')
+sys.path.append(root + os.sep + 'disciplines')
+sys.path.append(root + os.sep + 'runs')
+
+
+# Import GEMSEO
+from gemseo.api import create_design_space, create_scenario, configure_logger
+
+# Import general libraries
+import numpy as np
+
+# Import disciplines
+from TDP.d_total_production import TDP
+from TPC.d_total_cost import TPC
+
+from utilities import read_resources_specs
+from allocation_solver import solve_allocation_exact
+
+# Initialize logger
+logger = configure_logger()
+
+
+def create_synthetic_resources(n_resources, seed=0):
+    """
+    Creates a random catalog of resources, used to benchmark the exact solver on large plants
+    :param n_resources: number of resources in the plant
+    :param seed: seed of the random generator
+    :return resources: a dictionary containing the resources specifications
+    """
+
+    rng = np.random.RandomState(seed)
+
+    resources = {}
+    for ir in range(n_resources):
+        tag = 'Resource' + str(ir+1)
+        resources[tag] = {'Production_Max' : float(rng.randint(4, 11)),
+                          'Fatigue_Coeff'  : round(rng.uniform(0.05, 0.5), 2),
+                          'Hourly_Cost'    : float(rng.randint(10, 30))}
+
+    return resources
+
+
+if __name__ == '__main__':
+    """
+    ---------------------------------------------------------------------------------------
+    Solve the resources allocation problem exactly and benchmark it against the MDO run
+    ---------------------------------------------------------------------------------------
+    [Merit function]: Total production cost
+
+    [Solver]: enumeration of the production breakpoints + dynamic programming (certified optimum)
+
+    [Benchmark]: same problem solved by the COBYLA scenario of Resources_Allocation_MDO.py
+
+    [Constraints]: Minimum production > 110 pieces
+    ---------------------------------------------------------------------------------------
+    REMARKS:
+    - The exact optimum is a ground truth to validate the MDO setup
+    - Set run_cobyla = False to skip the (slow) derivative-free optimization
+    ---------------------------------------------------------------------------------------
+    """
+
+    # Problem settings
+    N_pcs_target = 110
+    N_hours = 8
+
+    run_cobyla = True
+    n_resources_large = [10, 100, 1000]          # Sizes of the synthetic plants for the timing benchmark
+
+    # Exact solution
+    # --------------------------------------------------------------------------------------
+    resources = read_resources_specs(root + os.sep + 'global' + os.sep + 'resources.txt')
+
+    t0 = time.time()
+    solution = solve_allocation_exact(N_hours, resources, N_pcs_target)
+    t_exact = time.time() - t0
+
+    print(50*'-')
+    print('EXACT SOLVER')
+    print(50*'-')
+    print('Allocation =  ' + str(solution['p']))
+    print('TOT PROD   =  %.4f' % solution['N_pcs_TOT'])
+    print('TOT COST   =  %.4f' % solution['C_TOT'])
+    print('Feasible   =  ' + str(solution['feasible']))
+    print('Wall time  =  %.4f s' % t_exact)
+
+    # COBYLA solution (same set-up as Resources_Allocation_MDO.py)
+    # --------------------------------------------------------------------------------------
+    if run_cobyla:
+        prod  = TDP(N_pcs_target=N_pcs_target, N_hours=N_hours)
+        costs = TPC(N_hours=N_hours)
+
+        ds = create_design_space()
+        ds.add_variable('p1', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+        ds.add_variable('p2', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+        ds.add_variable('p3', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+
+        scenario = create_scenario([prod, costs],
+                                   formulation='MDF',
+                                   objective_name='C_TOT',
+                                   maximize_objective=False,
+                                   design_space=ds,
+                                   scenario_type='MDO',
+                                   )
+
+        scenario.add_constraint("N_pcs_const", "ineq")
+
+        t0 = time.time()
+        scenario.execute({"max_iter": 500, "algo": "NLOPT_COBYLA"})
+        t_cobyla = time.time() - t0
+
+        opt = scenario.formulation.opt_problem.get_optimum()
+        c_cobyla = float(opt[0])
+
+        print(50*'-')
+        print('COBYLA')
+        print(50*'-')
+        print('Allocation =  ' + str(opt[1]))
+        print('TOT COST   =  %.4f' % c_cobyla)
+        print('Wall time  =  %.4f s' % t_cobyla)
+        print(50*'-')
+        print('Cost gap w.r.t. exact optimum  =  %.4f %%' %
+              (100*(c_cobyla - solution['C_TOT']) / solution['C_TOT']))
+        print('Speed-up                       =  %.1f x' % (t_cobyla / t_exact))
+
+    # Timing benchmark on large synthetic plants
+    # --------------------------------------------------------------------------------------
+    print(50*'-')
+    print('EXACT SOLVER ON LARGE PLANTS')
+    print(50*'-')
+    for n_r in n_resources_large:
+        resources_large = create_synthetic_resources(n_r)
+
+        # Ask for ~60 % of the max production of the plant
+        target = int(0.6*sum(resources_large[tag]['Production_Max'] for tag in resources_large)*N_hours*0.8)
+
+        t0 = time.time()
+        solution = solve_allocation_exact(N_hours, resources_large, target)
+        dt = time.time() - t0
+
+        print('N resources = %5d  |  target = %6d  |  cost = %10.2f  |  time = %.3f s' %
+              (n_r, target, solution['C_TOT'], dt))
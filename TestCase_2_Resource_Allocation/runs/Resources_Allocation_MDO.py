@@ -26,6 +26,10 @@ import numpy as np
 from TDP.d_total_production import TDP
 from TPC.d_total_cost import TPC
 
+from allocation_solver import polish_allocation
+from history_writer import LiveHistoryWriter
+from checkpoint import CheckpointWriter, resume_from_checkpoint, warm_start_from_history
+
 from ipdb import set_trace as keyboard
 
 # Initialize logger
@@ -48,14 +52,28 @@ if __name__ == '__main__':
     ---------------------------------------------------------------------------------------
     REMARKS:
     - Each resource can have an allocation between 0 and 1 (full charge)
+    - With rounding = 'relaxed' or 'smooth' the optimizer works on a continuous production model and
+      the result is then polished on the exact (integer) model
     ---------------------------------------------------------------------------------------                 
     """
 
     # Define run identifier
     output = 'resource_allocation_MDO'
 
+    # Production model seen by the optimizer: 'exact', 'relaxed' or 'smooth'
+    rounding = 'exact'
+
+    # Live history >> each evaluation is appended to an h5 file during the run (see GEMSEOPostProcess.follow)
+    live_history = False
+    live_batch   = 10               # Rows written per batch
+
+    # Checkpoints >> resume a run that stopped, or warm start from a previous history
+    checkpoint_every = 50           # New iterations between two checkpoints (0 to disable)
+    resume           = False        # Reload the checkpoint of this run (evaluated points are not run again)
+    warm_start_file  = None         # Previous h5 history to start from (e.g. history_resource_allocation_MDO.h5)
+
     # Initialize the disciplines
-    prod  = TDP(N_pcs_target=110)
+    prod  = TDP(N_pcs_target=110, rounding=rounding)
     costs = TPC()
 
     disciplines = [prod, costs]
@@ -93,9 +111,46 @@ if __name__ == '__main__':
     # Optimization options >> COBYLA search method
     opts = {"max_iter": 500, "algo": "NLOPT_COBYLA"}
 
-    scenario.execute(opts)
+    checkpoint_file = root + os.sep + 'runs' + os.sep + 'checkpoint_' + output + '.h5'
+
+    if resume:
+        resume_from_checkpoint(scenario, checkpoint_file)
+    elif warm_start_file is not None:
+        warm_start_from_history(scenario, root + os.sep + 'runs' + os.sep + warm_start_file)
+
+    if checkpoint_every:
+        CheckpointWriter(checkpoint_file, every=checkpoint_every).attach(scenario.formulation.opt_problem)
+
+    if live_history:
+        writer = LiveHistoryWriter(root + os.sep + 'runs' + os.sep + 'live_history_' + output + '.h5',
+                                   batch_size=live_batch)
+        writer.attach(scenario.formulation.opt_problem)
+
+    try:
+        scenario.execute(opts)
+    finally:
+        if live_history:
+            writer.close()
+
     scenario.print_execution_metrics()
 
+    # Integer polishing of the relaxed solution >> restore the exact production model
+    # --------------------------------------------------------------------------------------
+    if rounding != 'exact':
+        p_relaxed = scenario.formulation.opt_problem.get_optimum()[1]
+
+        solution = polish_allocation(prod.N_hours, prod.resources, prod.N_pcs_target, p_relaxed)
+
+        print(50*'-')
+        print('POLISHED SOLUTION (exact model)')
+        print('Allocation =  ' + str(solution['p']))
+        print('TOT PROD   =  %.4f' % solution['N_pcs_TOT'])
+        print('TOT COST   =  %.4f' % solution['C_TOT'])
+        print('Feasible   =  ' + str(solution['feasible']))
+        print('Exact optimum = %.4f >> gap of the polished allocation = %.2f %%' %
+              (solution['C_TOT_exact'], 100*solution['gap']))
+        print(50*'-')
+
     # Post-processing
     # --------------------------------------------------------------------------------------
     scenario.xdsmize(monitor=False, outdir='.', print_statuses=False, outfilename='ORA_xdsm.html')
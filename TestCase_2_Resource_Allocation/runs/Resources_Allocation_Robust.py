@@ -0,0 +1,116 @@
+###################################################################################################
+# This is a simulation template for GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os, sys
+
+# Add project paths
+root = os.path.dirname(os.path.abspath(__file__).split('runs')[0])
+sys.path.append(root)
+sys.path.append(root + os.sep + 'global')
+sys.path.append(root + os.sep + 'disciplines')
+sys.path.append(root + os.sep + 'runs')
+
+
+# Import GEMSEO
+from gemseo.api import create_design_space, create_scenario, configure_logger
+
+# Import general libraries
+import numpy as np
+
+# Import disciplines
+from TDP.d_total_production import TDP
+from TPC.d_total_cost import TPC
+
+# Initialize logger
+logger = configure_logger()
+
+if __name__ == '__main__':
+    """
+    ---------------------------------------------------------------------------------------
+    Robust resources allocation under uncertain resources specs
+    ---------------------------------------------------------------------------------------
+    [Merit function]: Mean total production cost
+
+    [Disciplines]: total_daily_production, total_production_costs (robust mode)
+
+    [Design variables]: the 3 parameters of the resources allocation
+
+    [Constraints]: Minimum production > 110 pieces with 95 % confidence (P95 shortfall = 0)
+
+    [Architecture]: Single-level Monodisciplinary optimization
+    ---------------------------------------------------------------------------------------
+    REMARKS:
+    - The uncertainty is relative to the nominal specs of resources.txt
+    - The samples are drawn once: the statistics are deterministic functions of the allocation
+    ---------------------------------------------------------------------------------------
+    """
+
+    # Define run identifier
+    output = 'resource_allocation_robust'
+
+    # Uncertainty of the resources specs
+    uncertainty = {'Production_Max' : {'distribution': 'normal',  'scale': 0.05},
+                   'Fatigue_Coeff'  : {'distribution': 'normal',  'scale': 0.30},
+                   'Hourly_Cost'    : {'distribution': 'uniform', 'scale': 0.10}}
+
+    n_samples = 2000
+    confidence = 0.95
+
+    # Initialize the disciplines
+    prod  = TDP(N_pcs_target=110, uncertainty=uncertainty, n_samples=n_samples, confidence=confidence)
+    costs = TPC(uncertainty=uncertainty, n_samples=n_samples, confidence=confidence)
+
+    disciplines = [prod, costs]
+
+
+    # Define the design space
+    # --------------------------------------------------------------------------------------
+    ds = create_design_space()
+
+    ds.add_variable('p1', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+    ds.add_variable('p2', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+    ds.add_variable('p3', 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([0.5]))
+
+    # Define the objective function
+    # --------------------------------------------------------------------------------------
+    obj = 'C_TOT_mean'
+
+    # Create scenario
+    # --------------------------------------------------------------------------------------
+    scenario = create_scenario(disciplines,
+                               formulation='MDF',
+                               objective_name=obj,
+                               maximize_objective=False,
+                               design_space=ds,
+                               scenario_type='MDO',
+                               )
+
+    # Add constraints and observables
+    # --------------------------------------------------------------------------------------
+    scenario.add_constraint("N_pcs_const_robust", "ineq")
+
+    scenario.formulation.add_observable('N_pcs_mean')
+    scenario.formulation.add_observable('N_pcs_shortfall')
+    scenario.formulation.add_observable('C_TOT_quantile')
+
+
+    # Run scenario
+    # --------------------------------------------------------------------------------------
+    # Optimization options >> COBYLA search method
+    opts = {"max_iter": 500, "algo": "NLOPT_COBYLA"}
+
+    scenario.execute(opts)
+    scenario.print_execution_metrics()
+
+    # Post-processing
+    # --------------------------------------------------------------------------------------
+    scenario.post_process("OptHistoryView", save=False, show=True)
+
+
+    # Save h5 history file
+    h5file = root + os.sep + 'runs' + os.sep + 'history_' + output + '.h5'
+    scenario.save_optimization_history(h5file, file_format="hdf5")
@@ -0,0 +1,232 @@
+###################################################################################################
+# This is a simulation template for GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os, sys, time
+from multiprocessing import Pool
+
+# Add project paths
+root = os.path.dirname(os.path.abspath(__file__).split('runs')[0])
+sys.path.append(root)
+sys.path.append(root + os.sep + 'global')
+sys.path.append(root + os.sep + 'disciplines')
+sys.path.append(root + os.sep + 'runs')
+
+
+# Import GEMSEO
+from gemseo.api import create_design_space, create_scenario, configure_logger
+
+# Import general libraries
+import numpy as np
+import matplotlib.pyplot as plt
+
+# Import disciplines
+from TDP.d_total_production import TDP
+from TPC.d_total_cost import TPC
+
+from allocation_solver import solve_allocation_exact
+
+# Initialize logger
+logger = configure_logger()
+
+
+def solve_target(args):
+    """
+    Solves the resources allocation problem (same set-up as Resources_Allocation_MDO.py) for one production
+    target. Defined at module level to be dispatched to the workers of the process pool
+    :param args: tuple (N_pcs_target, x0, opts) with the production target, the starting allocation and the
+                 optimization options
+    :return result: a dictionary containing the target, the optimal allocation 'p', the optimal cost 'C_TOT',
+                    the feasibility flag and the number of evaluations 'n_calls'
+    """
+
+    N_pcs_target, x0, opts = args
+
+    prod  = TDP(N_pcs_target=N_pcs_target)
+    costs = TPC()
+
+    ds = create_design_space()
+    for ir in range(prod.n_resources):
+        ds.add_variable('p' + str(ir+1), 1, l_b=np.array([0.0]), u_b=np.array([1.0]), value=np.array([x0[ir]]))
+
+    scenario = create_scenario([prod, costs],
+                               formulation='MDF',
+                               objective_name='C_TOT',
+                               maximize_objective=False,
+                               design_space=ds,
+                               scenario_type='MDO',
+                               )
+
+    scenario.add_constraint("N_pcs_const", "ineq")
+
+    scenario.execute(dict(opts))
+
+    opt_problem = scenario.formulation.opt_problem
+    f_opt, x_opt, is_feasible = opt_problem.get_optimum()[:3]
+
+    result = {'N_pcs_target' : N_pcs_target,
+              'p'            : np.array(x_opt),
+              'C_TOT'        : float(f_opt),
+              'feasible'     : bool(is_feasible),
+              'n_calls'      : len(opt_problem.database)}
+
+    return result
+
+
+def select_next_wave(targets, solved):
+    """
+    Selects the targets to solve in the next wave: the middle pending target of each gap between solved targets.
+    Each wave roughly doubles the number of solved targets, and every target of a wave has an already solved
+    neighbour to warm-start from
+    :param targets: sorted array of all the production targets of the sweep
+    :param solved: dictionary of the already solved targets
+    :return wave: list of targets to solve
+    """
+
+    is_solved = np.array([t in solved for t in targets])
+    i_solved = np.flatnonzero(is_solved)
+
+    # Gaps are delimited by solved targets (and by the ends of the sweep)
+    bounds = np.concatenate(([-1], i_solved, [len(targets)]))
+
+    wave = []
+    for i_lo, i_hi in zip(bounds[:-1], bounds[1:]):
+        if i_hi - i_lo > 1:
+            wave.append(targets[(i_lo + i_hi) // 2])
+
+    return wave
+
+
+def run_sweep(targets, opts, n_processes=4, n_seeds=4, x0=0.5):
+    """
+    Solves the allocation problem for many production targets in a process pool. A few seed targets, evenly
+    spread over the sweep, are solved from scratch; then each wave solves the middle of the remaining gaps,
+    warm-started from the optimal allocation of the nearest solved target
+    :param targets: array of production targets
+    :param opts: optimization options of each solve
+    :param n_processes: number of parallel processes
+    :param n_seeds: number of targets solved from scratch
+    :param x0: starting allocation of the seed targets
+    :return solved: dictionary {target: result} (see solve_target), with the warm-start target 'warm_start_from'
+    """
+
+    targets = np.sort(np.unique(targets))
+    n_r = TDP().n_resources
+
+    solved = {}
+
+    # Seed wave
+    i_seeds = np.unique(np.linspace(0, len(targets) - 1, min(n_seeds, len(targets))).round().astype(int))
+    wave = [targets[i] for i in i_seeds]
+    starts = [(t, np.full(n_r, x0), -1) for t in wave]
+
+    with Pool(processes=n_processes) as pool:
+
+        while starts:
+            results = pool.map(solve_target, [(t, x, opts) for t, x, _ in starts])
+
+            for (t, _, t_warm), result in zip(starts, results):
+                result['warm_start_from'] = t_warm
+                solved[t] = result
+
+            print('[Sweep]: %d / %d targets solved' % (len(solved), len(targets)))
+
+            # Next wave >> warm start from the nearest solved target
+            wave = select_next_wave(targets, solved)
+            t_solved = np.array(sorted(solved))
+
+            starts = []
+            for t in wave:
+                t_warm = t_solved[np.argmin(np.abs(t_solved - t))]
+                starts.append((t, solved[t_warm]['p'], t_warm))
+
+    return solved
+
+
+def save_sweep_results(solved, file, n_hrs=8, resources=None):
+    """
+    Saves the results of a sweep in a single compressed file (cost-vs-target curve and optimal allocations).
+    If the resources are supplied, the exact optimum of each target is stored as well for validation
+    :param solved: dictionary {target: result} returned by run_sweep
+    :param file: path of the .npz file to write
+    :param n_hrs: number of working hours
+    :param resources: dictionary containing the resources specifications (optional)
+    :return data: dictionary of the saved arrays
+    """
+
+    targets = np.array(sorted(solved))
+
+    data = {'N_pcs_target'    : targets,
+            'C_TOT'           : np.array([solved[t]['C_TOT'] for t in targets]),
+            'p'               : np.array([solved[t]['p'] for t in targets]),
+            'feasible'        : np.array([solved[t]['feasible'] for t in targets]),
+            'n_calls'         : np.array([solved[t]['n_calls'] for t in targets]),
+            'warm_start_from' : np.array([solved[t]['warm_start_from'] for t in targets])}
+
+    if resources is not None:
+        data['C_TOT_exact'] = np.array([solve_allocation_exact(n_hrs, resources, t)['C_TOT'] for t in targets])
+
+    np.savez_compressed(file, **data)
+
+    return data
+
+
+if __name__ == '__main__':
+    """
+    ---------------------------------------------------------------------------------------
+    Parametric sweep of the production target of the resources allocation problem
+    ---------------------------------------------------------------------------------------
+    [Merit function]: Total production cost
+
+    [Disciplines]: total_daily_production, total_production_costs
+
+    [Design variables]: the 3 parameters of the resources allocation
+
+    [Constraints]: Minimum production > target, for each target of the sweep
+
+    [Architecture]: Single-level Monodisciplinary optimization, solved in parallel waves
+    ---------------------------------------------------------------------------------------
+    REMARKS:
+    - Only the seed targets start from p = 0.5, the others are warm-started from the nearest solved target
+    - Targets above the max production of the plant are reported as infeasible
+    ---------------------------------------------------------------------------------------
+    """
+
+    # Define run identifier
+    output = 'resource_allocation_sweep'
+
+    # Sweep settings
+    targets = np.arange(50, 201)
+    n_processes = 8
+    n_seeds = 8
+
+    # Optimization options >> COBYLA search method
+    opts = {"max_iter": 500, "algo": "NLOPT_COBYLA"}
+
+    # Run sweep
+    # --------------------------------------------------------------------------------------
+    t0 = time.time()
+    solved = run_sweep(targets, opts, n_processes=n_processes, n_seeds=n_seeds)
+    print('[Sweep]: wall time = %.1f s' % (time.time() - t0))
+
+    # Save results
+    # --------------------------------------------------------------------------------------
+    prod = TDP()
+    results_file = root + os.sep + 'runs' + os.sep + 'sweep_' + output + '.npz'
+    data = save_sweep_results(solved, results_file, n_hrs=prod.N_hours, resources=prod.resources)
+
+    # Post-processing
+    # --------------------------------------------------------------------------------------
+    feas = data['feasible']
+
+    fig, ax = plt.subplots()
+    ax.plot(data['N_pcs_target'][feas], data['C_TOT'][feas], color=[0.0, 0.0, 0.65], linewidth=3.5, label='COBYLA')
+    ax.plot(data['N_pcs_target'], data['C_TOT_exact'], color=[0.4, 0.9, 1.0], linewidth=2.0, label='Exact')
+    ax.set_xlabel('N_pcs_target', fontsize=12)
+    ax.set_ylabel('C_TOT', fontsize=12)
+    plt.legend(loc='best')
+    ax.grid()
+    plt.show()
@@ -0,0 +1,278 @@
+###################################################################################################
+# This is a loader of optimization campaigns (many GEMSEO histories in a single columnar table)
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os
+import glob
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+
+from postprocessor import GEMSEOPostProcess
+from ragged_array import RaggedArray
+
+
+
+class_name = 'GEMSEO Campaign'
+
+class CampaignTable():
+    """
+    Columnar table of the histories of a campaign of optimizations. Each row is one iteration of one run:
+    - run, iter     : run number and iteration number of each row (rows of a run are contiguous)
+    - obj, feasible : objective (minimization form) and feasibility of each row
+    - scalars       : {function: 1D array over the rows} (NaN where the function is missing)
+    - vectors       : {function: RaggedArray over the rows} (empty segments where the function is missing)
+    - x             : RaggedArray of the design vectors
+    """
+
+    def __init__(self, runs):
+        """
+        Builds the table from the data of each run (see read_history)
+        :param runs: list of dictionaries returned by read_history
+        """
+
+        self.files      = [run['file'] for run in runs]
+        self.names      = [os.path.splitext(os.path.basename(f))[0] for f in self.files]
+        self.obj_names  = [run['obj_name'] for run in runs]
+
+        n_rows = np.array([run['n_rows'] for run in runs], dtype=np.int64)
+        self.run_offsets = np.concatenate(([0], np.cumsum(n_rows))).astype(np.int64)
+
+        self.run  = np.repeat(np.arange(len(runs)), n_rows)
+        self.iter = np.concatenate([np.arange(n) for n in n_rows]) if len(runs) else np.zeros(0, dtype=int)
+
+        self.obj      = np.concatenate([run['obj'] for run in runs]) if runs else np.zeros(0)
+        self.feasible = np.concatenate([run['feasible'] for run in runs]) if runs else np.zeros(0, dtype=bool)
+        self.x        = RaggedArray.concatenate([run['x'] for run in runs])
+
+        # A function is a vector if it is a vector in at least one run
+        vector_names = set()
+        for run in runs:
+            vector_names.update(run['vectors'].keys())
+
+        all_names = set(vector_names)
+        for run in runs:
+            all_names.update(run['scalars'].keys())
+
+        self.scalars = {}
+        self.vectors = {}
+
+        for func in sorted(all_names):
+            if func in vector_names:
+                parts = []
+                for run in runs:
+                    if func in run['vectors']:
+                        parts.append(run['vectors'][func])
+                    elif func in run['scalars']:
+                        col = run['scalars'][func]
+                        parts.append(RaggedArray.from_list([None if np.isnan(v) else v for v in col]))
+                    else:
+                        parts.append(RaggedArray.from_list([None]*run['n_rows']))
+                self.vectors[func] = RaggedArray.concatenate(parts)
+
+            else:
+                self.scalars[func] = np.concatenate([run['scalars'].get(func, np.full(run['n_rows'], np.nan))
+                                                     for run in runs])
+
+
+    def __len__(self):
+        return len(self.run)
+
+
+    @property
+    def n_runs(self):
+        return len(self.files)
+
+
+    def keys(self):
+        """
+        :return: sorted list of all the functions in the table
+        """
+        return sorted(list(self.scalars.keys()) + list(self.vectors.keys()))
+
+
+    def get_run_rows(self, run):
+        """
+        :param run: run number or run name
+        :return: slice of the rows of the run
+        """
+
+        if not isinstance(run, (int, np.integer)):
+            run = self.names.index(run)
+
+        return slice(self.run_offsets[run], self.run_offsets[run+1])
+
+
+    def get(self, func, run=None):
+        """
+        Column of a function, for the whole campaign or for one run
+        :param func: name of the function
+        :param run: run number or run name (if None, all the runs)
+        :return: 1D array (scalar functions) or RaggedArray (vector functions)
+        """
+
+        if func in self.scalars:
+            col = self.scalars[func]
+        elif func in self.vectors:
+            col = self.vectors[func]
+        else:
+            raise KeyError('[' + class_name + ']: Unknown function ' + func)
+
+        if run is None:
+            return col
+
+        return col[self.get_run_rows(run)]
+
+
+    def get_value(self, func, run, it):
+        """
+        :return: value of a function at a given iteration of a run
+        """
+        return self.get(func, run)[it]
+
+
+    def best_objective_per_run(self, feasible_only=True):
+        """
+        Best objective of each run (vectorized over the whole table)
+        :param feasible_only: if True, only the feasible iterations are considered
+        :return: tuple (best objective, best iteration) of each run (inf and -1 for runs without candidates)
+        """
+
+        obj = np.where(self.feasible, self.obj, np.inf) if feasible_only else self.obj
+        obj = np.where(np.isnan(obj), np.inf, obj)
+
+        best_obj  = np.full(self.n_runs, np.inf)
+        best_iter = np.full(self.n_runs, -1, dtype=np.int64)
+
+        if len(obj) == 0:
+            return best_obj, best_iter
+
+        # Sort by run, then by objective >> the first row of each run is its best
+        order = np.lexsort((obj, self.run))
+        has_rows = np.diff(self.run_offsets) > 0
+        first = order[self.run_offsets[:-1][has_rows]]
+
+        best_obj[has_rows]  = obj[first]
+        best_iter[has_rows] = np.where(np.isfinite(obj[first]), self.iter[first], -1)
+
+        return best_obj, best_iter
+
+
+    def summary(self, feasible_only=True):
+        """
+        Prints a summary of the campaign, sorted by best objective
+        :param feasible_only: if True, only the feasible iterations are considered
+        :return:
+        """
+
+        best_obj, best_iter = self.best_objective_per_run(feasible_only=feasible_only)
+
+        print('[' + class_name + ']: %d runs, %d iterations' % (self.n_runs, len(self)))
+        for i in np.argsort(best_obj):
+            print('\t%-40s  N iter = %6d  |  best = %12.6g  (iter %d)' %
+                  (self.names[i], self.run_offsets[i+1] - self.run_offsets[i], best_obj[i], best_iter[i]))
+
+
+
+def read_history(file, functions=None):
+    """
+    Reads one history into columns (worker of load_campaign)
+    :param file: path of the h5 file
+    :param functions: list of the functions to read (if None, all the functions)
+    :return run: dictionary with the file, objective name, number of rows, objective/feasibility columns,
+                 design vectors, scalar columns and vector columns
+    """
+
+    pp = GEMSEOPostProcess(interactive=False)
+    pp.init_from_h5_file(file=file, lazy=True)
+
+    reader = pp.reader
+    n_rows = len(pp.x_hist)
+
+    if functions is None:
+        functions = pp.func_names
+
+    scalars = {}
+    vectors = {}
+    for func in functions:
+        if func not in reader.index:
+            continue
+
+        iters  = reader.get_function_iterations(func)
+        values = [np.ravel(v) for v in reader.get_function_history(func)]
+
+        if all(len(v) == 1 for v in values):
+            col = np.full(n_rows, np.nan)
+            col[iters] = [v[0] for v in values]
+            scalars[func] = col
+        else:
+            col = [None]*n_rows
+            for i, v in zip(iters, values):
+                col[i] = v
+            vectors[func] = RaggedArray.from_list(col)
+
+    run = {'file'     : file,
+           'obj_name' : pp.obj_name,
+           'n_rows'   : n_rows,
+           'obj'      : pp.obj_hist,
+           'feasible' : pp.feasible,
+           'x'        : RaggedArray.from_list(list(pp.x_hist)),
+           'scalars'  : scalars,
+           'vectors'  : vectors}
+
+    reader.close()
+
+    return run
+
+
+
+def _read_history(args):
+    return read_history(*args)
+
+
+
+def load_campaign(pattern, functions=None, n_workers=4, use_processes=True):
+    """
+    Loads many histories into a single CampaignTable, reading the files concurrently
+    :param pattern: directory (all the *.h5 files), glob pattern (e.g. 'runs/history_*.h5') or list of either
+    :param functions: list of the functions to read (if None, all the functions)
+    :param n_workers: number of parallel workers
+    :param use_processes: if True use a process pool, else a thread pool
+    :return: CampaignTable
+    """
+
+    patterns = [pattern] if isinstance(pattern, str) else list(pattern)
+
+    files = []
+    for pat in patterns:
+        if os.path.isdir(pat):
+            pat = os.path.join(pat, '*.h5')
+        files.extend(sorted(glob.glob(pat)))
+
+    if not files:
+        raise IOError('[' + class_name + ']: No h5 file found.')
+
+    jobs = [(file, functions) for file in files]
+
+    pool_class = Pool if use_processes else ThreadPool
+    with pool_class(processes=n_workers) as pool:
+        runs = pool.map(_read_history, jobs)
+
+    return CampaignTable(runs)
+
+
+
+
+###################################################################################################
+# CLASS TESTER
+###################################################################################################
+if __name__ == '__main__':
+
+    # Load all the histories of the results folder
+    campaign = load_campaign('./../3_Results/history_*.h5')
+
+    # Compare the runs
+    campaign.summary()
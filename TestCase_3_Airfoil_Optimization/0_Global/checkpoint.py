@@ -0,0 +1,169 @@
+###################################################################################################
+# This is a checkpoint/resume tool for long GEMSEO 3.2.1 optimizations
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os
+import time
+import numpy as np
+
+from gemseo.algos.opt_problem import OptimizationProblem
+
+
+
+class_name = 'GEMSEO Checkpoint'
+
+class CheckpointWriter():
+    """
+    Periodically exports the OptimizationProblem of a running scenario (database of the evaluated points and
+    design space) to an h5 file. Each checkpoint is written to a temporary file first and then moved over the
+    previous one, so that a crash during the export never corrupts the last valid checkpoint
+    """
+
+    def __init__(self, file, every=10, interval=None):
+        """
+        :param file: path of the checkpoint file
+        :param every: write a checkpoint every <every> new iterations
+        :param interval: if not None, also write a checkpoint when <interval> seconds passed since the last one
+        """
+
+        self.file       = file
+        self.every      = every
+        self.interval   = interval
+
+        self.opt_problem = None
+        self.n_iter      = 0
+        self.t_last      = time.time()
+
+
+    def attach(self, opt_problem):
+        """
+        Registers the writer as a new-iteration callback of the optimization problem
+        :param opt_problem: OptimizationProblem (e.g. scenario.formulation.opt_problem)
+        :return:
+        """
+
+        self.opt_problem = opt_problem
+        opt_problem.add_callback(self.callback, each_new_iter=True)
+
+
+    def callback(self, x_vect):
+        """
+        New-iteration callback
+        :param x_vect: design vector of the new iteration
+        :return:
+        """
+
+        self.n_iter += 1
+
+        if self.n_iter % self.every == 0 or \
+           (self.interval is not None and time.time() - self.t_last >= self.interval):
+            self.save()
+
+
+    def save(self):
+        """
+        Writes a checkpoint (atomic replacement of the previous one)
+        :return:
+        """
+
+        tmp_file = self.file + '.tmp'
+        if os.path.isfile(tmp_file):
+            os.remove(tmp_file)
+
+        self.opt_problem.export_hdf(tmp_file)
+        os.replace(tmp_file, self.file)
+
+        self.t_last = time.time()
+        print('[' + class_name + ']: %d points saved to %s' % (len(self.opt_problem.database), self.file))
+
+
+
+def check_design_space(opt_problem, previous):
+    """
+    Checks that two optimization problems have the same design variables
+    :param opt_problem: OptimizationProblem of the scenario
+    :param previous: OptimizationProblem read from a checkpoint/history
+    :return:
+    """
+
+    ds, ds_prev = opt_problem.design_space, previous.design_space
+
+    if list(ds.variables_names) != list(ds_prev.variables_names) or ds.dimension != ds_prev.dimension:
+        raise ValueError('[' + class_name + ']: The design variables of the history do not match the scenario.')
+
+
+
+def resume_from_checkpoint(scenario, file, restart='replay'):
+    """
+    Reloads a checkpoint into a scenario before its execution. The database of the checkpoint is imported, so that
+    the points already evaluated are served from the database instead of running the disciplines again
+    :param scenario: MDO scenario (not executed yet)
+    :param file: path of the checkpoint file
+    :param restart: starting point of the resumed optimization:
+                    'replay' >> same starting point as the checkpointed run: the optimizer follows the same path,
+                                served by the database, up to the point where the run stopped
+                    'last'   >> last evaluated point
+                    'best'   >> best (feasible) evaluated point
+    :return previous: OptimizationProblem read from the checkpoint
+    """
+
+    if not os.path.isfile(file):
+        raise IOError('[' + class_name + ']: Unable to find the checkpoint ' + file)
+
+    opt_problem = scenario.formulation.opt_problem
+
+    previous = OptimizationProblem.import_hdf(file)
+    check_design_space(opt_problem, previous)
+
+    # Evaluated points
+    opt_problem.database.import_hdf(file)
+
+    # Starting point
+    if restart == 'replay':
+        x_0 = previous.design_space.get_current_x()
+    elif restart == 'last':
+        x_0 = previous.database.get_x_by_iter(len(previous.database) - 1)
+    elif restart == 'best':
+        x_0 = previous.get_optimum()[1]
+    else:
+        raise ValueError('[' + class_name + ']: Unknown restart option ' + str(restart))
+
+    opt_problem.design_space.set_current_x(np.array(x_0))
+
+    print('[' + class_name + ']: Resumed from %s (%d points, restart = %s)' % (file, len(previous.database), restart))
+
+    return previous
+
+
+
+def warm_start_from_history(scenario, file, load_database=False):
+    """
+    Warm-starts a new optimization (e.g. with different algorithm settings) from the optimum of a previous history
+    :param scenario: MDO scenario (not executed yet)
+    :param file: path of the previous h5 history (e.g. history_NACA_4_Aero_Opti.h5)
+    :param load_database: if True, the points of the previous history are also imported into the database (only if
+                          the objective/constraints are the same as in the previous run)
+    :return x_0: starting point of the new optimization
+    """
+
+    opt_problem = scenario.formulation.opt_problem
+
+    previous = OptimizationProblem.import_hdf(file)
+    check_design_space(opt_problem, previous)
+
+    x_0 = np.array(previous.get_optimum()[1])
+
+    # Stay within the bounds of the new design space
+    ds = opt_problem.design_space
+    x_0 = np.clip(x_0, ds.get_lower_bounds(), ds.get_upper_bounds())
+    ds.set_current_x(x_0)
+
+    if load_database:
+        opt_problem.database.import_hdf(file)
+
+    print('[' + class_name + ']: Warm start from %s, x_0 = %s' % (file, str(x_0)))
+
+    return x_0
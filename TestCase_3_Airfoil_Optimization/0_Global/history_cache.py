@@ -0,0 +1,313 @@
+###################################################################################################
+# This is a columnar cache (NPZ) of the optimization histories written by GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import os
+import time
+import json
+import argparse
+import numpy as np
+
+from history_reader import GEMSEOHistoryReader
+from ragged_array import RaggedArray
+
+
+
+class_name = 'GEMSEO History Cache'
+
+CACHE_EXT = '.cache.npz'
+
+
+def get_cache_file(h5file):
+    """
+    :param h5file: path of the h5 history
+    :return: default path of its cache (same folder, extension .cache.npz)
+    """
+    return os.path.splitext(h5file)[0] + CACHE_EXT
+
+
+
+def is_cache_valid(h5file, cache_file=None):
+    """
+    :param h5file: path of the h5 history
+    :param cache_file: path of the cache (if None, the default one)
+    :return: True if the cache exists and is newer than the h5 history
+    """
+
+    if cache_file is None:
+        cache_file = get_cache_file(h5file)
+
+    return os.path.isfile(cache_file) and os.path.getmtime(cache_file) >= os.path.getmtime(h5file)
+
+
+
+def export_history_cache(h5file, cache_file=None, compress=False):
+    """
+    Exports a GEMSEO h5 history to the columnar cache. Layout of the NPZ file:
+        meta            JSON string with the function names, objective, constraints, description and optimum
+        x               2D array of the design vectors [n_iter x n_design]
+        iters_<j>       iterations where the j-th function is stored
+        values_<j>      values of the j-th function (flat buffer for vector functions)
+        offsets_<j>     offsets of the iterations in values_<j> (vector functions only)
+    :param h5file: path of the h5 history
+    :param cache_file: path of the cache to write (if None, the default one)
+    :param compress: if True, compress the NPZ file (smaller, slower to load)
+    :return cache_file: path of the cache written
+    """
+
+    if cache_file is None:
+        cache_file = get_cache_file(h5file)
+
+    with GEMSEOHistoryReader(h5file) as reader:
+
+        names = reader.get_all_data_names()
+
+        meta = {'names'       : names,
+                'is_array'    : [],
+                'obj_name'    : reader.get_objective_name(),
+                'constraints' : reader.get_constraints(),
+                'description' : dict((k, v.item() if isinstance(v, np.generic) else v)
+                                     for k, v in reader.get_description().items()),
+                'design_vars' : reader.get_design_variable_names(),
+                'has_solution': reader.has_solution()}
+
+        arrays = {'x': reader.get_x_history()}
+
+        if reader.has_solution():
+            f_opt, x_opt = reader.get_optimum()
+            arrays['f_opt'] = np.asarray(f_opt)
+            arrays['x_opt'] = np.asarray(x_opt)
+
+        for j, func in enumerate(names):
+            values = reader.get_function_history(func)
+            arrays['iters_' + str(j)] = reader.get_function_iterations(func)
+
+            is_array = bool(reader.index[func][1].any())
+            meta['is_array'].append(is_array)
+
+            if is_array:
+                ragged = RaggedArray.from_list(values)
+                arrays['values_' + str(j)]  = ragged.values
+                arrays['offsets_' + str(j)] = ragged.offsets
+            else:
+                arrays['values_' + str(j)] = np.array(values, dtype=float)
+
+    arrays['meta'] = np.array(json.dumps(meta))
+
+    # Write to a temporary file first, so that an interrupted export never leaves a valid-looking cache
+    tmp_file = cache_file + '.tmp.npz'
+    if compress:
+        np.savez_compressed(tmp_file, **arrays)
+    else:
+        np.savez(tmp_file, **arrays)
+    os.replace(tmp_file, cache_file)
+
+    return cache_file
+
+
+
+class HistoryCacheReader():
+    """
+    Reader of the columnar cache, with the same interface as GEMSEOHistoryReader. Each function is read
+    from the NPZ file on first access
+    """
+
+    def __init__(self, cache_file):
+        """
+        :param cache_file: path of the cache to read
+        """
+
+        try:
+            self.npz = np.load(cache_file, allow_pickle=False)
+            self.meta = json.loads(str(self.npz['meta']))
+        except:
+            raise IOError('[' + class_name + ']: Unable to read the supplied cache file.')
+
+        self.file = cache_file
+
+        self.x_hist = self.npz['x']
+        self.numb_iter = len(self.x_hist)
+
+        # {function: (iterations, is_array, position)} >> position is the column number in the cache
+        self.index = {}
+        for j, (func, is_array) in enumerate(zip(self.meta['names'], self.meta['is_array'])):
+            self.index[func] = (None, is_array, j)
+
+        self.columns = {}
+
+
+    def close(self):
+        self.npz.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def get_all_data_names(self):
+        return list(self.meta['names'])
+
+
+    def get_objective_name(self):
+        return self.meta['obj_name']
+
+
+    def get_constraints(self):
+        return dict(self.meta['constraints'])
+
+
+    def get_description(self):
+        return dict(self.meta['description'])
+
+
+    def get_design_variable_names(self):
+        return list(self.meta['design_vars'])
+
+
+    def has_solution(self):
+        return self.meta['has_solution']
+
+
+    def get_optimum(self):
+        return self.npz['f_opt'][()], self.npz['x_opt']
+
+
+    def get_x_by_iter(self, it):
+        return self.x_hist[it]
+
+
+    def get_x_history(self, start=None, stop=None):
+        return self.x_hist[start:stop]
+
+
+    def __read_column(self, func):
+        """
+        Reads (and caches) the iterations and values of a function
+        """
+
+        if func not in self.columns:
+            _, is_array, j = self.index[func]
+            iters = self.npz['iters_' + str(j)]
+
+            if is_array:
+                values = RaggedArray(self.npz['values_' + str(j)], self.npz['offsets_' + str(j)])
+            else:
+                values = self.npz['values_' + str(j)]
+
+            self.columns[func] = (iters, values)
+
+        return self.columns[func]
+
+
+    def get_function_iterations(self, func, start=None, stop=None):
+        iters = self.__read_column(func)[0]
+        return iters[self.__iteration_mask(iters, start, stop)]
+
+
+    def get_function_history(self, func, start=None, stop=None):
+
+        if func not in self.index:
+            raise KeyError('[' + class_name + ']: Unknown function ' + func)
+
+        iters, values = self.__read_column(func)
+        rows = np.flatnonzero(self.__iteration_mask(iters, start, stop))
+
+        return [values[i] for i in rows]
+
+
+    def __iteration_mask(self, iters, start, stop):
+
+        mask = np.ones(len(iters), dtype=bool)
+        if start is not None:
+            mask &= iters >= start
+        if stop is not None:
+            mask &= iters < stop
+
+        return mask
+
+
+
+def benchmark_reload(h5file, n_repeat=3):
+    """
+    Compares the time needed to load a whole history (all the functions) from:
+    1) OptimizationProblem.import_hdf (original post-processor)
+    2) the h5 file with the lazy h5py reader
+    3) the columnar cache
+    :param h5file: path of the h5 history
+    :param n_repeat: number of repetitions of each load (the best time is kept)
+    :return timings: dictionary of the load times [s]
+    """
+
+    from gemseo.algos.opt_problem import OptimizationProblem
+
+    cache_file = get_cache_file(h5file)
+    if not is_cache_valid(h5file, cache_file):
+        export_history_cache(h5file, cache_file)
+
+    def load_gemseo():
+        opt = OptimizationProblem.import_hdf(h5file)
+        for func in opt.database.get_all_data_names():
+            opt.database.get_complete_history([func])
+
+    def load_reader(reader_class, file):
+        with reader_class(file) as reader:
+            for func in reader.get_all_data_names():
+                reader.get_function_history(func)
+            reader.get_x_history()
+
+    loaders = [('import_hdf', load_gemseo),
+               ('h5py reader', lambda: load_reader(GEMSEOHistoryReader, h5file)),
+               ('NPZ cache', lambda: load_reader(HistoryCacheReader, cache_file))]
+
+    timings = {}
+    for name, load in loaders:
+        best = np.inf
+        for _ in range(n_repeat):
+            t0 = time.time()
+            load()
+            best = min(best, time.time() - t0)
+        timings[name] = best
+
+    print('[' + class_name + ']: Reload benchmark of ' + os.path.basename(h5file))
+    for name, dt in timings.items():
+        print('\t%-12s  %8.4f s  (x %.1f)' % (name, dt, timings['import_hdf'] / dt))
+
+    return timings
+
+
+
+
+###################################################################################################
+# COMMAND LINE INTERFACE
+###################################################################################################
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Export GEMSEO h5 histories to the columnar NPZ cache')
+    parser.add_argument('h5files', nargs='+', help='h5 histories to export')
+    parser.add_argument('-o', '--output', default=None, help='path of the cache (single h5 file only)')
+    parser.add_argument('-c', '--compress', action='store_true', help='compress the NPZ file')
+    parser.add_argument('-f', '--force', action='store_true', help='export even if the cache is up to date')
+    parser.add_argument('-b', '--benchmark', action='store_true', help='benchmark the reload time')
+    args = parser.parse_args()
+
+    if args.output and len(args.h5files) > 1:
+        parser.error('--output can only be used with a single h5 file')
+
+    for h5file in args.h5files:
+        cache_file = args.output if args.output else get_cache_file(h5file)
+
+        if args.force or not is_cache_valid(h5file, cache_file):
+            export_history_cache(h5file, cache_file, compress=args.compress)
+            print('[' + class_name + ']: ' + h5file + ' >> ' + cache_file)
+        else:
+            print('[' + class_name + ']: ' + cache_file + ' is up to date')
+
+        if args.benchmark:
+            benchmark_reload(h5file)
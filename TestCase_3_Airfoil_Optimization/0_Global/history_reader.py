@@ -0,0 +1,309 @@
+###################################################################################################
+# This is a lazy reader of the optimization histories written by GEMSEO 3.2.1
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import h5py
+import numpy as np
+
+
+
+class_name = 'GEMSEO History Reader'
+
+class GEMSEOHistoryReader():
+    """
+    Reads an h5 file written by OptimizationProblem.export_hdf directly with h5py, without importing the whole
+    OptimizationProblem. Only the names of the functions are indexed when the file is opened: the values of each
+    function are read on first access (optionally memory mapped and sliced by iteration range).
+
+    Layout of the database in the h5 file (GEMSEO 3.x):
+        x/<i>           design vector of iteration i
+        k/<i>           names of the functions stored at iteration i
+        v/<i>           values of the scalar functions of iteration i (in the order of k/<i>)
+        v/arr_<i>/<j>   value of the j-th function of k/<i>, when it is an array
+    The problem description is stored in the groups objective, constraints, design_space, opt_description
+    and solution.
+    """
+
+    def __init__(self, file, mmap=False):
+        """
+        Opens the h5 file and indexes the available functions (the values are not loaded)
+        :param file: path of the h5 file to read
+        :param mmap: if True, array values stored contiguously in the file are returned as read-only memory maps
+        """
+
+        try:
+            self.h5 = h5py.File(file, 'r')
+        except:
+            raise IOError('[' + class_name + ']: Unable to read the supplied h5 file.')
+
+        self.file = file
+        self.mmap = mmap
+
+        self.numb_iter = len(self.h5['x']) if 'x' in self.h5 else 0     # Number of stored design points
+
+        self.index = {}             # {function: (iterations, is_array, position)} >> where to find each value
+        self.scalars = {}           # Cache of the scalar values read from v/<i>
+
+        self.__build_index()
+
+
+    def __build_index(self):
+        """
+        Builds the index of the functions: for each function, the iterations where it is stored and the position of
+        its value (in the scalar row v/<i> or in the array group v/arr_<i>)
+        """
+
+        index = {}
+
+        for i in range(self.numb_iter):
+            key_path = 'k/' + str(i)
+            if key_path not in self.h5:
+                continue
+
+            names = [to_str(name) for name in self.h5[key_path][()]]
+
+            arr_path = 'v/arr_' + str(i)
+            arrays = set(int(j) for j in self.h5[arr_path].keys()) if arr_path in self.h5 else set()
+
+            i_scalar = 0
+            for j, name in enumerate(names):
+                if j in arrays:
+                    index.setdefault(name, []).append((i, True, j))
+                else:
+                    index.setdefault(name, []).append((i, False, i_scalar))
+                    i_scalar += 1
+
+        # Store as arrays for fast slicing
+        for name, entries in index.items():
+            entries = np.array(entries, dtype=int).reshape(-1, 3)
+            self.index[name] = (entries[:, 0], entries[:, 1].astype(bool), entries[:, 2])
+
+
+    def close(self):
+        """
+        Closes the h5 file
+        """
+        self.h5.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *args):
+        self.close()
+
+
+    def get_all_data_names(self):
+        """
+        :return: sorted list of the names of all the functions stored in the history
+        """
+        return sorted(self.index.keys())
+
+
+    def get_objective_name(self):
+        """
+        :return: name of the objective function (with a '-' prefix if it was maximized)
+        """
+        return to_str(self.h5['objective/name'][()])
+
+
+    def get_constraints(self):
+        """
+        :return: dictionary {constraint name: 'eq' or 'ineq'}
+        """
+
+        constraints = {}
+        if 'constraints' in self.h5:
+            for group in self.h5['constraints'].values():
+                constraints[to_str(group['name'][()])] = to_str(group['f_type'][()])
+
+        return constraints
+
+
+    def get_description(self):
+        """
+        :return: dictionary containing the settings of the optimization problem (opt_description group)
+        """
+
+        description = {}
+        if 'opt_description' in self.h5:
+            for key, dset in self.h5['opt_description'].items():
+                value = dset[()]
+                if isinstance(value, np.ndarray) and value.dtype.kind in 'SO':
+                    value = to_str(value[0])
+                description[key] = value
+
+        return description
+
+
+    def get_design_variable_names(self):
+        """
+        :return: list of the names of the design variables, in the order of the design vector
+        """
+        return [to_str(name) for name in self.h5['design_space/names'][()]]
+
+
+    def get_design_bounds(self):
+        """
+        :return: tuple (lower bounds, upper bounds) of the design vector
+        """
+
+        names = self.get_design_variable_names()
+        l_b = np.concatenate([np.ravel(self.h5['design_space/' + name + '/l_b'][()]) for name in names])
+        u_b = np.concatenate([np.ravel(self.h5['design_space/' + name + '/u_b'][()]) for name in names])
+
+        return l_b, u_b
+
+
+    def has_solution(self):
+        """
+        :return: True if the solution of the optimization is stored (i.e. the optimization went to its end)
+        """
+        return 'solution' in self.h5
+
+
+    def get_optimum(self):
+        """
+        :return: tuple (f_opt, x_opt) stored by GEMSEO at the end of the optimization
+        """
+
+        f_opt = self.h5['solution/f_opt'][()]
+        x_opt = self.h5['solution/x_opt'][()]
+
+        return f_opt, x_opt
+
+
+    def get_x_by_iter(self, it):
+        """
+        :param it: iteration number (starting from 0)
+        :return: design vector of the iteration
+        """
+        return self.h5['x/' + str(it)][()]
+
+
+    def get_x_history(self, start=None, stop=None):
+        """
+        :param start: first iteration to read (if None, 0)
+        :param stop: last iteration to read, excluded (if None, read until the end)
+        :return: 2D array [n_iter x n_design] of the design vectors
+        """
+
+        iters = range(self.numb_iter)[slice(start, stop)]
+
+        return np.array([self.get_x_by_iter(i) for i in iters])
+
+
+    def get_function_iterations(self, func, start=None, stop=None):
+        """
+        :param func: name of the function
+        :param start: first iteration (if None, 0)
+        :param stop: last iteration, excluded (if None, until the end)
+        :return: array of the iterations where the function is stored
+        """
+
+        iters = self.index[func][0]
+
+        return iters[self.__iteration_mask(iters, start, stop)]
+
+
+    def get_function_history(self, func, start=None, stop=None):
+        """
+        Reads the values of a function over a range of iterations
+        :param func: name of the function
+        :param start: first iteration (if None, 0)
+        :param stop: last iteration, excluded (if None, until the end)
+        :return: list of the values of the function (floats or arrays), one per iteration where it is stored
+        """
+
+        if func not in self.index:
+            raise KeyError('[' + class_name + ']: Unknown function ' + func)
+
+        iters, is_array, position = self.index[func]
+        mask = self.__iteration_mask(iters, start, stop)
+
+        values = []
+        for i, arr, pos in zip(iters[mask], is_array[mask], position[mask]):
+            if arr:
+                values.append(self.__read_array(self.h5['v/arr_' + str(i) + '/' + str(pos)]))
+            else:
+                values.append(self.__read_scalars(i)[pos])
+
+        return values
+
+
+    def __iteration_mask(self, iters, start, stop):
+        """
+        Mask of the iterations within [start, stop)
+        """
+
+        mask = np.ones(len(iters), dtype=bool)
+        if start is not None:
+            mask &= iters >= start
+        if stop is not None:
+            mask &= iters < stop
+
+        return mask
+
+
+    def __read_scalars(self, it):
+        """
+        Reads (and caches) the row of scalar values of an iteration
+        """
+
+        if it not in self.scalars:
+            self.scalars[it] = self.h5['v/' + str(it)][()]
+
+        return self.scalars[it]
+
+
+    def __read_array(self, dset):
+        """
+        Reads an array dataset, or maps it in memory if possible (contiguous, uncompressed dataset)
+        """
+
+        if self.mmap and dset.chunks is None and dset.compression is None:
+            offset = dset.id.get_offset()
+            if offset is not None:
+                return np.memmap(self.file, mode='r', dtype=dset.dtype, shape=dset.shape, offset=offset)
+
+        return dset[()]
+
+
+
+class LazyHistoryData(dict):
+    """
+    Dictionary of the function histories (as stored in GEMSEOPostProcess.data) loading each function from the
+    h5 file on first access. Values follow OptimizationDatabase.get_complete_history: data[func][it][0] is the
+    value of the function at iteration it
+    """
+
+    def __init__(self, reader):
+        super(LazyHistoryData, self).__init__()
+        self.reader = reader
+
+
+    def __missing__(self, func):
+
+        if func not in self.reader.index:
+            raise KeyError(func)
+
+        func_hist = [[value] for value in self.reader.get_function_history(func)]
+        self[func] = func_hist
+
+        return func_hist
+
+
+
+def to_str(value):
+    """
+    Converts a string read from an h5 file (bytes or str) to str
+    """
+
+    if isinstance(value, bytes):
+        return value.decode()
+
+    return str(value)
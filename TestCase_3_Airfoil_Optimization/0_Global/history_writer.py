@@ -0,0 +1,269 @@
+###################################################################################################
+# This is a live (incremental) writer of the optimization history of a running GEMSEO 3.2.1 scenario
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import time
+import json
+import warnings
+import h5py
+import numpy as np
+
+
+
+class_name = 'GEMSEO Live History'
+
+class LiveHistoryWriter():
+    """
+    Appends each new evaluation of an OptimizationProblem to an h5 file while the optimization runs.
+    The file is written in SWMR mode (single writer, multiple readers), so that it can be monitored
+    (see LiveHistoryReader and GEMSEOPostProcess.follow) and survives a crash of the run.
+
+    Columnar layout of the file:
+        x                       design vectors [n_rows x n_design]
+        f/<func>                values of a scalar function [n_rows] (NaN where missing)
+        f/<func>/values         flat values of a vector function
+        f/<func>/offsets        offsets of each row in values [n_rows + 1]
+        finished                set to 1 when the optimization is over
+    The number of complete rows is the length of x (written last at each flush).
+
+    GEMSEO stores the design vector before evaluating the functions: an iteration is written once the next
+    one starts (or when the writer is closed). The rows are buffered and written in batches.
+    """
+
+    def __init__(self, file, batch_size=10, flush_interval=30.0):
+        """
+        :param file: path of the h5 file to write
+        :param batch_size: number of rows buffered before a write
+        :param flush_interval: max time [s] between two writes (checked at each new iteration)
+        """
+
+        self.file           = file
+        self.batch_size     = batch_size
+        self.flush_interval = flush_interval
+
+        self.opt_problem    = None
+        self.h5             = None
+        self.dsets          = {}        # {function: dataset or (values, offsets) datasets}
+        self.pending_x      = []        # Design vectors whose functions may not be evaluated yet
+        self.buffer         = []        # Complete rows waiting to be written [(x, values)]
+        self.n_rows         = 0         # Rows written to the file
+        self.t_flush        = time.time()
+        self.skipped        = set()     # Functions not known when the file was created
+
+
+    def attach(self, opt_problem):
+        """
+        Registers the writer as a new-iteration callback of the optimization problem
+        :param opt_problem: OptimizationProblem (e.g. scenario.formulation.opt_problem)
+        :return:
+        """
+
+        self.opt_problem = opt_problem
+        opt_problem.add_callback(self.callback, each_new_iter=True)
+
+
+    def callback(self, x_vect):
+        """
+        New-iteration callback: the previous iterations are complete and moved to the write buffer
+        :param x_vect: design vector of the new iteration
+        :return:
+        """
+
+        self.__collect()
+        self.pending_x.append(np.array(x_vect, dtype=float))
+
+        if len(self.buffer) >= self.batch_size or time.time() - self.t_flush >= self.flush_interval:
+            self.flush()
+
+
+    def __collect(self):
+        """
+        Moves the pending design vectors to the write buffer, with their values from the database
+        """
+
+        for x in self.pending_x:
+            values = self.opt_problem.database.get(x)
+            self.buffer.append((x, dict(values) if values is not None else {}))
+
+        self.pending_x = []
+
+
+    def __create_file(self, values):
+        """
+        Creates the datasets from the first row to write, then switches to SWMR mode (no dataset can be created
+        afterwards)
+        """
+
+        self.h5 = h5py.File(self.file, 'w', libver='latest')
+
+        # Problem description
+        self.h5.attrs['obj_name'] = self.opt_problem.get_objective_name()
+        self.h5.attrs['minimize_objective'] = bool(self.opt_problem.minimize_objective)
+        self.h5.attrs['constraints'] = json.dumps(dict((c.name, c.f_type) for c in self.opt_problem.constraints))
+        self.h5.attrs['ineq_tolerance'] = self.opt_problem.ineq_tolerance
+        self.h5.attrs['eq_tolerance'] = self.opt_problem.eq_tolerance
+
+        n_x = self.opt_problem.dimension
+        self.h5.create_dataset('x', (0, n_x), dtype='f8', maxshape=(None, n_x), chunks=(self.batch_size, n_x))
+
+        for func, value in values.items():
+            if np.size(value) == 1:
+                self.dsets[func] = self.h5.create_dataset('f/' + func, (0,), dtype='f8', maxshape=(None,),
+                                                          chunks=(self.batch_size,))
+            else:
+                chunk = max(1, self.batch_size*np.size(value))
+                vals = self.h5.create_dataset('f/' + func + '/values', (0,), dtype='f8', maxshape=(None,),
+                                              chunks=(chunk,))
+                offs = self.h5.create_dataset('f/' + func + '/offsets', (1,), dtype='i8', maxshape=(None,),
+                                              chunks=(self.batch_size,), data=np.zeros(1, dtype='i8'))
+                self.dsets[func] = (vals, offs)
+
+        self.h5.create_dataset('finished', (1,), dtype='i1', data=np.zeros(1, dtype='i1'))
+
+        self.h5.swmr_mode = True
+
+
+    def flush(self):
+        """
+        Writes the buffered rows to the file
+        :return:
+        """
+
+        if not self.buffer:
+            return
+
+        if self.h5 is None:
+            values = {}
+            for _, row_values in self.buffer:
+                values.update(row_values)
+            self.__create_file(values)
+
+        n_new = len(self.buffer)
+        n_old = self.n_rows
+
+        # Function values
+        for func, dset in self.dsets.items():
+            row_values = [values.get(func) for _, values in self.buffer]
+
+            if isinstance(dset, tuple):
+                vals, offs = dset
+                segments = [np.zeros(0) if v is None else np.ravel(v).astype(float) for v in row_values]
+                lengths = np.array([len(seg) for seg in segments], dtype='i8')
+
+                n_vals = vals.shape[0]
+                vals.resize((n_vals + lengths.sum(),))
+                vals[n_vals:] = np.concatenate(segments)
+                vals.flush()
+
+                offs.resize((n_old + n_new + 1,))
+                offs[n_old + 1:] = n_vals + np.cumsum(lengths)
+                offs.flush()
+
+            else:
+                dset.resize((n_old + n_new,))
+                dset[n_old:] = [np.nan if v is None else float(np.ravel(v)[0]) for v in row_values]
+                dset.flush()
+
+        # Functions unknown at the creation of the file
+        for _, values in self.buffer:
+            for func in values:
+                if func not in self.dsets and func not in self.skipped:
+                    self.skipped.add(func)
+                    warnings.warn('[' + class_name + ']: ' + func + ' is not written to the live history.')
+
+        # Design vectors last >> the readers never see a row before its values
+        x = self.h5['x']
+        x.resize((n_old + n_new, x.shape[1]))
+        x[n_old:] = np.array([row[0] for row in self.buffer])
+        x.flush()
+
+        self.n_rows += n_new
+        self.buffer = []
+        self.t_flush = time.time()
+
+
+    def close(self):
+        """
+        Writes all the remaining rows (including the last iteration) and closes the file
+        :return:
+        """
+
+        if self.opt_problem is not None:
+            self.__collect()
+        self.flush()
+
+        if self.h5 is not None:
+            self.h5['finished'][0] = 1
+            self.h5['finished'].flush()
+            self.h5.close()
+            self.h5 = None
+
+
+
+class LiveHistoryReader():
+    """
+    Reads a live history (see LiveHistoryWriter) while it is being written. Each refresh only reads the
+    rows added since the previous one
+    """
+
+    def __init__(self, file):
+        """
+        :param file: path of the live h5 file
+        """
+
+        try:
+            self.h5 = h5py.File(file, 'r', libver='latest', swmr=True)
+        except:
+            raise IOError('[' + class_name + ']: Unable to read the supplied live history.')
+
+        self.obj_name = str(self.h5.attrs['obj_name'])
+        self.minimize_objective = bool(self.h5.attrs['minimize_objective'])
+        self.constraints = json.loads(self.h5.attrs['constraints'])
+
+        self.func_names = sorted(self.h5['f'].keys())
+        self.n_rows = 0
+
+
+    def close(self):
+        self.h5.close()
+
+
+    def is_finished(self):
+        """
+        :return: True if the optimization is over
+        """
+        self.h5['finished'].refresh()
+        return bool(self.h5['finished'][0])
+
+
+    def refresh(self):
+        """
+        Reads the rows written since the previous refresh
+        :return new_rows: dictionary {'x': 2D array, function: list of values} of the new rows
+        """
+
+        x = self.h5['x']
+        x.refresh()
+        n_rows = x.shape[0]
+
+        new_rows = {'x': x[self.n_rows:n_rows]}
+
+        for func in self.func_names:
+            node = self.h5['f/' + func]
+
+            if isinstance(node, h5py.Group):
+                node['offsets'].refresh()
+                node['values'].refresh()
+                offsets = node['offsets'][self.n_rows:n_rows+1]
+                values = node['values'][offsets[0]:offsets[-1]] if len(offsets) else np.zeros(0)
+                new_rows[func] = [values[o1 - offsets[0]:o2 - offsets[0]] for o1, o2 in zip(offsets[:-1], offsets[1:])]
+            else:
+                node.refresh()
+                new_rows[func] = list(node[self.n_rows:n_rows])
+
+        self.n_rows = n_rows
+
+        return new_rows
@@ -8,8 +8,18 @@
 import matplotlib.pyplot as plt
 from gemseo.algos.opt_problem import OptimizationProblem
 
+import os
+import time
 import warnings
+import subprocess
+import matplotlib
 import numpy as np
+from multiprocessing import Pool
+
+from history_reader import GEMSEOHistoryReader, LazyHistoryData
+from history_cache import HistoryCacheReader, get_cache_file, is_cache_valid
+from history_writer import LiveHistoryReader
+from ragged_array import RaggedArray
 
 from ipdb import set_trace as keyboard
 
@@ -19,7 +29,7 @@ class_name = 'GEMSEO Post-Processor'
 
 class GEMSEOPostProcess():
 
-    def __init__(self, cmap=None):
+    def __init__(self, cmap=None, interactive=True):
 
         self.obj_name       = 'None'    # Name of the objective function
         self.func_names     = []        # List of available functions (design variables, merit function, observables...)
@@ -28,6 +38,28 @@ class GEMSEOPostProcess():
         self.numb_iter      = None      # Number of iterations
         self.opt_iter       = None      # Optimal iteration
 
+        self.reader         = None      # Lazy h5 reader (see init_from_h5_file)
+
+        # Iteration index (built at load time)
+        self.x_hist         = None      # 2D array of the design vectors [n_iter x n_design]
+        self.x_map          = {}        # Hash map {rounded design vector: iteration}
+        self.obj_hist       = None      # Objective values (minimization form, inf where missing)
+        self.obj_sign       = 1.0       # Sign from the stored objective to its minimization form
+        self.feasible       = None      # Feasibility flag of each iteration
+        self.best_iter      = None      # Best feasible iteration
+        self.best_so_far    = None      # Best feasible objective up to each iteration
+        self.best_iter_so_far = None    # Best feasible iteration up to each iteration (-1 if none yet)
+        self.x_decimals     = 10        # Decimals used to hash the design vectors
+
+        # Columnar store (built on demand and cached)
+        self.store          = {}        # {function: RaggedArray over all the iterations}
+        self.violation      = None      # Total constraint violation of each iteration
+
+        # Rendering mode
+        self.interactive    = interactive   # If False, never block on plt.show()/input() (figures saved to files)
+        self.fig            = None          # Figure reused by all the plots in non-interactive mode
+        self.ax             = None
+
         # Define colormap for multiple plots
         if cmap is None:
             # use default colormap
@@ -37,14 +69,23 @@ class GEMSEOPostProcess():
             self.colormap = cmap
 
 
-    def init_from_h5_file(self, file=None):
+    def init_from_h5_file(self, file=None, lazy=True, mmap=False, use_cache=True):
         """
         This method reads an h5 file from a GEMSEO analysis and stores the retrieved values of the optimization
         quantities (i.e. objective function, constraints, design variables, observed quantities)
         :param file: path of the h5 file to read
+        :param lazy: if True, read the file directly with h5py and load each function on first access. If False,
+                     import the whole OptimizationProblem and load all the functions
+        :param mmap: if True (lazy mode only), memory map the array values instead of reading them
+        :param use_cache: if True (lazy mode only), read the columnar cache of the h5 file instead, when it is
+                          newer than the h5 file (see history_cache.py)
         :return:
         """
 
+        if lazy:
+            self.__init_lazy(file, mmap=mmap, use_cache=use_cache)
+            return
+
         # Read an h5file into an OptimizationProblem
         try:
             opt = OptimizationProblem.import_hdf(file)
@@ -56,7 +97,7 @@ class GEMSEOPostProcess():
         self.obj_name = opt.get_objective_name()
 
         # Retrieve name of constraints
-        # [To be completed]
+        constraints = dict((func.name, func.f_type) for func in opt.constraints)
 
         # Retrieve available functions (observables etc)
         self.func_names =  opt.database.get_all_data_names()
@@ -69,36 +110,302 @@ class GEMSEOPostProcess():
         # Compute number of iterations
         self.numb_iter = int(self.data['Iter'][-1][0]) - 1
 
+        # Build iteration index
+        self.__build_iteration_index(np.array(opt.database.get_x_history()), constraints,
+                                     minimize=opt.minimize_objective,
+                                     ineq_tol=opt.ineq_tolerance, eq_tol=opt.eq_tolerance)
+
         # Find optimal solution
-        self.opt_iter = self.__find_optimal_iter(opt)
+        self.opt_iter = self.__find_optimal_iter(opt.get_optimum()[1])
 
 
 
-    def __find_optimal_iter(self, opt):
+    def __init_lazy(self, file, mmap=False, use_cache=True):
         """
-        Find the number of the optimal iteration.
-        It's kinda strange, but I couldn't find a simple way to know this info. So here's a method:
-        1) recover the optimal values of the design variables
-        2) Compare the optimal values to thos of each variable until a match is found
+        Lazy version of init_from_h5_file: only the names of the functions are read from the h5 file, the
+        histories are loaded on first access to self.data
+        :param file: path of the h5 file to read
+        :param mmap: if True, memory map the array values instead of reading them
+        :param use_cache: if True, read the columnar cache instead of the h5 file when it is up to date
+        :return:
+        """
+
+        if use_cache and is_cache_valid(file):
+            self.reader = HistoryCacheReader(get_cache_file(file))
+        else:
+            self.reader = GEMSEOHistoryReader(file, mmap=mmap)
+
+        # Retrieve name of objective functions
+        self.obj_name = self.reader.get_objective_name()
+
+        # Retrieve available functions (observables etc)
+        self.func_names = self.reader.get_all_data_names()
+
+        # Function histories >> loaded on demand
+        self.data = LazyHistoryData(self.reader)
 
-        This method could be revised in the future if smarter options appear
+        # Compute number of iterations
+        self.numb_iter = int(self.data['Iter'][-1][0]) - 1
+
+        # Build iteration index
+        descr = self.reader.get_description()
+        self.__build_iteration_index(self.reader.get_x_history(), self.reader.get_constraints(),
+                                     minimize=bool(descr.get('minimize_objective', True)),
+                                     ineq_tol=float(descr.get('ineq_tolerance', 1e-4)),
+                                     eq_tol=float(descr.get('eq_tolerance', 1e-2)))
+
+        # Find optimal solution
+        if self.reader.has_solution():
+            self.opt_iter = self.__find_optimal_iter(self.reader.get_optimum()[1])
+        else:
+            self.opt_iter = self.best_iter
+
+
+
+    def get_history(self, func, it1=None, it2=None):
+        """
+        Returns the history of a function over a range of iterations, without loading the rest of it
+        (lazy mode only)
+        :param func: name of the function
+        :param it1: first iteration (if None, iteration zero)
+        :param it2: last iteration, excluded (if None, until the end)
+        :return: list of the values of the function
         """
 
-        # Recover design values at optimal point
-        x_opti = opt.get_optimum()[1]
+        if self.reader is None:
+            return [value[0] for value in self.data[func][it1:it2]]
 
-        # Check all iterations to find which one is optimum
-        iter_opti = None
-        for i in range(self.numb_iter+1):
-            x_iter = opt.database.get_x_by_iter(i)
-            comp = x_opti == x_iter
+        return self.reader.get_function_history(func, start=it1, stop=it2)
 
-            if comp.all():
-                iter_opti = i
-                break
+
+
+    def __get_function_iterations(self, func):
+        """
+        Iterations where a function is stored (in non-lazy mode, all the functions are assumed to be stored at
+        every iteration)
+        """
+
+        if self.reader is None:
+            return np.arange(len(self.data[func]))
+
+        return self.reader.get_function_iterations(func)
+
+
+
+    def __build_iteration_index(self, x_hist, constraints, minimize=True, ineq_tol=1e-4, eq_tol=1e-2):
+        """
+        Builds, once at load time, the index used to answer the optimum queries without scanning the history:
+        1) the hash map from (rounded) design vector to iteration
+        2) the objective values in minimization form and the feasibility of each iteration
+        3) the best feasible objective/iteration up to each iteration
+        :param x_hist: 2D array of the design vectors of all the iterations
+        :param constraints: dictionary {constraint name: 'eq' or 'ineq'}
+        :param minimize: False if the objective was maximized
+        :param ineq_tol: tolerance on the inequality constraints
+        :param eq_tol: tolerance on the equality constraints
+        :return:
+        """
+
+        n_x = len(x_hist)
+        self.x_hist = np.atleast_2d(x_hist)
+        self.store = {}
+
+        # Design vector >> iteration (keep the first occurrence)
+        self.x_map = {}
+        for i in range(n_x - 1, -1, -1):
+            self.x_map[self.__hash_x(self.x_hist[i])] = i
+
+        # Objective in minimization form. GEMSEO stores the objective of a maximization as '-name' with
+        # negated values, which are already minimized
+        sign = 1.0
+        if not minimize and not self.obj_name.startswith('-'):
+            sign = -1.0
+
+        obj = self.get_ragged(self.obj_name).first()
+        self.obj_sign = sign
+        self.obj_hist = np.where(np.isnan(obj), np.inf, sign*obj)
+
+        # Constraint violation and feasibility
+        self.violation = self.__compute_violation(constraints, ineq_tol, eq_tol)
+        self.feasible = np.isfinite(self.obj_hist) & (self.violation <= 0.0)
+
+        # Best feasible so far
+        obj_feas = np.where(self.feasible, self.obj_hist, np.inf)
+        self.best_so_far = np.minimum.accumulate(obj_feas) if n_x else obj_feas
+
+        previous = np.concatenate(([np.inf], self.best_so_far[:-1]))
+        improved = obj_feas < previous
+        self.best_iter_so_far = np.maximum.accumulate(np.where(improved, np.arange(n_x), -1)) if n_x else \
+                                np.zeros(0, dtype=int)
+
+        self.best_iter = int(self.best_iter_so_far[-1]) if n_x and self.best_iter_so_far[-1] >= 0 else None
+
+
+
+    def __compute_violation(self, constraints, ineq_tol, eq_tol):
+        """
+        Total violation of the constraints at each iteration (vectorized over the padded constraint histories).
+        Iterations where a constraint is missing have an infinite violation
+        :param constraints: dictionary {constraint name: 'eq' or 'ineq'}
+        :param ineq_tol: tolerance on the inequality constraints
+        :param eq_tol: tolerance on the equality constraints
+        :return: 1D array of the violations
+        """
+
+        violation = np.zeros(len(self.x_hist))
+
+        for func, f_type in constraints.items():
+            if func not in self.func_names:
+                continue
+
+            values, mask = self.get_array(func, fill=0.0)
+
+            if f_type == 'eq':
+                viol = np.maximum(np.abs(values) - eq_tol, 0.0)
+            else:
+                viol = np.maximum(values - ineq_tol, 0.0)
+
+            violation += np.sum(np.where(mask, viol, 0.0), axis=1)
+            violation[~mask.any(axis=1)] = np.inf
+
+        return violation
+
+
+
+    def get_ragged(self, func):
+        """
+        History of a function as a RaggedArray over all the iterations (flat values + offsets, empty segments
+        where the function is missing). Built on first access and cached
+        :param func: name of the function
+        :return: RaggedArray
+        """
+
+        if func not in self.store:
+            if func not in self.func_names:
+                raise KeyError('[' + class_name + ']: Unknown function ' + func)
+
+            if self.reader is not None:
+                values = self.reader.get_function_history(func)
+            else:
+                values = [value[0] for value in self.data[func]]
+
+            column = [None]*len(self.x_hist)
+            for i, value in zip(self.__get_function_iterations(func), values):
+                column[i] = value
+
+            self.store[func] = RaggedArray.from_list(column)
+
+        return self.store[func]
+
+
+
+    def get_array(self, func, iters=None, fill=np.nan):
+        """
+        History of a function as a 2D padded array (vectorized)
+        :param func: name of the function
+        :param iters: iterations to extract (array of iterations or slice, if None all the iterations)
+        :param fill: value of the padding
+        :return: tuple (values [n_iter x max length], mask [n_iter x max length]) with mask True where a value exists
+        """
+
+        ragged = self.get_ragged(func)
+
+        if isinstance(iters, slice):
+            ragged = ragged[iters]
+        elif iters is not None:
+            ragged = ragged.take(np.atleast_1d(iters))
+
+        return ragged.to_padded(fill=fill)
+
+
+
+    def get_value(self, func, it):
+        """
+        :param func: name of the function
+        :param it: iteration number
+        :return: value of the function at the iteration (float for scalars, 1D array for vectors)
+        """
+
+        value = self.get_ragged(func)[it]
+
+        return value[0] if len(value) == 1 else value
+
+
+
+    def get_running_best(self):
+        """
+        :return: tuple (best feasible objective, best feasible iteration) up to each iteration (cached at load time)
+        """
+        return self.best_so_far, self.best_iter_so_far
+
+
+
+    def get_violation(self):
+        """
+        :return: total constraint violation of each iteration (cached at load time)
+        """
+        return self.violation
+
+
+
+    def __hash_x(self, x):
+        """
+        Key of a design vector in the hash map (rounded, to be robust to round-tripped floats)
+        """
+        return np.round(np.asarray(x, dtype=float).ravel(), self.x_decimals).tobytes()
+
+
+
+    def find_iteration(self, x, tol=1e-8):
+        """
+        Returns the iteration of a design vector: hash map lookup, or nearest stored design vector if no exact
+        match is found
+        :param x: design vector
+        :param tol: max distance (relative to the norm of x) accepted for the nearest design vector
+        :return: iteration number (None if no design vector is close enough)
+        """
+
+        it = self.x_map.get(self.__hash_x(x))
+        if it is not None:
+            return it
+
+        x = np.asarray(x, dtype=float).ravel()
+        dist = np.linalg.norm(self.x_hist - x, axis=1)
+        i_near = int(np.argmin(dist))
+
+        if dist[i_near] <= tol*max(1.0, np.linalg.norm(x)):
+            return i_near
+
+        return None
+
+
+
+    def get_best_iteration(self, it=None):
+        """
+        Returns the best feasible iteration found up to a given iteration
+        :param it: iteration number (if None, the whole history)
+        :return: iteration number (None if no feasible iteration was found)
+        """
+
+        if it is None:
+            return self.best_iter
+
+        best = int(self.best_iter_so_far[it])
+
+        return best if best >= 0 else None
+
+
+
+    def __find_optimal_iter(self, x_opti):
+        """
+        Find the number of the optimal iteration, i.e. the iteration of the optimal design vector stored by GEMSEO
+        (hash map lookup in the iteration index)
+        """
+
+        iter_opti = self.find_iteration(x_opti)
 
         # If none could be find, send warning
-        if not iter_opti:
+        if iter_opti is None:
             raise IOError('[' + class_name + ']: Unable to recover the optimal iteration.')
 
 
@@ -106,17 +413,19 @@ class GEMSEOPostProcess():
 
 
 
-    def keys(self):
+    def keys(self, wait=True):
         """
         Prints a list of the available keys to plot (typically the objective, constraints and all
         the OBSERVABLE specified by the USer in the problem definition)
+        :param wait: if True (and in interactive mode), wait for the user to press ENTER
         :return:
         """
         print('[' + class_name + ']: Available functions:')
         for func in self.func_names:
             print('\t' + func)
 
-        input('Press ENTER to continue')
+        if wait and self.interactive:
+            input('Press ENTER to continue')
 
 
 
@@ -143,8 +452,8 @@ class GEMSEOPostProcess():
         print('[' + class_name + '] Results:')
         print('')
         for func in lst:
-            func1 = self.data[func][it1][0]
-            func2 = self.data[func][it2][0]
+            func1 = self.get_value(func, it1)
+            func2 = self.get_value(func, it2)
 
             print(func + ':' )
             print('\t \t \t Iter %d: %.4f' % (it1, func1))
@@ -153,29 +462,58 @@ class GEMSEOPostProcess():
 
 
 
-    def plot_opti_history(self, color=None):
+    def plot_opti_history(self, color=None, file=None, show=None, max_points=2000, method='lttb',
+                          full_resolution=False, running_best=True):
         """
         Plots time history of the optimization metrics.
         For the time being, only the objective function and the constraints are plotted.
         [To be xtended with the design vars]
+        Long histories are decimated to max_points (shape-preserving), so that the rendering time does not grow
+        with the number of iterations
         :param color: a list containing the RGB color definition [[0.0, 0.25, 0.75]]
+        :param file: path of the image file to save the figure to (if None, the figure is not saved)
+        :param show: if True, show the figure (if None, show only in interactive mode)
+        :param max_points: max number of points plotted per series
+        :param method: decimation method, 'lttb' (largest triangle three buckets) or 'minmax' (min and max per bucket)
+        :param full_resolution: if True, plot all the iterations
+        :param running_best: if True, overlay the best feasible objective found so far
         :return:
         """
 
         # Plot objective function
-        iters   = self.data['Iter']
-        obj     = self.data[self.obj_name]
+        iters   = self.get_ragged('Iter').first()
+        obj     = self.get_ragged(self.obj_name).first()
+
+        valid = np.isfinite(iters) & np.isfinite(obj)
+        iters, obj = iters[valid], obj[valid]
+
+        if not full_resolution and len(obj) > max_points:
+            iters, obj = decimate(iters, obj, max_points, method=method)
+
+        data_2_plot = [(iters, obj)]
+        labels      = ['ObjFun']
 
+        # Best feasible so far (piecewise constant >> only its steps are plotted)
+        if running_best:
+            best = self.obj_sign*self.best_so_far
+            valid = np.isfinite(best)
+            if valid.any():
+                iters_best = np.arange(1, len(best) + 1, dtype=float)[valid]
+                data_2_plot.append(step_points(iters_best, best[valid]))
+                labels.append('Best feasible')
 
         # Color override (if necessary)
-        color = [[0.0, 0.0, 0.55]]
+        if color is None:
+            color = [[0.0, 0.0, 0.55], self.colormap[1]]
 
-        self.__simple_plot([(iters,obj)], ['ObjFun'], cmap =color,  xtag='Iter', ytag=self.obj_name)
+        self.__simple_plot(data_2_plot, labels, cmap =color,  xtag='Iter', ytag=self.obj_name,
+                           file=file, show=show)
 
 
 
 
-    def plot_comparison(self, x_key='None', y_key='None', it1=None, it2=None, equalize=False):
+    def plot_comparison(self, x_key='None', y_key='None', it1=None, it2=None, equalize=False, file=None,
+                        show=None):
         """
         Plot a comparison of two series of data coming from 2 different iterations of an optimization
         history.
@@ -184,6 +522,8 @@ class GEMSEOPostProcess():
         :param it1: First iteration to plot (if None, use iteration zero)
         :param it2: Second iteration to plot (if None, use the optimum)
         :param equalize: Set axis equal
+        :param file: path of the image file to save the figure to (if None, the figure is not saved)
+        :param show: if True, show the figure (if None, show only in interactive mode)
         :return:
         """
 
@@ -191,20 +531,240 @@ class GEMSEOPostProcess():
             # Plot first iteration
             it1 = 0
 
-        x_1 = self.data[x_key][it1][0]
-        y_1 = self.data[y_key][it1][0]
+        x_1 = self.get_value(x_key, it1)
+        y_1 = self.get_value(y_key, it1)
 
         if not it2:
             # Plot optimal iteration
             it2 = self.opt_iter
 
-        x_2 = self.data[x_key][it2][0]
-        y_2 = self.data[y_key][it2][0]
+        x_2 = self.get_value(x_key, it2)
+        y_2 = self.get_value(y_key, it2)
 
         data_2_plot     =   [(x_1, y_1), (x_2,y_2)]
         labels          =   ['Iter' + str (it1), 'Iter' + str (it2)]
 
-        self.__simple_plot(data_2_plot, labels, xtag=x_key, ytag=y_key, equalize=equalize )
+        self.__simple_plot(data_2_plot, labels, xtag=x_key, ytag=y_key, equalize=equalize, file=file, show=show)
+
+
+    def follow(self, file, interval=5.0, file_out=None, max_updates=None):
+        """
+        Tail/follow mode: monitors a running optimization from its live history (see history_writer.py).
+        At each refresh only the new rows are read, appended to the internal data and added to the plot of
+        the objective and of its best feasible value, until the optimization is over
+        :param file: path of the live h5 file
+        :param interval: time [s] between two refreshes
+        :param file_out: path of the image file updated at each refresh (if None, the figure is not saved)
+        :param max_updates: max number of refreshes (if None, follow until the end of the optimization)
+        :return:
+        """
+
+        reader = LiveHistoryReader(file)
+
+        self.obj_name   = reader.obj_name
+        self.func_names = reader.func_names
+        self.data       = dict((func, []) for func in self.func_names)
+
+        tol = float(reader.h5.attrs['ineq_tolerance'])
+        eq_tol = float(reader.h5.attrs['eq_tolerance'])
+
+        sign = 1.0
+        if not reader.minimize_objective and not self.obj_name.startswith('-'):
+            sign = -1.0
+
+        obj  = np.zeros(0)
+        best = np.zeros(0)
+
+        # Figure
+        if self.interactive:
+            plt.ion()
+        fig, ax = plt.subplots()
+        line_obj,  = ax.plot([], [], color=self.colormap[0], linewidth=3.5, label=self.obj_name)
+        line_best, = ax.plot([], [], color=self.colormap[1], linewidth=2.0, label='Best feasible')
+        ax.set_xlabel('Iter', fontsize=12)
+        ax.set_ylabel(self.obj_name, fontsize=12)
+        ax.legend(loc='best')
+        ax.grid()
+
+        n_updates = 0
+        while True:
+            finished = reader.is_finished()
+            new_rows = reader.refresh()
+
+            n_new = len(new_rows['x'])
+            if n_new:
+                for func in self.func_names:
+                    self.data[func].extend([value] for value in new_rows[func])
+
+                # Objective and best feasible value of the new rows only
+                new_obj = np.array(new_rows[self.obj_name], dtype=float)
+                feasible = np.isfinite(new_obj)
+                for func, f_type in reader.constraints.items():
+                    if func in new_rows:
+                        values = [np.asarray(v, dtype=float) for v in new_rows[func]]
+                        if f_type == 'eq':
+                            feasible &= np.array([np.all(np.abs(v) <= eq_tol) for v in values])
+                        else:
+                            feasible &= np.array([np.all(v <= tol) for v in values])
+
+                prev = best[-1] if len(best) else np.inf
+                new_obj_feas = np.where(feasible, sign*new_obj, np.inf)
+                new_best = np.minimum.accumulate(np.concatenate(([prev], new_obj_feas)))[1:]
+
+                obj  = np.concatenate((obj, new_obj))
+                best = np.concatenate((best, new_best))
+
+                iters = np.arange(1, len(obj) + 1)
+                line_obj.set_data(iters, obj)
+                line_best.set_data(iters, sign*best)
+                ax.relim()
+                ax.autoscale_view()
+
+                if file_out is not None:
+                    fig.savefig(file_out)
+
+                print('[' + class_name + ']: %d iterations, best feasible %s = %.6g' %
+                      (len(obj), self.obj_name, sign*best[-1]))
+
+            n_updates += 1
+            if finished or (max_updates is not None and n_updates >= max_updates):
+                break
+
+            if self.interactive:
+                plt.pause(interval)
+            else:
+                time.sleep(interval)
+
+        self.numb_iter = len(obj) - 1
+        reader.close()
+
+        if self.interactive:
+            plt.ioff()
+            plt.show()
+
+
+
+    def animate(self, pairs, file=None, frames_dir=None, iters=None, fps=10, dpi=100, equalize=False, ghost=True):
+        """
+        Animates the evolution of one or more observables over the iterations (e.g. airfoil shape, polars).
+        The frames are read lazily from the history, one iteration at a time, and drawn with blitting: the static
+        part of the figure is rendered once (again only when the axis limits have to grow), then only the
+        updated lines are drawn at each frame
+        :param pairs: (x_key, y_key) tuple or list of tuples, one subplot per tuple
+        :param file: path of the animation to write (.mp4 through ffmpeg, or .gif)
+        :param frames_dir: directory where each frame is saved as a png image
+        :param iters: iterations to animate (if None, all the iterations)
+        :param fps: frames per second
+        :param dpi: resolution of the frames
+        :param equalize: Set axis equal
+        :param ghost: if True, the first animated iteration is kept in the background as reference
+        :return: number of frames rendered
+        """
+
+        if isinstance(pairs[0], str):
+            pairs = [pairs]
+
+        if iters is None:
+            iters = range(len(self.x_hist))
+        iters = list(iters)
+
+        # Static part of the figure
+        fig, axes = plt.subplots(1, len(pairs), figsize=(5.5*len(pairs), 4.5), dpi=dpi, squeeze=False)
+        axes = axes[0]
+
+        lines = []
+        for ax, (x_key, y_key) in zip(axes, pairs):
+            if ghost:
+                x_0, y_0 = self.__read_frame(x_key, y_key, iters[0])
+                ax.plot(x_0, y_0, color=self.colormap[1], linewidth=2.0, label='Iter' + str(iters[0]))
+
+            line, = ax.plot([], [], color=self.colormap[0], linewidth=3.5, label='Current', animated=True)
+            lines.append(line)
+
+            ax.set_xlabel(x_key, fontsize=12)
+            ax.set_ylabel(y_key, fontsize=12)
+            ax.legend(loc='upper right')
+            ax.grid()
+
+        text = axes[0].text(0.03, 0.93, '', transform=axes[0].transAxes, fontsize=12, animated=True)
+
+        # Output
+        write_frame, close_output = _open_frame_output(file, frames_dir, fps)
+        live = self.interactive and file is None and frames_dir is None
+        if live:
+            plt.show(block=False)
+
+        limits = [None]*len(pairs)
+        background = None
+
+        for it in iters:
+
+            # Read the frame and grow the axis limits if needed
+            frame_data = []
+            redraw = background is None
+            for i, (ax, (x_key, y_key)) in enumerate(zip(axes, pairs)):
+                x, y = self.__read_frame(x_key, y_key, it)
+                frame_data.append((x, y))
+
+                new_limits = _grow_limits(limits[i], x, y)
+                if new_limits is not limits[i]:
+                    limits[i] = new_limits
+                    ax.set_xlim(new_limits[0], new_limits[1])
+                    ax.set_ylim(new_limits[2], new_limits[3])
+                    if equalize:
+                        ax.set_aspect('equal', adjustable='box')
+                    redraw = True
+
+            # Full draw of the static part only when needed
+            if redraw:
+                fig.canvas.draw()
+                background = fig.canvas.copy_from_bbox(fig.bbox)
+
+            # Blitting
+            fig.canvas.restore_region(background)
+            for ax, line, (x, y) in zip(axes, lines, frame_data):
+                line.set_data(x, y)
+                ax.draw_artist(line)
+
+            text.set_text('Iter %d' % it)
+            axes[0].draw_artist(text)
+
+            fig.canvas.blit(fig.bbox)
+
+            if live:
+                fig.canvas.flush_events()
+                time.sleep(1.0/fps)
+            else:
+                write_frame(np.asarray(fig.canvas.buffer_rgba()))
+
+        close_output()
+        plt.close(fig)
+
+        return len(iters)
+
+
+
+    def __read_frame(self, x_key, y_key, it):
+        """
+        Reads the X,Y series of one iteration, without loading the rest of the history (unless already cached)
+        """
+
+        xy = []
+        for func in [x_key, y_key]:
+            if func in self.store:
+                value = self.store[func][it]
+            elif self.reader is not None:
+                value = self.reader.get_function_history(func, start=it, stop=it+1)
+                value = np.ravel(value[0]) if value else np.zeros(0)
+            else:
+                value = np.ravel(self.data[func][it][0])
+            xy.append(np.asarray(value, dtype=float))
+
+        # Series of different lengths (should not happen) are truncated
+        n = min(len(xy[0]), len(xy[1]))
+
+        return xy[0][:n], xy[1][:n]
+
 
 
     def get_iteration(self, it=None):
@@ -222,12 +782,13 @@ class GEMSEOPostProcess():
         it_data = {}
 
         for func in self.func_names:
-            it_data[func] = self.data[func][self.opt_iter]
+            it_data[func] = [self.get_value(func, it)]
 
         return it_data
 
 
-    def __simple_plot(self, data, labels, cmap=None, xtag='X Data', ytag='Y Data', equalize=False ):
+    def __simple_plot(self, data, labels, cmap=None, xtag='X Data', ytag='Y Data', equalize=False, file=None,
+                      show=None):
         """
         Just a general X,Y plot with some options to specify externally.
         Inputs are defined as lists to allow multiple plots to be compared
@@ -237,6 +798,8 @@ class GEMSEOPostProcess():
         :param xtag: Label of the X axis
         :param ytag: Label of the Y axis
         :param equalize: Set axis equal
+        :param file: path of the image file to save the figure to (if None, the figure is not saved)
+        :param show: if True, show the figure (if None, show only in interactive mode)
         :return:
         """
 
@@ -244,8 +807,14 @@ class GEMSEOPostProcess():
         if cmap is None:
             cmap = self.colormap
 
-        # Plot series
-        fig, ax = plt.subplots()
+        # Plot series (in non-interactive mode, the same figure is cleared and reused)
+        if self.interactive:
+            fig, ax = plt.subplots()
+        else:
+            if self.fig is None:
+                self.fig, self.ax = plt.subplots()
+            fig, ax = self.fig, self.ax
+            ax.clear()
 
         for i in range(len(data)):
             idat = data[i]
@@ -257,10 +826,277 @@ class GEMSEOPostProcess():
         if equalize:
             ax.axis('equal')
 
-        plt.legend(loc='best')
+        ax.legend(loc='best')
         ax.grid()
 
-        plt.show()
+        # Save to file
+        if file is not None:
+            fig.savefig(file)
+
+        if show is None:
+            show = self.interactive
+
+        if show:
+            plt.show()
+
+
+
+
+def decimate(x, y, n_out, method='lttb'):
+    """
+    Shape-preserving decimation of a long X,Y series
+    :param x: 1D array of the X values (sorted)
+    :param y: 1D array of the Y values
+    :param n_out: number of points to keep
+    :param method: 'lttb' (largest triangle three buckets) or 'minmax' (first, min, max and last of each bucket)
+    :return: tuple (x, y) of the decimated series
+    """
+
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    if method == 'lttb':
+        idx = lttb_indices(x, y, n_out)
+    elif method == 'minmax':
+        idx = minmax_indices(y, max(1, n_out // 4))
+    else:
+        raise ValueError('[' + class_name + ']: Unknown decimation method ' + str(method))
+
+    return x[idx], y[idx]
+
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest Triangle Three Buckets: the first and last points are kept, the others are split in n_out-2 buckets
+    and, in each bucket, the point forming the largest triangle with the previously selected point and the
+    average of the next bucket is kept. The loop is over the buckets, each bucket is processed with NumPy
+    :return: array of the indices of the points to keep
+    """
+
+    n = len(x)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    # Average point of each bucket (the last "next bucket" is the last point)
+    sums_x = np.add.reduceat(x[1:n-1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n-1], edges[:-1] - 1)
+    counts = np.diff(edges)
+    avg_x = np.append(sums_x / counts, x[-1])
+    avg_y = np.append(sums_y / counts, y[-1])
+
+    idx = np.zeros(n_out, dtype=np.int64)
+    idx[-1] = n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b+1]
+
+        # Twice the area of the triangles (a, point of the bucket, average of the next bucket)
+        area = np.abs((x[a] - avg_x[b+1])*(y[lo:hi] - y[a]) - (x[a] - x[lo:hi])*(avg_y[b+1] - y[a]))
+
+        a = lo + int(np.argmax(area))
+        idx[b+1] = a
+
+    return idx
+
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Min/max decimation (fully vectorized): the first, min, max and last point of each bucket are kept
+    :return: array of the sorted indices of the points to keep
+    """
+
+    n = len(y)
+    bucket = (np.arange(n)*n_buckets) // n
+    starts = np.searchsorted(bucket, np.arange(n_buckets))
+    ends = np.append(starts[1:], n) - 1
+
+    # Buckets as the rows of a (n_buckets, k) array, padded so that the padding is never the min/max: O(n)
+    k = int((ends - starts).max()) + 1
+    col = np.arange(n) - starts[bucket]
+    padded = np.full((n_buckets, k), np.inf)
+    padded[bucket, col] = y
+    i_min = starts + padded.argmin(axis=1)
+    padded[bucket, col] = -y
+    i_max = starts + padded.argmin(axis=1)
+
+    idx = np.concatenate((starts, ends, i_min, i_max))
+
+    return np.unique(idx)
+
+
+
+def step_points(x, y):
+    """
+    Vertices of a piecewise-constant series, drawn as steps (only the points where the value changes are kept)
+    :param x: 1D array of the X values
+    :param y: 1D array of the Y values
+    :return: tuple (x, y) of the step vertices
+    """
+
+    change = np.flatnonzero(np.diff(y) != 0) + 1
+    keep = np.concatenate(([0], change))
+
+    # Each change is drawn as a horizontal then a vertical segment
+    x_step = np.repeat(x[keep], 2)[1:]
+    y_step = np.repeat(y[keep], 2)[:-1]
+
+    return np.append(x_step, x[-1]), np.append(y_step, y[keep[-1]])
+
+
+
+def _grow_limits(limits, x, y, margin=0.05):
+    """
+    Axis limits [xmin, xmax, ymin, ymax] containing the current ones and the new X,Y series (with a margin).
+    Returns the same object if the current limits already contain the series
+    """
+
+    finite = np.isfinite(x) & np.isfinite(y)
+    if not finite.any():
+        return limits
+
+    box = [np.min(x[finite]), np.max(x[finite]), np.min(y[finite]), np.max(y[finite])]
+
+    if limits is not None and box[0] >= limits[0] and box[1] <= limits[1] and box[2] >= limits[2] and \
+       box[3] <= limits[3]:
+        return limits
+
+    if limits is not None:
+        box = [min(box[0], limits[0]), max(box[1], limits[1]), min(box[2], limits[2]), max(box[3], limits[3])]
+
+    dx = margin*(box[1] - box[0]) or margin
+    dy = margin*(box[3] - box[2]) or margin
+
+    return [box[0] - dx, box[1] + dx, box[2] - dy, box[3] + dy]
+
+
+
+def _open_frame_output(file=None, frames_dir=None, fps=10):
+    """
+    Opens the outputs of an animation
+    :param file: path of the animation (.mp4 through ffmpeg, .gif through Pillow)
+    :param frames_dir: directory of the png frames
+    :param fps: frames per second
+    :return: tuple of functions (write_frame(rgba array), close())
+    """
+
+    from PIL import Image
+
+    state = {'n': 0, 'proc': None, 'gif': [], 'palette': None}
+
+    if frames_dir is not None and not os.path.isdir(frames_dir):
+        os.makedirs(frames_dir)
+
+    def to_palette(frame):
+        # The palette is computed once, from the first frame (the plots only use a few colors): mapping the next
+        # frames to it is much cheaper than quantizing each frame (and the colors do not flicker). Palette images
+        # are 3-4 times smaller than RGBA ones, to encode (png) and to keep in memory (gif)
+        # method 2 = fast octree (Image.FASTOCTREE in Pillow < 9.1, Image.Quantize.FASTOCTREE afterwards)
+        image = Image.fromarray(frame).convert('RGB')
+        if state['palette'] is None:
+            state['palette'] = image.quantize(colors=64, method=2)
+        return image.quantize(palette=state['palette'], dither=0)
+
+    def write_frame(frame):
+
+        palette_frame = None
+
+        if frames_dir is not None:
+            palette_frame = to_palette(frame)
+            palette_frame.save(os.path.join(frames_dir, 'frame_%05d.png' % state['n']), compress_level=1)
+
+        if file is not None and file.lower().endswith('.gif'):
+            state['gif'].append(palette_frame if palette_frame is not None else to_palette(frame))
+
+        elif file is not None:
+            if state['proc'] is None:
+                height, width = frame.shape[:2]
+                cmd = [matplotlib.rcParams['animation.ffmpeg_path'], '-y', '-loglevel', 'error',
+                       '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', '%dx%d' % (width, height), '-r', str(fps),
+                       '-i', '-', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', file]
+                state['proc'] = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            state['proc'].stdin.write(frame.tobytes())
+
+        state['n'] += 1
+
+    def close():
+
+        if state['proc'] is not None:
+            state['proc'].stdin.close()
+            state['proc'].wait()
+
+        if state['gif']:
+            # All the frames share the same palette: no palette optimization
+            state['gif'][0].save(file, save_all=True, append_images=state['gif'][1:], duration=int(1000/fps), loop=0,
+                                 optimize=False)
+
+    return write_frame, close
+
+
+
+def render_plot_batch(h5files, plot_specs, out_dir, n_processes=4, file_format='png', lazy=True):
+    """
+    Renders a set of plots for many optimization histories, without any user interaction. The histories are
+    distributed over a process pool, each worker renders its plots on the headless Agg backend reusing a single
+    figure
+    :param h5files: list of paths of the h5 files to post-process
+    :param plot_specs: list of plots to render for each file. Each plot is a dictionary with the name of the
+                       plotting method 'method' (e.g. 'plot_opti_history', 'plot_comparison'), its keyword
+                       arguments 'kwargs' and a 'name' used for the output file
+    :param out_dir: directory of the image files (<h5 file name>_<plot name>.<file_format>)
+    :param n_processes: number of parallel processes
+    :param file_format: format of the image files
+    :param lazy: lazy loading of the h5 files (see GEMSEOPostProcess.init_from_h5_file)
+    :return files: list of the image files written, for each h5 file
+    """
+
+    if not os.path.isdir(out_dir):
+        os.makedirs(out_dir)
+
+    jobs = [(h5file, plot_specs, out_dir, file_format, lazy) for h5file in h5files]
+
+    with Pool(processes=n_processes, initializer=_init_headless_worker) as pool:
+        files = pool.map(_render_history, jobs)
+
+    return files
+
+
+
+def _init_headless_worker():
+    """
+    Switches the workers of render_plot_batch to the non-interactive Agg backend
+    """
+    plt.switch_backend('Agg')
+
+
+
+def _render_history(args):
+    """
+    Renders all the plots of one optimization history (worker of render_plot_batch)
+    """
+
+    h5file, plot_specs, out_dir, file_format, lazy = args
+
+    pp = GEMSEOPostProcess(interactive=False)
+    pp.init_from_h5_file(file=h5file, lazy=lazy)
+
+    run_name = os.path.splitext(os.path.basename(h5file))[0]
+
+    files = []
+    for i, spec in enumerate(plot_specs):
+        name = spec.get('name', spec['method'] + '_' + str(i))
+        file = os.path.join(out_dir, run_name + '_' + name + '.' + file_format)
+
+        getattr(pp, spec['method'])(file=file, **spec.get('kwargs', {}))
+        files.append(file)
+
+    plt.close(pp.fig)
+    if pp.reader is not None:
+        pp.reader.close()
+
+    return files
 
 
 
@@ -303,6 +1139,11 @@ if __name__ == '__main__':
                        equalize=True
                        )
 
+    # Example of animation: evolution of the airfoil shape and of the CL-v-Alpha curve
+    pp.animate([('AirfoilX', 'AirfoilY'), ('Alpha', 'CL')],
+               file='./../3_Results/animation_NACA_4_Aero_Opti.gif',
+               )
+
     # Example of plotting: Compare CL-v-Alpha curves for Initial and Optimal
     pp.plot_comparison(x_key='Alpha',
                        y_key='CL',
@@ -0,0 +1,161 @@
+###################################################################################################
+# This is a columnar container for series of variable-length vectors (flat buffer + offsets)
+#
+# Author: L.Sartori
+#
+###################################################################################################
+
+import numpy as np
+
+
+
+class_name = 'Ragged Array'
+
+class RaggedArray():
+    """
+    Stores a list of 1D arrays of different lengths in a single flat buffer:
+        values[offsets[i]:offsets[i+1]] is the i-th array
+    Empty segments (offsets[i] == offsets[i+1]) stand for missing values.
+    """
+
+    def __init__(self, values=None, offsets=None, dtype=float):
+        """
+        :param values: flat 1D array of all the values
+        :param offsets: 1D array of the n+1 offsets of the n segments in values
+        :param dtype: data type of the values
+        """
+
+        self.values  = np.zeros(0, dtype=dtype) if values is None else np.asarray(values)
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else np.asarray(offsets, dtype=np.int64)
+
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.values) or np.any(np.diff(self.offsets) < 0):
+            raise ValueError('[' + class_name + ']: Offsets are not consistent with the values.')
+
+
+    @classmethod
+    def from_list(cls, arrays, dtype=float):
+        """
+        Builds a RaggedArray from a list of arrays (None stands for a missing value)
+        :param arrays: list of arrays or scalars
+        :param dtype: data type of the values
+        :return: RaggedArray
+        """
+
+        segments = [np.zeros(0, dtype=dtype) if a is None else np.ravel(np.asarray(a, dtype=dtype)) for a in arrays]
+
+        lengths = np.array([len(seg) for seg in segments], dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+        values  = np.concatenate(segments) if segments else np.zeros(0, dtype=dtype)
+
+        return cls(values, offsets)
+
+
+    @classmethod
+    def concatenate(cls, raggeds):
+        """
+        Concatenates a list of RaggedArray (segment-wise)
+        :param raggeds: list of RaggedArray
+        :return: RaggedArray
+        """
+
+        if not raggeds:
+            return cls()
+
+        values  = np.concatenate([r.values for r in raggeds])
+        shifts  = np.cumsum([0] + [len(r.values) for r in raggeds[:-1]])
+        offsets = np.concatenate([[0]] + [r.offsets[1:] + shift for r, shift in zip(raggeds, shifts)])
+
+        return cls(values, offsets)
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, item):
+        """
+        ragged[i] returns the i-th segment (view on the flat buffer), ragged[a:b] a RaggedArray of the segments a..b-1
+        """
+
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                return self.take(np.arange(start, stop, step))
+
+            stop = max(start, stop)
+            offsets = self.offsets[start:stop+1]
+
+            return RaggedArray(self.values[offsets[0]:offsets[-1]], offsets - offsets[0])
+
+        if item < 0:
+            item += len(self)
+
+        return self.values[self.offsets[item]:self.offsets[item+1]]
+
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+    @property
+    def lengths(self):
+        """
+        :return: lengths of the segments
+        """
+        return np.diff(self.offsets)
+
+
+    def take(self, rows):
+        """
+        Extracts a subset of the segments
+        :param rows: array of segment indices
+        :return: RaggedArray
+        """
+
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+
+        # Flat index of each selected value
+        starts = np.repeat(self.offsets[rows], lengths)
+        local  = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+        return RaggedArray(self.values[starts + local], offsets)
+
+
+    def to_padded(self, fill=np.nan, width=None):
+        """
+        Converts to a 2D padded array (vectorized)
+        :param fill: fill value of the padding
+        :param width: number of columns (if None, the max length of the segments)
+        :return: tuple (padded [n x width], mask [n x width]) with mask True where a value exists
+        """
+
+        lengths = self.lengths
+        if width is None:
+            width = int(lengths.max()) if len(lengths) else 0
+
+        mask = np.arange(width)[None, :] < np.minimum(lengths, width)[:, None]
+
+        padded = np.full((len(self), width), fill, dtype=np.result_type(self.values, np.asarray(fill)))
+
+        # Values of each segment truncated to width
+        keep = (np.arange(len(self.values)) - np.repeat(self.offsets[:-1], lengths)) < width
+        padded[mask] = self.values[keep]
+
+        return padded, mask
+
+
+    def first(self, fill=np.nan):
+        """
+        :param fill: value of the empty segments
+        :return: 1D array of the first value of each segment
+        """
+
+        out = np.full(len(self), fill, dtype=np.result_type(self.values, np.asarray(fill)))
+        exist = self.lengths > 0
+        out[exist] = self.values[self.offsets[:-1][exist]]
+
+        return out
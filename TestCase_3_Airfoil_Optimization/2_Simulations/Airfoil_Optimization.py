@@ -25,6 +25,9 @@ import numpy as np
 # Import disciplines
 from Airfoil_Aero.d_airfoil_aero_2d import AirfoilAero2D
 
+from history_writer import LiveHistoryWriter
+from checkpoint import CheckpointWriter, resume_from_checkpoint, warm_start_from_history
+
 from ipdb import set_trace as keyboard
 
 # Initialize logger
@@ -56,6 +59,15 @@ if __name__ == '__main__':
     # Define run identificator
     output  = 'NACA_4_Aero_Opti'
 
+    # Live history >> each evaluation is appended to an h5 file during the run (see GEMSEOPostProcess.follow)
+    live_history = True
+    live_batch   = 1                # Rows written per batch (XFOIL calls are slow, write each of them)
+
+    # Checkpoints >> resume a run that stopped, or warm start from a previous history
+    checkpoint_every = 5            # New iterations between two checkpoints (0 to disable)
+    resume           = False        # Reload the checkpoint of this run (evaluated points are not run again)
+    warm_start_file  = None         # Previous h5 history to start from (e.g. history_NACA_4_Aero_Opti.h5)
+
     # Initialize the disciplines
     airfoil_aero = AirfoilAero2D()
 
@@ -100,7 +112,27 @@ if __name__ == '__main__':
     # Optimization options >> COBYLA search method
     opts = {"max_iter": 100, "algo": "NLOPT_COBYLA"}
 
-    scenario.execute(opts)
+    checkpoint_file = root + os.sep + '3_Results' + os.sep + 'checkpoint_' + output + '.h5'
+
+    if resume:
+        resume_from_checkpoint(scenario, checkpoint_file)
+    elif warm_start_file is not None:
+        warm_start_from_history(scenario, root + os.sep + '3_Results' + os.sep + warm_start_file)
+
+    if checkpoint_every:
+        CheckpointWriter(checkpoint_file, every=checkpoint_every).attach(scenario.formulation.opt_problem)
+
+    if live_history:
+        writer = LiveHistoryWriter(root + os.sep + '3_Results' + os.sep + 'live_history_' + output + '.h5',
+                                   batch_size=live_batch)
+        writer.attach(scenario.formulation.opt_problem)
+
+    try:
+        scenario.execute(opts)
+    finally:
+        if live_history:
+            writer.close()
+
     scenario.print_execution_metrics()
 
 